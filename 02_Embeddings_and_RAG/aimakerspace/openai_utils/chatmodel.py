@@ -1,23 +1,45 @@
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence
+import asyncio
 import os
 
+from aimakerspace.openai_utils.clients import ClientConfig, get_async_client, get_client
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
 load_dotenv()
 
 
 class ChatOpenAI:
-    def __init__(self, model_name: str = "gpt-4.1-mini"):
+    """Chat completion wrapper on top of the shared, pooled OpenAI clients.
+
+    Every instance built with the same ``client_config`` reuses one HTTP
+    connection pool, so TLS sessions and keep-alive connections survive
+    across calls instead of being rebuilt per request.
+    """
+
+    def __init__(self, model_name: str = "gpt-4.1-mini", client_config: Optional[ClientConfig] = None):
         self.model_name = model_name
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         if self.openai_api_key is None:
             raise ValueError("OPENAI_API_KEY is not set")
+        self.client_config = client_config
+
+    @property
+    def client(self) -> "OpenAI":
+        return get_client(self.client_config)
+
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        return get_async_client(self.client_config)
 
     def run(self, messages, text_only: bool = True, **kwargs):
         if not isinstance(messages, list):
             raise ValueError("messages must be a list")
 
-        client = OpenAI()
-        response = client.chat.completions.create(
+        response = self.client.chat.completions.create(
             model=self.model_name, messages=messages, **kwargs
         )
 
@@ -25,3 +47,48 @@ class ChatOpenAI:
             return response.choices[0].message.content
 
         return response
+
+    async def arun(self, messages, text_only: bool = True, **kwargs):
+        if not isinstance(messages, list):
+            raise ValueError("messages must be a list")
+
+        response = await self.async_client.chat.completions.create(
+            model=self.model_name, messages=messages, **kwargs
+        )
+
+        if text_only:
+            return response.choices[0].message.content
+
+        return response
+
+    def run_batch(self, conversations: Sequence[list], text_only: bool = True,
+                  max_concurrency: int = 8, **kwargs) -> List[Any]:
+        """Run several conversations in parallel threads over the shared sync pool.
+
+        Works inside notebooks (no event loop needed); results keep input order.
+        """
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be a positive integer")
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return list(
+                executor.map(lambda messages: self.run(messages, text_only, **kwargs), conversations)
+            )
+
+    async def arun_batch(self, conversations: Sequence[list], text_only: bool = True,
+                         max_concurrency: int = 8, return_exceptions: bool = False,
+                         **kwargs) -> List[Any]:
+        """Run several conversations concurrently, at most ``max_concurrency`` in flight."""
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be a positive integer")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(messages):
+            async with semaphore:
+                return await self.arun(messages, text_only, **kwargs)
+
+        return await asyncio.gather(
+            *(run_one(messages) for messages in conversations),
+            return_exceptions=return_exceptions,
+        )
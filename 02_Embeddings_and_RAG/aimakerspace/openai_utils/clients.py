@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional
+
+# httpx and openai are imported when the first client is built, so importing
+# this module (and the wrappers on top of it) stays cheap.
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    """HTTP settings shared by every wrapper built with the same config.
+
+    :param max_connections: Upper bound on open connections in the pool
+    :param max_keepalive_connections: Idle connections kept open for reuse
+    :param keepalive_expiry: Seconds an idle connection stays in the pool
+    :param timeout: Request timeout in seconds
+    :param max_retries: Retries performed by the OpenAI client itself
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = 60.0
+    max_retries: int = 2
+
+    def limits(self) -> "httpx.Limits":
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+DEFAULT_CLIENT_CONFIG = ClientConfig()
+
+_lock = threading.Lock()
+_clients: Dict[ClientConfig, "OpenAI"] = {}
+# An async connection pool belongs to the event loop that opened it, so async
+# clients are cached per loop. The cache entry goes away with the loop, but the
+# pool's sockets are only closed by ``aclose_clients`` (or garbage collection).
+_async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_loopless_async_clients: Dict[ClientConfig, "AsyncOpenAI"] = {}
+
+
+def get_client(config: Optional[ClientConfig] = None) -> "OpenAI":
+    """Return the process-wide sync client for ``config``, creating it once."""
+
+    from openai import DefaultHttpxClient, OpenAI
+
+    config = config or DEFAULT_CLIENT_CONFIG
+    with _lock:
+        client = _clients.get(config)
+        if client is None:
+            client = _clients[config] = OpenAI(
+                timeout=config.timeout,
+                max_retries=config.max_retries,
+                http_client=DefaultHttpxClient(limits=config.limits(), timeout=config.timeout),
+            )
+        return client
+
+
+def get_async_client(config: Optional[ClientConfig] = None) -> "AsyncOpenAI":
+    """Return the async client for ``config`` bound to the running event loop."""
+
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    config = config or DEFAULT_CLIENT_CONFIG
+    try:
+        loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _lock:
+        clients = (
+            _loopless_async_clients if loop is None else _async_clients.setdefault(loop, {})
+        )
+        client = clients.get(config)
+        if client is None:
+            client = clients[config] = AsyncOpenAI(
+                timeout=config.timeout,
+                max_retries=config.max_retries,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=config.limits(), timeout=config.timeout
+                ),
+            )
+        return client
+
+
+def close_clients() -> None:
+    """Close the cached sync clients (see ``aclose_clients`` for the async ones)."""
+
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+async def aclose_clients() -> None:
+    """Close the async clients of the running event loop and any loop-less ones.
+
+    Await it before the loop finishes, e.g. at the end of the coroutine passed
+    to ``asyncio.run``; later ``get_async_client`` calls create fresh clients.
+    """
+
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = list(_async_clients.pop(loop, {}).values())
+        clients.extend(_loopless_async_clients.values())
+        _loopless_async_clients.clear()
+    for client in clients:
+        await client.close()
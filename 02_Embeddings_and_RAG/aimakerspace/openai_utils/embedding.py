@@ -1,17 +1,32 @@
 from dotenv import load_dotenv
-from openai import AsyncOpenAI, OpenAI
-import openai
-from typing import List
+from dataclasses import replace
+from typing import TYPE_CHECKING, List, Optional
 import os
 import asyncio
 
+from aimakerspace.openai_utils.batching import EmbeddingScheduler
+from aimakerspace.openai_utils.clients import (
+    DEFAULT_CLIENT_CONFIG,
+    ClientConfig,
+    get_async_client,
+    get_client,
+)
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
 
 class EmbeddingModel:
-    def __init__(self, embeddings_model_name: str = "text-embedding-3-small", batch_size: int = 1024):
+    def __init__(self, embeddings_model_name: str = "text-embedding-3-small", batch_size: int = 1024,
+                 scheduler: Optional[EmbeddingScheduler] = None,
+                 client_config: Optional[ClientConfig] = None):
         load_dotenv()
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        self.async_client = AsyncOpenAI()
-        self.client = OpenAI()
+        self.client_config = client_config
+        # The scheduler retries batches itself; SDK retries on top would multiply them.
+        self.scheduled_client_config = replace(
+            client_config or DEFAULT_CLIENT_CONFIG, max_retries=0
+        )
 
         if self.openai_api_key is None:
             raise ValueError(
@@ -19,21 +34,27 @@ class EmbeddingModel:
             )
         self.embeddings_model_name = embeddings_model_name
         self.batch_size = batch_size
+        self.scheduler = scheduler or EmbeddingScheduler(max_batch_size=batch_size)
+
+    @property
+    def client(self) -> "OpenAI":
+        # Shared pooled clients: connections and TLS sessions outlive each call.
+        return get_client(self.client_config)
+
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        return get_async_client(self.client_config)
 
     async def async_get_embeddings(self, list_of_text: List[str]) -> List[List[float]]:
-        batches = [list_of_text[i:i + self.batch_size] for i in range(0, len(list_of_text), self.batch_size)]
-        
         async def process_batch(batch):
-            embedding_response = await self.async_client.embeddings.create(
+            client = get_async_client(self.scheduled_client_config)
+            embedding_response = await client.embeddings.create(
                 input=batch, model=self.embeddings_model_name
             )
             return [embeddings.embedding for embeddings in embedding_response.data]
-        
-        # Use asyncio.gather to process all batches concurrently
-        results = await asyncio.gather(*[process_batch(batch) for batch in batches])
-        
-        # Flatten the results
-        return [embedding for batch_result in results for embedding in batch_result]
+
+        # Token-packed batches, bounded concurrency and retry with backoff on 429s
+        return await self.scheduler.run(list_of_text, process_batch, self.embeddings_model_name)
 
     async def async_get_embedding(self, text: str) -> List[float]:
         embedding = await self.async_client.embeddings.create(
@@ -1,5 +1,8 @@
 import re
-from typing import Dict, List, Any, Optional, Union, Callable
+import string
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Union, Callable, NamedTuple, Sequence
 from abc import ABC, abstractmethod
 
 
@@ -8,6 +11,116 @@ class PromptValidationError(Exception):
     pass
 
 
+class TemplateField(NamedTuple):
+    """A ``{name!conversion:spec}`` placeholder of a compiled template"""
+    name: str
+    spec: str = ""
+    conversion: Optional[str] = None
+
+    def render(self, value: Any) -> str:
+        if self.conversion is None and not self.spec:
+            return str(value)
+        if self.conversion == "r":
+            value = repr(value)
+        elif self.conversion == "a":
+            value = ascii(value)
+        elif self.conversion == "s":
+            value = str(value)
+        return format(value, self.spec)
+
+
+class CompiledTemplate:
+    """
+    A ``str.format`` template parsed once into literal text and fields.
+
+    ``literals`` always has one more entry than ``fields``; rendering
+    interleaves them and joins once, so its cost is linear in the output
+    instead of re-scanning the template on every call.
+    """
+
+    __slots__ = ("literals", "fields", "variables")
+
+    def __init__(self, literals: Sequence[str], fields: Sequence[TemplateField]):
+        self.literals = tuple(literals)
+        self.fields = tuple(fields)
+        self.variables = [field.name for field in self.fields]
+
+    @classmethod
+    def parse(cls, prompt: str) -> 'CompiledTemplate':
+        """
+        Compile ``prompt``.
+
+        :raises PromptValidationError: On unbalanced braces or positional, attribute or index fields
+        """
+        literals: List[str] = []
+        fields: List[TemplateField] = []
+        pending = ""
+        try:
+            parsed = list(string.Formatter().parse(prompt))
+        except ValueError as e:
+            raise PromptValidationError(f"Invalid template syntax: {e}")
+        for literal, name, spec, conversion in parsed:
+            pending += literal
+            if name is None:
+                continue
+            if not name or name.isdigit() or any(c in name for c in ".["):
+                raise PromptValidationError(f"Invalid template syntax: unsupported field {{{name}}}")
+            if "{" in (spec or ""):
+                raise PromptValidationError(f"Invalid template syntax: nested field in {{{name}:{spec}}}")
+            literals.append(pending)
+            fields.append(TemplateField(name, spec or "", conversion))
+            pending = ""
+        literals.append(pending)
+        return cls(literals, fields)
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """Substitute ``values`` (missing names render as ``""``) in a single pass"""
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            parts.append(field.render(values.get(field.name, "")))
+            parts.append(literal)
+        return "".join(parts)
+
+    def join(self, others: Sequence['CompiledTemplate'], separator: str) -> 'CompiledTemplate':
+        """Concatenate already compiled templates with a literal ``separator``"""
+        literals = list(self.literals)
+        fields = list(self.fields)
+        for other in others:
+            literals[-1] += separator + other.literals[0]
+            literals.extend(other.literals[1:])
+            fields.extend(other.fields)
+        return CompiledTemplate(literals, fields)
+
+
+_TEMPLATE_CACHE_SIZE = 512
+_template_cache: "OrderedDict[str, CompiledTemplate]" = OrderedDict()
+_template_cache_lock = threading.Lock()
+
+
+def compile_template(prompt: str) -> CompiledTemplate:
+    """
+    Return the compiled form of ``prompt``, parsing each distinct template only once.
+
+    :raises PromptValidationError: If the template syntax is invalid
+    """
+    with _template_cache_lock:
+        compiled = _template_cache.get(prompt)
+        if compiled is not None:
+            _template_cache.move_to_end(prompt)
+            return compiled
+    compiled = CompiledTemplate.parse(prompt)
+    _remember_template(prompt, compiled)
+    return compiled
+
+
+def _remember_template(prompt: str, compiled: CompiledTemplate) -> None:
+    with _template_cache_lock:
+        _template_cache[prompt] = compiled
+        _template_cache.move_to_end(prompt)
+        while len(_template_cache) > _TEMPLATE_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+
+
 class ConditionalPrompt:
     """Enhanced prompt with conditional logic support"""
     
@@ -29,50 +142,75 @@ class ConditionalPrompt:
         self.defaults = defaults or {}
         self._var_pattern = re.compile(r'\{([^{}]+)\}')
         self._conditional_pattern = re.compile(r'\{if\s+([^}]+)\}(.*?)(?:\{else\}(.*?))?\{/if\}', re.DOTALL)
+        # Parsed once: each node is a literal string, a variable name (a
+        # 1-tuple) or a (condition, true_nodes, false_nodes) conditional.
+        self._nodes = self._compile(prompt)
         
     def format_prompt(self, **kwargs) -> str:
         """Format prompt with conditional logic evaluation"""
         merged_kwargs = {**self.defaults, **kwargs}
         
-        # Process conditional statements
-        result = self._process_conditionals(self.prompt, merged_kwargs)
-        
-        # Process regular variables
-        variables = self._var_pattern.findall(result)
+        parts: List[str] = []
+        variables: List[str] = []
+        self._render(self._nodes, merged_kwargs, parts, variables)
         
         if self.strict:
             missing_vars = set(variables) - set(merged_kwargs.keys())
             if missing_vars:
                 raise PromptValidationError(f"Missing required variables: {missing_vars}")
-        
-        # Format remaining variables
-        for var in variables:
-            value = merged_kwargs.get(var, "")
-            result = result.replace(f"{{{var}}}", str(value))
             
-        return result
+        return "".join(parts)
     
-    def _process_conditionals(self, text: str, context: Dict[str, Any]) -> str:
-        """Process conditional statements in the text"""
-        def replace_conditional(match):
-            condition = match.group(1).strip()
+    def _compile(self, text: str) -> List[Any]:
+        """Split the template into literal, variable and conditional nodes"""
+        nodes: List[Any] = []
+        position = 0
+        for match in self._conditional_pattern.finditer(text):
+            nodes.extend(self._compile_variables(text[position:match.start()]))
             true_content = match.group(2).strip()
             false_content = match.group(3).strip() if match.group(3) else ""
-            
-            # Evaluate condition
-            try:
-                # Simple evaluation - check if variable exists and is truthy
-                if condition in context:
-                    condition_result = bool(context[condition])
-                else:
-                    # Try to evaluate as a simple expression
-                    condition_result = self._evaluate_condition(condition, context)
-                
-                return true_content if condition_result else false_content
-            except Exception:
-                return false_content
-        
-        return self._conditional_pattern.sub(replace_conditional, text)
+            nodes.append((
+                match.group(1).strip(),
+                self._compile_variables(true_content),
+                self._compile_variables(false_content),
+            ))
+            position = match.end()
+        nodes.extend(self._compile_variables(text[position:]))
+        return nodes
+    
+    def _compile_variables(self, text: str) -> List[Any]:
+        nodes: List[Any] = []
+        position = 0
+        for match in self._var_pattern.finditer(text):
+            if match.start() > position:
+                nodes.append(text[position:match.start()])
+            nodes.append((match.group(1),))
+            position = match.end()
+        if position < len(text):
+            nodes.append(text[position:])
+        return nodes
+    
+    def _render(self, nodes: List[Any], context: Dict[str, Any], parts: List[str], variables: List[str]) -> None:
+        for node in nodes:
+            if isinstance(node, str):
+                parts.append(node)
+            elif len(node) == 1:
+                variables.append(node[0])
+                parts.append(str(context.get(node[0], "")))
+            else:
+                condition, true_nodes, false_nodes = node
+                branch = true_nodes if self._is_true(condition, context) else false_nodes
+                self._render(branch, context, parts, variables)
+    
+    def _is_true(self, condition: str, context: Dict[str, Any]) -> bool:
+        try:
+            # Simple evaluation - check if variable exists and is truthy
+            if condition in context:
+                return bool(context[condition])
+            # Try to evaluate as a simple expression
+            return self._evaluate_condition(condition, context)
+        except Exception:
+            return False
     
     def _evaluate_condition(self, condition: str, context: Dict[str, Any]) -> bool:
         """Evaluate simple conditions like 'var > 5' or 'var == "value"'"""
@@ -118,16 +256,11 @@ class BasePrompt:
         self.prompt = prompt
         self.strict = strict
         self.defaults = defaults or {}
-        self._pattern = re.compile(r"\{([^}]+)\}")
-        self._validate_template()
+        self._template = self._compile_template()
 
-    def _validate_template(self) -> None:
-        """Validates the template syntax"""
-        try:
-            test_vars = {var: "test" for var in self.get_input_variables()}
-            self.prompt.format(**test_vars)
-        except (KeyError, ValueError) as e:
-            raise PromptValidationError(f"Invalid template syntax: {e}")
+    def _compile_template(self) -> CompiledTemplate:
+        """Validates the template syntax and compiles it once for all renders"""
+        return compile_template(self.prompt)
 
     def format_prompt(self, **kwargs) -> str:
         """
@@ -137,20 +270,17 @@ class BasePrompt:
         :return: The formatted prompt string
         :raises PromptValidationError: If strict mode and required variables are missing
         """
-        variables = self.get_input_variables()
         merged_kwargs = {**self.defaults, **kwargs}
         
         if self.strict:
-            missing_vars = set(variables) - set(merged_kwargs.keys())
+            missing_vars = set(self._template.variables) - set(merged_kwargs.keys())
             if missing_vars:
                 raise PromptValidationError(f"Missing required variables: {missing_vars}")
         
-        # Use defaults for missing variables
-        format_dict = {var: merged_kwargs.get(var, self.defaults.get(var, "")) for var in variables}
-        
+        # Missing variables render as ""
         try:
-            return self.prompt.format(**format_dict)
-        except (KeyError, ValueError) as e:
+            return self._template.render(merged_kwargs)
+        except (TypeError, ValueError) as e:
             raise PromptValidationError(f"Error formatting prompt: {e}")
 
     def get_input_variables(self) -> List[str]:
@@ -159,7 +289,7 @@ class BasePrompt:
 
         :return: List of input variable names
         """
-        return self._pattern.findall(self.prompt)
+        return list(self._template.variables)
     
     def validate_inputs(self, **kwargs) -> Dict[str, List[str]]:
         """
@@ -168,7 +298,7 @@ class BasePrompt:
         :param kwargs: Variables to validate
         :return: Dict with 'missing' and 'extra' keys containing respective variable names
         """
-        required_vars = set(self.get_input_variables())
+        required_vars = set(self._template.variables)
         provided_vars = set(kwargs.keys())
         
         return {
@@ -254,6 +384,9 @@ class PromptTemplate(BasePrompt):
         """
         prompts = [self.prompt] + [t.prompt for t in templates]
         combined_prompt = separator.join(prompts)
+        if "{" not in separator and "}" not in separator:
+            # The parts are already validated; join their compiled forms instead of re-parsing.
+            _remember_template(combined_prompt, self._template.join([t._template for t in templates], separator))
         
         # Merge defaults
         combined_defaults = {**self.defaults}
@@ -271,6 +404,7 @@ class PromptTemplate(BasePrompt):
         :return: New child template
         """
         combined_prompt = f"{self.prompt}\n\n{child_prompt}"
+        _remember_template(combined_prompt, self._template.join([compile_template(child_prompt)], "\n\n"))
         combined_defaults = {**self.defaults, **kwargs.get('defaults', {})}
         
         child = PromptTemplate(
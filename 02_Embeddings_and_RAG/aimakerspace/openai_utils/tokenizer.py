@@ -0,0 +1,30 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+# Rough characters-per-token ratio for English text with OpenAI tokenizers,
+# used when tiktoken is not installed.
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str) -> Optional[Any]:
+    """Return the (cached) tiktoken encoding for ``model_name`` if available."""
+
+    # Imported here so importing this module never pays for tiktoken.
+    try:
+        import tiktoken
+    except ImportError:  # pragma: no cover - tiktoken is optional
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model_name: str = "text-embedding-3-small") -> int:
+    """Count tokens in ``text``, estimating from its length without tiktoken."""
+
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode_ordinary(text))
@@ -1,9 +1,11 @@
 import numpy as np
 from collections import defaultdict
-from typing import List, Tuple, Callable
-from aimakerspace.openai_utils.embedding import EmbeddingModel
+from typing import TYPE_CHECKING, List, Optional, Tuple, Callable
 import asyncio
 
+if TYPE_CHECKING:
+    from aimakerspace.openai_utils.embedding import EmbeddingModel
+
 
 def cosine_similarity(vector_a: np.array, vector_b: np.array) -> float:
     """Computes the cosine similarity between two vectors."""
@@ -14,9 +16,23 @@ def cosine_similarity(vector_a: np.array, vector_b: np.array) -> float:
 
 
 class VectorDatabase:
-    def __init__(self, embedding_model: EmbeddingModel = None):
+    def __init__(self, embedding_model: Optional["EmbeddingModel"] = None):
         self.vectors = defaultdict(np.array)
-        self.embedding_model = embedding_model or EmbeddingModel()
+        self._embedding_model = embedding_model
+
+    @property
+    def embedding_model(self) -> "EmbeddingModel":
+        # Built (and ``openai`` imported) on first use, so searching by vector
+        # or loading vectors never needs the API client or key.
+        if self._embedding_model is None:
+            from aimakerspace.openai_utils.embedding import EmbeddingModel
+
+            self._embedding_model = EmbeddingModel()
+        return self._embedding_model
+
+    @embedding_model.setter
+    def embedding_model(self, embedding_model: "EmbeddingModel") -> None:
+        self._embedding_model = embedding_model
 
     def insert(self, key: str, vector: np.array) -> None:
         self.vectors[key] = vector
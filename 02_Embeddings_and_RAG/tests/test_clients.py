@@ -0,0 +1,91 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from aimakerspace.openai_utils import clients
+from aimakerspace.openai_utils.chatmodel import ChatOpenAI
+from aimakerspace.openai_utils.clients import (
+    ClientConfig,
+    aclose_clients,
+    close_clients,
+    get_async_client,
+    get_client,
+)
+
+
+@pytest.fixture(autouse=True)
+def _api_key(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    yield
+    close_clients()
+
+
+def test_sync_clients_are_shared_per_config():
+    small = ClientConfig(max_connections=4)
+
+    assert get_client() is get_client()
+    assert get_client(small) is get_client(ClientConfig(max_connections=4))
+    assert get_client(small) is not get_client()
+    assert get_client(small).max_retries == small.max_retries
+
+    first = get_client()
+    close_clients()
+    assert get_client() is not first
+
+
+def test_async_clients_are_shared_within_an_event_loop():
+    async def clients_of_one_loop():
+        first, second = get_async_client(), get_async_client()
+        await aclose_clients()
+        return first, second, get_async_client()
+
+    first, second, after_close = asyncio.run(clients_of_one_loop())
+    assert first is second and after_close is not first
+    other_loop = asyncio.run(clients_of_one_loop())[0]
+    assert other_loop is not first
+    assert not clients._loopless_async_clients
+
+
+def test_chat_batches_keep_order_and_bound_concurrency():
+    chat = ChatOpenAI()
+    assert chat.client is ChatOpenAI().client
+    in_flight, peak = 0, 0
+
+    async def arun(messages, text_only=True, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return messages[0]["content"].upper()
+
+    chat.arun = arun
+    chat.run = lambda messages, text_only=True, **kwargs: messages[0]["content"].upper()
+    conversations = [[{"role": "user", "content": f"q{number}"}] for number in range(7)]
+    expected = [f"Q{number}" for number in range(7)]
+
+    assert asyncio.run(chat.arun_batch(conversations, max_concurrency=3)) == expected
+    assert peak == 3
+    assert chat.run_batch(conversations, max_concurrency=3) == expected
+    with pytest.raises(ValueError):
+        chat.run_batch(conversations, max_concurrency=0)
+
+
+def test_importing_the_wrappers_does_not_load_openai():
+    script = (
+        "import sys\n"
+        "import aimakerspace.openai_utils.chatmodel, aimakerspace.openai_utils.embedding\n"
+        "print(','.join(name for name in ('openai', 'httpx') if name in sys.modules))"
+    )
+    loaded = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+    assert loaded == ""
@@ -0,0 +1,55 @@
+import pytest
+
+from aimakerspace.openai_utils.prompts import (
+    BasePrompt,
+    CompiledTemplate,
+    ConditionalPrompt,
+    PromptTemplate,
+    PromptValidationError,
+    compile_template,
+)
+
+
+def test_compiled_template_renders_like_str_format():
+    template = "{{literal}} Hello {name}, score {score:.1f} ({name!r}) {missing}."
+    prompt = BasePrompt(template, defaults={"score": 0.25})
+
+    assert prompt.format_prompt(name="Ada") == "{literal} Hello Ada, score 0.2 ('Ada') ."
+    assert prompt.get_input_variables() == ["name", "score", "name", "missing"]
+    assert compile_template(template) is compile_template(template)
+    with pytest.raises(PromptValidationError, match="missing"):
+        BasePrompt(template, strict=True).format_prompt(name="Ada", score=1)
+
+
+@pytest.mark.parametrize("template", ["{0}", "{}", "{user.name}", "{a[0]}", "{unclosed", "{x:{y}}"])
+def test_unsupported_templates_are_rejected(template):
+    with pytest.raises(PromptValidationError):
+        CompiledTemplate.parse(template)
+
+
+def test_conditional_prompt_renders_each_branch():
+    prompt = ConditionalPrompt(
+        "Hi {name}. {if premium}Thanks, {name}!{else}Upgrade?{/if} "
+        '{if level > 2}Expert{/if}{if tier == "gold"}Gold{/if}',
+        defaults={"level": 1},
+    )
+
+    assert prompt.format_prompt(name="Ada", premium=True) == "Hi Ada. Thanks, Ada! "
+    assert prompt.format_prompt(name="Bob", level=3, tier="gold") == "Hi Bob. Upgrade? ExpertGold"
+    with pytest.raises(PromptValidationError):
+        ConditionalPrompt("{if x}{name}{/if}", strict=True).format_prompt(x=True)
+
+
+def test_composed_and_extended_templates_match_a_fresh_parse():
+    base = PromptTemplate("You are {persona}.", defaults={"persona": "helpful"})
+    task = PromptTemplate("Do {task}.", defaults={"task": "nothing"})
+
+    composed = base.compose(task, separator=" -- ")
+    assert composed.prompt == "You are {persona}. -- Do {task}."
+    assert composed.format_prompt(task="math") == "You are helpful. -- Do math."
+    assert composed.get_input_variables() == CompiledTemplate.parse(composed.prompt).variables
+
+    child = base.extend("Answer in {language}.", defaults={"language": "French"})
+    assert child.parent is base and child.format_prompt() == (
+        "You are helpful.\n\nAnswer in French."
+    )
@@ -0,0 +1,43 @@
+"""Retrieval-augmented generation building blocks from the AI Makerspace sessions.
+
+The main classes can be imported from the package root, e.g.
+``from aimakerspace import VectorDatabase``. Each one is loaded from its
+module on first access, so ``import aimakerspace`` stays cheap and only
+the dependencies a program actually uses (NumPy, ``openai``, PyPDF2) are
+ever imported.
+"""
+
+from importlib import import_module
+from typing import Any, List
+
+_EXPORTS = {
+    "EmbeddingBackend": "aimakerspace.embedding_backends",
+    "HashingEmbeddingModel": "aimakerspace.embedding_backends",
+    "default_embedding_model": "aimakerspace.embedding_backends",
+    "RetrievalAugmentedQAPipeline": "aimakerspace.rag",
+    "SemanticCache": "aimakerspace.semantic_cache",
+    "CharacterTextSplitter": "aimakerspace.text_utils",
+    "PDFLoader": "aimakerspace.text_utils",
+    "TextFileLoader": "aimakerspace.text_utils",
+    "TokenTextSplitter": "aimakerspace.text_utils",
+    "Record": "aimakerspace.vectordatabase",
+    "VectorDatabase": "aimakerspace.vectordatabase",
+    "records_from_texts": "aimakerspace.vectordatabase",
+    "ChatOpenAI": "aimakerspace.openai_utils.chatmodel",
+    "EmbeddingModel": "aimakerspace.openai_utils.embedding",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,289 @@
+"""Retrieval benchmarks for ``VectorDatabase`` on synthetic embeddings.
+
+Run ``python -m aimakerspace.benchmark --sizes 10000 100000 --dim 384``.
+Every search backend in ``INDEX_TYPES`` is built over the same corpus. For
+each one the suite records build time, memory (the float matrix, the
+index, and what the backend keeps resident when the store is memory-mapped),
+single-query latency percentiles, batched QPS and recall@k against exact
+search. The results
+are written as JSON (``--output``); ``--baseline`` compares them with an
+earlier file and exits non-zero on a regression.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from aimakerspace.indexes import FlatIndex, IVFIndex, SearchIndex
+from aimakerspace.quantization import ProductQuantizedIndex, ScalarQuantizedIndex
+from aimakerspace.vectordatabase import Record, VectorDatabase
+
+RESULTS_VERSION = 2
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of one backend on one corpus."""
+
+    backend: str
+    size: int
+    dim: int
+    k: int
+    build_seconds: float
+    vector_bytes: int
+    index_bytes: int
+    resident_bytes: int
+    p50_ms: float
+    p99_ms: float
+    batch_qps: float
+    recall: float
+
+
+def synthetic_corpus(
+    size: int,
+    dim: int,
+    clusters: int = 256,
+    noise: float = 0.5,
+    seed: int = 0,
+    block_size: int = 100_000,
+) -> Iterator[np.ndarray]:
+    """Yield ``size`` float32 vectors in blocks, drawn around ``clusters`` random centres.
+
+    Clustered data behaves like real embeddings for partitioned and
+    quantized indexes (uniform noise makes every approximate index look
+    bad). Blocks keep peak memory flat when building millions of vectors.
+    """
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    for start in range(0, size, block_size):
+        count = min(block_size, size - start)
+        block = centers[rng.integers(0, clusters, size=count)]
+        block += rng.normal(scale=noise, size=(count, dim)).astype(np.float32)
+        yield block
+
+
+def synthetic_queries(
+    count: int, dim: int, clusters: int = 256, noise: float = 0.5, seed: int = 0
+) -> np.ndarray:
+    """Queries from the same distribution as ``synthetic_corpus`` (but unseen points)."""
+
+    return next(synthetic_corpus(count, dim, clusters, noise, seed=seed + 1, block_size=count))
+
+
+def default_backends(dim: int) -> Dict[str, Callable[[], SearchIndex]]:
+    """One factory per registered index type, with settings valid for ``dim``.
+
+    Product quantization uses the largest divisor of ``dim`` up to 96 that
+    leaves at least four dimensions per sub-space, or a single sub-space
+    when ``dim`` is below four.
+    """
+
+    subspaces = max(m for m in range(1, max(1, min(96, dim // 4)) + 1) if dim % m == 0)
+    return {
+        "flat": FlatIndex,
+        "ivf": IVFIndex,
+        "sq8": ScalarQuantizedIndex,
+        "sq8+rerank": lambda: ScalarQuantizedIndex(rerank=100),
+        "pq": lambda: ProductQuantizedIndex(m=subspaces),
+        "pq+rerank": lambda: ProductQuantizedIndex(m=subspaces, rerank=100),
+    }
+
+
+def build(
+    index: SearchIndex, size: int, dim: int, seed: int = 0, clusters: int = 256
+) -> VectorDatabase:
+    """Insert the synthetic corpus into a fresh ``VectorDatabase`` using ``index``."""
+
+    vector_db = VectorDatabase(initial_capacity=size, index=index, lexical=False)
+    offset = 0
+    for block in synthetic_corpus(size, dim, clusters, seed=seed):
+        ids = [str(i) for i in range(offset, offset + len(block))]
+        vector_db.upsert_many([Record(id_, id_) for id_ in ids], block)
+        offset += len(block)
+    train = getattr(index, "train", None)
+    if train is not None and not getattr(index, "is_trained", True):
+        # Corpora below ``min_train_size`` would otherwise be searched exactly.
+        train(vector_db._store)
+    return vector_db
+
+
+def measure(
+    backend: str,
+    vector_db: VectorDatabase,
+    build_seconds: float,
+    queries: np.ndarray,
+    exact: Sequence[Sequence[str]],
+    k: int,
+) -> BenchmarkResult:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        vector_db.search(query, k)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    found = vector_db.search_many(queries, k)
+    batch_seconds = time.perf_counter() - started
+
+    hits = sum(
+        len(set(expected) & {text for text, _ in results})
+        for expected, results in zip(exact, found)
+    )
+    total = sum(len(expected) for expected in exact)
+    latencies_ms = np.asarray(latencies) * 1000
+    return BenchmarkResult(
+        backend=backend,
+        size=len(vector_db),
+        dim=queries.shape[1],
+        k=k,
+        build_seconds=build_seconds,
+        vector_bytes=vector_db._store.nbytes,
+        index_bytes=vector_db.index.nbytes,
+        resident_bytes=vector_db.index.resident_bytes(vector_db._store),
+        p50_ms=float(np.percentile(latencies_ms, 50)),
+        p99_ms=float(np.percentile(latencies_ms, 99)),
+        batch_qps=len(queries) / batch_seconds if batch_seconds else float("inf"),
+        recall=hits / total if total else 1.0,
+    )
+
+
+def run(
+    sizes: Sequence[int],
+    dim: int = 384,
+    k: int = 10,
+    num_queries: int = 200,
+    backends: Optional[Sequence[str]] = None,
+    seed: int = 0,
+    clusters: int = 256,
+    log: Callable[[str], None] = lambda message: None,
+) -> List[BenchmarkResult]:
+    """Benchmark ``backends`` (default: all) on a corpus of every size in ``sizes``."""
+
+    factories = default_backends(dim)
+    names = list(backends or factories)
+    unknown = set(names) - set(factories)
+    if unknown:
+        raise ValueError(f"Unknown backends: {sorted(unknown)}; choose from {sorted(factories)}")
+
+    queries = synthetic_queries(num_queries, dim, clusters, seed=seed)
+    results = []
+    for size in sizes:
+        exact: Optional[List[List[str]]] = None
+        # Exact search runs first so its answers are the recall ground truth.
+        for name in ["flat"] + [name for name in names if name != "flat"]:
+            started = time.perf_counter()
+            vector_db = build(factories[name](), size, dim, seed, clusters)
+            build_seconds = time.perf_counter() - started
+            if exact is None:
+                exact = [[text for text, _ in hits] for hits in vector_db.search_many(queries, k)]
+            if name in names:
+                result = measure(name, vector_db, build_seconds, queries, exact, k)
+                results.append(result)
+                log(_format(result))
+            del vector_db
+    return results
+
+
+def compare(
+    baseline: Sequence[Dict], results: Sequence[BenchmarkResult], tolerance: float = 0.2
+) -> List[str]:
+    """Describe regressions of ``results`` against a saved ``baseline`` results list.
+
+    A run regresses when recall drops by more than 0.01, or when p50 latency
+    or build time grows (or batched QPS falls) by more than ``tolerance``.
+    Only entries with the same backend, size, dim and k are compared.
+    """
+
+    previous = {(row["backend"], row["size"], row["dim"], row["k"]): row for row in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result.backend, result.size, result.dim, result.k))
+        if before is None:
+            continue
+        label = f"{result.backend} n={result.size}"
+        if result.recall < before["recall"] - 0.01:
+            regressions.append(f"{label}: recall {before['recall']:.3f} -> {result.recall:.3f}")
+        for field in ("p50_ms", "build_seconds"):
+            if getattr(result, field) > before[field] * (1 + tolerance):
+                regressions.append(
+                    f"{label}: {field} {before[field]:.3f} -> {getattr(result, field):.3f}"
+                )
+        if result.batch_qps < before["batch_qps"] / (1 + tolerance):
+            regressions.append(
+                f"{label}: batch_qps {before['batch_qps']:.1f} -> {result.batch_qps:.1f}"
+            )
+    return regressions
+
+
+def _format(result: BenchmarkResult) -> str:
+    return (
+        f"{result.backend:>10} n={result.size:<9} build={result.build_seconds:7.2f}s "
+        f"resident={result.resident_bytes / 1e6:8.1f}MB "
+        f"p50={result.p50_ms:7.2f}ms p99={result.p99_ms:7.2f}ms "
+        f"qps={result.batch_qps:8.1f} recall@{result.k}={result.recall:.3f}"
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--backends", nargs="+", default=None)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    parser.add_argument(
+        "--baseline", default=None, help="Fail if results regress against this JSON file"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.sizes,
+        dim=args.dim,
+        k=args.k,
+        num_queries=args.queries,
+        backends=args.backends,
+        seed=args.seed,
+        clusters=args.clusters,
+        log=lambda message: print(message, file=sys.stderr),
+    )
+    report = {
+        "version": RESULTS_VERSION,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "parameters": vars(args),
+        "results": [asdict(result) for result in results],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file_handle:
+            file_handle.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file_handle:
+            baseline = json.load(file_handle)["results"]
+        regressions = compare(baseline, results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
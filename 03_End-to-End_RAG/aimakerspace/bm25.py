@@ -0,0 +1,282 @@
+import re
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from aimakerspace.matrix_store import top_k_indices
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens used for both documents and queries."""
+
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 inverted index over the rows of a ``VectorDatabase``.
+
+    Every indexed text gets a document number; postings are kept in CSR form
+    (an ``indptr`` array over the vocabulary plus flat ``int32`` document /
+    ``uint16`` term-frequency arrays, about 6 bytes per posting). New
+    documents go to a pending buffer that queries also read and that is
+    merged into the arrays once it grows past an eighth of them. Replacing
+    or removing a row only marks its old document dead; dead postings are
+    skipped at query time and purged (renumbering the live documents) once
+    they make up a quarter of the index, so upserts and deletes never
+    rebuild everything. Merging and purging happen in ``add``, ``remove``
+    and ``flush`` only, so queries never modify the index.
+
+    :param k1: Term-frequency saturation
+    :param b: Document-length normalisation
+    """
+
+    state_file = "bm25_index.npz"
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._vocabulary: Dict[str, int] = {}
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._postings = np.empty(0, dtype=np.int32)
+        self._frequencies = np.empty(0, dtype=np.uint16)
+        self._reset_pending()
+        self._doc_rows = np.empty(0, dtype=np.int32)
+        self._doc_lengths = np.empty(0, dtype=np.int32)
+        self._row_docs = np.empty(0, dtype=np.int32)
+        self._doc_total = 0
+        self._dead_docs = 0
+        self._document_count = 0
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return self._document_count
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the compacted posting arrays."""
+
+        return self._indptr.nbytes + self._postings.nbytes + self._frequencies.nbytes
+
+    def rows(self) -> np.ndarray:
+        """Rows that currently hold a document, in ascending order."""
+
+        return np.flatnonzero(self._row_docs >= 0)
+
+    def add(self, rows: Iterable[int], texts: Iterable[str]) -> None:
+        """Index ``texts`` under ``rows``, replacing whatever those rows held."""
+
+        rows = [int(row) for row in rows]
+        self._remove(rows)
+        for row, text in zip(rows, texts):
+            counts = Counter(tokenize(text))
+            doc = self._doc_total
+            self._doc_total += 1
+            self._doc_rows = _grow(self._doc_rows, self._doc_total)
+            self._doc_lengths = _grow(self._doc_lengths, self._doc_total)
+            self._row_docs = _grow(self._row_docs, row + 1)
+            length = sum(counts.values())
+            self._doc_rows[doc] = row
+            self._doc_lengths[doc] = length
+            self._row_docs[row] = doc
+            self._document_count += 1
+            self._total_length += length
+            vocabulary = self._vocabulary
+            self._pending_terms.extend(
+                vocabulary.setdefault(token, len(vocabulary)) for token in counts
+            )
+            self._pending_docs.extend([doc] * len(counts))
+            self._pending_frequencies.extend(counts.values())
+        self._compact()
+
+    def remove(self, rows: Iterable[int]) -> None:
+        """Forget the documents stored under ``rows`` (unknown rows are ignored)."""
+
+        self._remove(rows)
+        self._compact()
+
+    def flush(self) -> None:
+        """Merge pending postings and purge dead documents now."""
+
+        self._compact(purge=True)
+
+    def _remove(self, rows: Iterable[int]) -> None:
+        for row in rows:
+            doc = self._row_docs[row] if row < len(self._row_docs) else -1
+            if doc < 0:
+                continue
+            self._row_docs[row] = -1
+            self._doc_rows[doc] = -1
+            self._dead_docs += 1
+            self._document_count -= 1
+            self._total_length -= int(self._doc_lengths[doc])
+
+    def scores(self, query: str, size: int) -> np.ndarray:
+        """BM25 score of every row ``< size`` for ``query`` (0 for non-matching rows)."""
+
+        scores = np.zeros(size, dtype=np.float32)
+        if not self._document_count:
+            return scores
+
+        average_length = self._total_length / self._document_count
+        for token, repeats in Counter(tokenize(query)).items():
+            term = self._vocabulary.get(token)
+            if term is None:
+                continue
+            docs, frequencies = self._term_postings(term)
+            rows = self._doc_rows[docs]
+            live = rows >= 0
+            frequency = int(np.count_nonzero(live))
+            if frequency == 0:
+                continue
+            docs, rows = docs[live], rows[live]
+            frequencies = frequencies[live].astype(np.float32)
+            idf = np.log1p((self._document_count - frequency + 0.5) / (frequency + 0.5))
+            norms = self.k1 * (
+                1 - self.b + self.b * self._doc_lengths[docs] / average_length
+            )
+            contribution = idf * frequencies * (self.k1 + 1) / (frequencies + norms)
+            in_range = rows < size
+            scores[rows[in_range]] += repeats * contribution[in_range]
+        return scores
+
+    def search(
+        self, query: str, k: int, size: int, mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(rows, scores)`` of the ``k`` best lexical matches with a positive score."""
+
+        scores = self.scores(query, size)
+        if mask is not None:
+            scores[~mask[:size]] = 0
+        matched = np.flatnonzero(scores > 0)
+        best = top_k_indices(scores[matched], k)
+        return matched[best], scores[matched[best]]
+
+    def save(self, directory: Path) -> None:
+        self.flush()
+        terms = sorted(self._vocabulary, key=self._vocabulary.get)
+        np.savez(
+            Path(directory) / self.state_file,
+            vocabulary=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+            indptr=self._indptr,
+            postings=self._postings,
+            frequencies=self._frequencies,
+            doc_rows=self._doc_rows[: self._doc_total],
+            doc_lengths=self._doc_lengths[: self._doc_total],
+            parameters=np.array([self.k1, self.b]),
+        )
+
+    def load(self, directory: Path) -> bool:
+        """Restore state written by ``save``; return ``False`` if there is none."""
+
+        state_path = Path(directory) / self.state_file
+        if not state_path.exists():
+            return False
+
+        with np.load(state_path) as state:
+            vocabulary = state["vocabulary"].tobytes().decode("utf-8")
+            self._indptr = state["indptr"]
+            self._postings = state["postings"]
+            self._frequencies = state["frequencies"]
+            self._doc_rows = state["doc_rows"]
+            self._doc_lengths = state["doc_lengths"]
+            self.k1, self.b = state["parameters"].tolist()
+        terms = vocabulary.split("\n") if vocabulary else []
+        self._vocabulary = {term: position for position, term in enumerate(terms)}
+        self._reset_pending()
+        self._doc_total = len(self._doc_rows)
+        live = self._doc_rows >= 0
+        # ``save`` purges dead postings, so none are left to skip.
+        self._dead_docs = 0
+        self._document_count = int(np.count_nonzero(live))
+        self._total_length = int(self._doc_lengths[live].sum())
+        self._row_docs = np.full(
+            int(self._doc_rows.max(initial=-1)) + 1, -1, dtype=np.int32
+        )
+        self._row_docs[self._doc_rows[live]] = np.flatnonzero(live)
+        return True
+
+    def _term_postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        if term + 1 < len(self._indptr):
+            start, stop = self._indptr[term], self._indptr[term + 1]
+            docs, frequencies = self._postings[start:stop], self._frequencies[start:stop]
+        else:
+            docs, frequencies = self._postings[:0], self._frequencies[:0]
+        if self._pending_terms:
+            terms, pending_docs, pending_frequencies = self._pending_arrays()
+            matches = terms == term
+            if matches.any():
+                docs = np.concatenate([docs, pending_docs[matches].astype(np.int32)])
+                frequencies = np.concatenate(
+                    [frequencies, _clip_frequencies(pending_frequencies[matches])]
+                )
+        return docs, frequencies
+
+    def _pending_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            np.frombuffer(self._pending_terms, dtype=np.int64),
+            np.frombuffer(self._pending_docs, dtype=np.int64),
+            np.frombuffer(self._pending_frequencies, dtype=np.int64),
+        )
+
+    def _reset_pending(self) -> None:
+        self._pending_terms = array("q")
+        self._pending_docs = array("q")
+        self._pending_frequencies = array("q")
+
+    def _compact(self, purge: bool = False) -> None:
+        """Merge pending postings into the CSR arrays once due, purging dead documents."""
+
+        purge = purge or self._dead_docs > max(1024, self._doc_total // 4)
+        pending = len(self._pending_terms)
+        merge = purge or pending > max(65536, len(self._postings) // 8)
+        if not merge or not (pending or self._dead_docs):
+            return
+
+        vocabulary_size = len(self._vocabulary)
+        counts = np.zeros(vocabulary_size, dtype=np.int64)
+        counts[: len(self._indptr) - 1] = np.diff(self._indptr)
+        pending_terms, pending_docs, pending_frequencies = self._pending_arrays()
+        terms = np.concatenate(
+            [np.repeat(np.arange(vocabulary_size, dtype=np.int64), counts), pending_terms]
+        )
+        docs = np.concatenate([self._postings.astype(np.int64), pending_docs])
+        frequencies = np.concatenate(
+            [self._frequencies, _clip_frequencies(pending_frequencies)]
+        )
+
+        if purge and self._dead_docs:
+            live = self._doc_rows[docs] >= 0
+            terms, docs, frequencies = terms[live], docs[live], frequencies[live]
+            # Renumber the surviving documents so the per-document arrays
+            # (and with them the purge threshold) shrink back.
+            live_docs = self._doc_rows[: self._doc_total] >= 0
+            docs = (np.cumsum(live_docs) - 1)[docs]
+            self._doc_rows = self._doc_rows[: self._doc_total][live_docs]
+            self._doc_lengths = self._doc_lengths[: self._doc_total][live_docs]
+            self._doc_total = len(self._doc_rows)
+            self._row_docs[self._doc_rows] = np.arange(self._doc_total, dtype=np.int32)
+            self._dead_docs = 0
+
+        order = np.lexsort((docs, terms))
+        self._postings = docs[order].astype(np.int32)
+        self._frequencies = frequencies[order]
+        self._indptr = np.zeros(vocabulary_size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=vocabulary_size), out=self._indptr[1:])
+        self._reset_pending()
+
+
+def _clip_frequencies(frequencies: np.ndarray) -> np.ndarray:
+    return np.minimum(frequencies, np.iinfo(np.uint16).max).astype(np.uint16)
+
+
+def _grow(values: np.ndarray, required: int) -> np.ndarray:
+    if required <= len(values):
+        return values
+    grown = np.full(max(required, 2 * len(values)), -1, dtype=values.dtype)
+    grown[: len(values)] = values
+    return grown
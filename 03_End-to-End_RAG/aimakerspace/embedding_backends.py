@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import os
+from functools import lru_cache
+from typing import Iterable, List
+
+import numpy as np
+
+from aimakerspace.bm25 import tokenize
+from aimakerspace.instrumentation import span
+
+# Selects the model ``default_embedding_model`` builds: "openai" or "hashing".
+EMBEDDING_BACKEND_VARIABLE = "AIMAKERSPACE_EMBEDDING_BACKEND"
+
+
+class EmbeddingBackend:
+    """Interface every embedding model used by ``VectorDatabase`` implements.
+
+    Subclasses implement ``get_embeddings``; the single-text and async
+    variants default to it (the async ones on a worker thread, which suits
+    CPU-bound local models). Remote models override the async methods with
+    real async I/O.
+    """
+
+    def get_embeddings(self, list_of_text: Iterable[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def get_embedding(self, text: str) -> List[float]:
+        return self.get_embeddings([text])[0]
+
+    async def async_get_embeddings(self, list_of_text: Iterable[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.get_embeddings, list(list_of_text))
+
+    async def async_get_embedding(self, text: str) -> List[float]:
+        return (await self.async_get_embeddings([text]))[0]
+
+
+class HashingEmbeddingModel(EmbeddingBackend):
+    """Deterministic local embeddings from hashed word n-grams.
+
+    Each text's lower-cased word n-grams (up to ``ngrams`` words) are hashed
+    into ``dimensions`` signed buckets, i.e. a fixed random projection of
+    its bag of words, with sublinear term frequency and L2 normalisation.
+    No network, key or training is needed and thousands of texts embed per
+    second on one core, so tests, benchmarks and bulk jobs can run offline.
+    Similarity is lexical rather than semantic: use it where speed matters
+    more than quality, or as a cheap first-stage filter before a real model.
+
+    :param dimensions: Length of the produced vectors
+    :param ngrams: Longest word n-gram hashed (1 for unigrams only)
+    :param seed: Salt mixed into every hash; different seeds give independent projections
+    """
+
+    def __init__(self, dimensions: int = 384, ngrams: int = 2, seed: int = 0):
+        if dimensions <= 0:
+            raise ValueError("dimensions must be a positive integer")
+        if ngrams <= 0:
+            raise ValueError("ngrams must be a positive integer")
+
+        self.dimensions = dimensions
+        self.ngrams = ngrams
+        self.seed = seed
+        self.embeddings_model_name = f"hashing-{dimensions}-{ngrams}-{seed}"
+
+    def get_embeddings(self, list_of_text: Iterable[str]) -> List[List[float]]:
+        return self.embed(list_of_text).tolist()
+
+    def embed(self, list_of_text: Iterable[str]) -> np.ndarray:
+        """Embed ``list_of_text`` into a ``(len, dimensions)`` float32 array."""
+
+        texts = list(list_of_text)
+        with span("embedding.embed", model=self.embeddings_model_name, texts=len(texts)):
+            return self._embed(texts)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        documents: List[int] = []
+        hashes: List[int] = []
+        for document, text in enumerate(texts):
+            features = self._features(tokenize(text))
+            hashes.extend(_hash_feature(feature, self.seed) for feature in features)
+            documents.extend([document] * len(features))
+
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        if hashes:
+            hashed = np.asarray(hashes, dtype=np.uint64)
+            buckets = (hashed % np.uint64(self.dimensions)).astype(np.int64)
+            signs = np.where(hashed >> np.uint64(63), -1.0, 1.0).astype(np.float32)
+            flat = np.asarray(documents, dtype=np.int64) * self.dimensions + buckets
+            positive = np.bincount(flat, weights=(signs > 0), minlength=vectors.size)
+            negative = np.bincount(flat, weights=(signs < 0), minlength=vectors.size)
+            # Sublinear tf on each side keeps frequent words from dominating.
+            vectors += (np.log1p(positive) - np.log1p(negative)).reshape(vectors.shape)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def _features(self, tokens: List[str]) -> List[str]:
+        features = list(tokens)
+        for size in range(2, self.ngrams + 1):
+            features.extend(
+                " ".join(tokens[start : start + size])
+                for start in range(len(tokens) - size + 1)
+            )
+        return features
+
+
+@lru_cache(maxsize=1 << 20)
+def _hash_feature(feature: str, seed: int) -> int:
+    # ``hash()`` is salted per process; blake2b keeps vectors stable across runs.
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8, salt=_salt(seed))
+    return int.from_bytes(digest.digest(), "little")
+
+
+@lru_cache(maxsize=None)
+def _salt(seed: int) -> bytes:
+    return seed.to_bytes(16, "little", signed=True)
+
+
+def default_embedding_model() -> EmbeddingBackend:
+    """Build the default model: OpenAI, or ``HashingEmbeddingModel`` when
+    ``AIMAKERSPACE_EMBEDDING_BACKEND=hashing`` (e.g. in CI)."""
+
+    backend = os.getenv(EMBEDDING_BACKEND_VARIABLE, "openai").lower()
+    if backend == "hashing":
+        return HashingEmbeddingModel()
+    if backend != "openai":
+        raise ValueError(
+            f"Unknown {EMBEDDING_BACKEND_VARIABLE} {backend!r}; expected 'openai' or 'hashing'"
+        )
+    from aimakerspace.openai_utils.embedding import EmbeddingModel
+
+    return EmbeddingModel()
@@ -0,0 +1,199 @@
+import base64
+import json
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class ServerStats:
+    """Counters describing the traffic a ``FakeEmbeddingServer`` has answered."""
+
+    requests: int = 0
+    inputs: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+
+
+class FakeEmbeddingServer:
+    """Local stand-in for the OpenAI ``/v1/embeddings`` endpoint.
+
+    Each request sleeps ``latency`` seconds (plus up to ``jitter`` and
+    ``per_input_latency`` per input) and returns deterministic unit vectors
+    derived from the input text, as JSON floats or base64 like the real
+    API. ``rate_limit`` caps requests per second with a token bucket and
+    answers the excess with ``429`` and ``Retry-After``; ``error_rate`` is
+    the fraction of requests failing with ``500``. Point a client at it
+    with ``OPENAI_BASE_URL=server.base_url`` (see ``environment``).
+
+    :param dimensions: Length of the returned vectors
+    :param latency: Base seconds spent on every request
+    :param jitter: Extra random seconds, uniform in ``[0, jitter]``
+    :param per_input_latency: Extra seconds per input in the request
+    :param rate_limit: Requests per second allowed (``None`` for unlimited)
+    :param error_rate: Probability that a request fails with ``500``
+    :param seed: Seed for jitter and injected errors
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 1536,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        per_input_latency: float = 0.0,
+        rate_limit: Optional[float] = None,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        if rate_limit is not None and rate_limit <= 0:
+            raise ValueError("rate_limit must be positive or None")
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.dimensions = dimensions
+        self.latency = latency
+        self.jitter = jitter
+        self.per_input_latency = per_input_latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.stats = ServerStats()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit or 0.0
+        self._refilled = time.monotonic()
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def environment(self) -> Dict[str, str]:
+        """Environment variables that route an ``OpenAI()`` client to this server."""
+
+        return {"OPENAI_BASE_URL": self.base_url, "OPENAI_API_KEY": "fake-key"}
+
+    def start(self) -> "FakeEmbeddingServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeEmbeddingServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def embed(self, text: str) -> np.ndarray:
+        """Deterministic unit vector for ``text``."""
+
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        vector = rng.standard_normal(self.dimensions).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def _admit(self, inputs: int) -> Optional[int]:
+        """Count the request and return an HTTP error status to inject, if any."""
+
+        with self._lock:
+            self.stats.requests += 1
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit
+                )
+                self._refilled = now
+                if self._tokens < 1:
+                    self.stats.rate_limited += 1
+                    return 429
+                self._tokens -= 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.stats.errors += 1
+                return 500
+            self.stats.inputs += inputs
+            delay = self.latency + self.per_input_latency * inputs
+            if self.jitter:
+                delay += self._random.uniform(0, self.jitter)
+        time.sleep(delay)
+        return None
+
+    def _response(self, inputs: List[str], model: str, encoding_format: str) -> Dict:
+        data = []
+        for position, text in enumerate(inputs):
+            vector = self.embed(text)
+            embedding = (
+                base64.b64encode(vector.tobytes()).decode("ascii")
+                if encoding_format == "base64"
+                else vector.tolist()
+            )
+            data.append({"object": "embedding", "index": position, "embedding": embedding})
+        tokens = sum(len(text.split()) for text in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": model,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+
+def _handler(server: FakeEmbeddingServer) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if not self.path.rstrip("/").endswith("/embeddings"):
+                self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+
+            inputs = body.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            status = server._admit(len(inputs))
+            if status == 429:
+                self._send(
+                    429,
+                    {"error": {"message": "Rate limit reached", "type": "requests"}},
+                    {"Retry-After": f"{1 / server.rate_limit:.3f}"},
+                )
+            elif status is not None:
+                self._send(status, {"error": {"message": "Injected failure", "type": "server_error"}})
+            else:
+                self._send(
+                    200,
+                    server._response(
+                        inputs, body.get("model", ""), body.get("encoding_format", "float")
+                    ),
+                )
+
+        def _send(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+            encoded = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, format: str, *args) -> None:
+            return None
+
+    return Handler
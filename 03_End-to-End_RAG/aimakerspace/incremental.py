@@ -0,0 +1,280 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from aimakerspace.openai_utils.embedding_cache import text_fingerprint
+from aimakerspace.text_utils import CharacterTextSplitter, PDFLoader
+from aimakerspace.vectordatabase import Record, VectorDatabase
+
+MANIFEST_VERSION = 2
+
+
+def chunk_id(source: str, ordinal: int) -> str:
+    """Record id of the ``ordinal``-th chunk of the file ``source``."""
+
+    return f"{source}#{ordinal}"
+
+
+@dataclass
+class SyncStats:
+    """Counters describing one incremental indexing run."""
+
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    chunks_embedded: int = 0
+    chunks_deleted: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.added} added, {self.updated} updated, {self.removed} removed, "
+            f"{self.unchanged} unchanged files; {self.chunks_embedded} chunks embedded, "
+            f"{self.chunks_deleted} deleted in {self.elapsed:.2f}s"
+        )
+
+
+class IncrementalIndexer:
+    """Keep a ``VectorDatabase`` in sync with a directory of ``.txt``/``.pdf`` files.
+
+    A JSON manifest records each file's mtime, size, SHA-256 and the hashes
+    of the chunks it produced. Chunk ``i`` of a file is stored as the record
+    ``chunk_id(path, i)`` with ``{"source": path, "chunk": i}`` metadata. On
+    every ``sync`` only new or changed files are loaded and split, and only
+    chunks whose text changed are embedded; files whose mtime and size are
+    unchanged are not even read. Changed files are streamed through
+    embedding in batches of about ``batch_size`` chunks, so memory does not
+    grow with the size of the change. Records of removed files and of chunks
+    past the new end of a shortened file are deleted. Files whose records
+    are missing from the store (e.g. it was not saved) are re-indexed.
+
+    :param vector_db: Store to keep in sync
+    :param manifest_path: JSON file tracking what has been indexed
+    :param splitter: Splitter applied to each file (must not change between runs)
+    :param encoding: Encoding of the text files
+    :param store_path: If given, ``vector_db`` is saved there before the
+        manifest is written, so the manifest never runs ahead of the store.
+        Otherwise persisting the store is left to the caller.
+    :param batch_size: Number of chunks embedded and upserted at a time
+    """
+
+    suffixes = (".txt", ".pdf")
+
+    def __init__(
+        self,
+        vector_db: VectorDatabase,
+        manifest_path: Union[str, Path],
+        splitter: Optional[CharacterTextSplitter] = None,
+        encoding: str = "utf-8",
+        store_path: Optional[Union[str, Path]] = None,
+        batch_size: int = 256,
+    ):
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer")
+
+        self.vector_db = vector_db
+        self.manifest_path = Path(manifest_path)
+        self.splitter = splitter or CharacterTextSplitter()
+        self.encoding = encoding
+        self.store_path = Path(store_path) if store_path is not None else None
+        self.batch_size = batch_size
+        self.files: Dict[str, dict] = self._load_manifest()
+
+    def sync(self, path: Union[str, Path]) -> SyncStats:
+        """Blocking wrapper around ``async_sync``."""
+
+        return asyncio.run(self.async_sync(path))
+
+    async def async_sync(self, path: Union[str, Path]) -> SyncStats:
+        """Bring the store and manifest up to date with the files under ``path``."""
+
+        stats = SyncStats()
+        started = time.perf_counter()
+        current = {str(file_path): file_path for file_path in self._iter_files(Path(path))}
+
+        records: List[Record] = []
+        vectors: List[Optional[np.ndarray]] = []
+        stale_ids: List[str] = []
+        changed: Dict[str, dict] = {}
+
+        async def flush() -> None:
+            missing = [position for position, vector in enumerate(vectors) if vector is None]
+            if missing:
+                embeddings = await self.vector_db.embedding_model.async_get_embeddings(
+                    [records[position].text for position in missing]
+                )
+                for position, embedding in zip(missing, embeddings):
+                    vectors[position] = embedding
+            stats.chunks_embedded += len(missing)
+            if records:
+                self.vector_db.upsert_many(records, vectors)
+            records.clear()
+            vectors.clear()
+
+        for name, file_path in current.items():
+            stat = file_path.stat()
+            previous = self.files.get(name)
+            if previous is not None and self._is_fresh(name, previous, stat):
+                stats.unchanged += 1
+                continue
+
+            data = file_path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if (
+                previous is not None
+                and previous["sha256"] == digest
+                and self._is_indexed(name, previous)
+            ):
+                # Touched but not modified: refresh the stat fields only.
+                previous.update(mtime=stat.st_mtime, size=stat.st_size)
+                stats.unchanged += 1
+                continue
+
+            chunks = list(self.splitter.iter_split(self._read(file_path, data)))
+            hashes = [text_fingerprint(chunk) for chunk in chunks]
+            reusable = self._stored_vectors(name, previous)
+            if previous is not None:
+                stale_ids.extend(
+                    chunk_id(name, ordinal)
+                    for ordinal in range(len(chunks), len(previous["chunks"]))
+                )
+            for ordinal, (chunk, chunk_hash) in enumerate(zip(chunks, hashes)):
+                records.append(
+                    Record(
+                        id=chunk_id(name, ordinal),
+                        text=chunk,
+                        metadata={"source": name, "chunk": ordinal},
+                    )
+                )
+                vectors.append(reusable.get(chunk_hash))
+                if len(records) >= self.batch_size:
+                    await flush()
+
+            changed[name] = {
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "sha256": digest,
+                "chunks": hashes,
+            }
+            if previous is None:
+                stats.added += 1
+            else:
+                stats.updated += 1
+        await flush()
+
+        removed = [name for name in self.files if name not in current]
+        for name in removed:
+            entry = self.files.pop(name)
+            stale_ids.extend(chunk_id(name, ordinal) for ordinal in range(len(entry["chunks"])))
+        self.files.update(changed)
+        stats.chunks_deleted = self.vector_db.delete_many(stale_ids)
+        stats.removed = len(removed)
+
+        if self.store_path is not None:
+            self.vector_db.save(self.store_path)
+        self._save_manifest()
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    def _stored_vectors(self, name: str, previous: Optional[dict]) -> Dict[str, np.ndarray]:
+        """Vectors of ``name``'s stored chunks keyed by the hash of their text.
+
+        Chunks that survived an edit keep their vectors instead of being
+        re-embedded. Hashing the stored text rather than trusting the
+        manifest keeps this correct after an interrupted sync.
+        """
+
+        reusable: Dict[str, np.ndarray] = {}
+        if previous is None:
+            return reusable
+        for ordinal in range(len(previous["chunks"])):
+            record = self.vector_db.get(chunk_id(name, ordinal))
+            if record is not None:
+                reusable.setdefault(
+                    text_fingerprint(record.text),
+                    np.array(self.vector_db.retrieve_from_key(record.id)),
+                )
+        return reusable
+
+    def _iter_files(self, path: Path) -> List[Path]:
+        if path.is_file():
+            return [path.resolve()]
+        return [
+            entry.resolve()
+            for entry in sorted(path.rglob("*"))
+            if entry.is_file() and entry.suffix.lower() in self.suffixes
+        ]
+
+    def _is_fresh(self, name: str, entry: dict, stat: os.stat_result) -> bool:
+        return (
+            entry["mtime"] == stat.st_mtime
+            and entry["size"] == stat.st_size
+            and self._is_indexed(name, entry)
+        )
+
+    def _is_indexed(self, name: str, entry: dict) -> bool:
+        return all(
+            chunk_id(name, ordinal) in self.vector_db
+            for ordinal in range(len(entry["chunks"]))
+        )
+
+    def _read(self, file_path: Path, data: bytes) -> str:
+        if file_path.suffix.lower() == ".pdf":
+            return "\n".join(PDFLoader(str(file_path)).iter_documents())
+        return data.decode(self.encoding)
+
+    def _load_manifest(self) -> Dict[str, dict]:
+        if not self.manifest_path.exists():
+            return {}
+        manifest = json.loads(self.manifest_path.read_text())
+        if manifest["format_version"] != MANIFEST_VERSION:
+            raise ValueError(
+                f"Unsupported index manifest version: {manifest['format_version']}"
+            )
+        return manifest["files"]
+
+    def _save_manifest(self) -> None:
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.manifest_path.with_suffix(self.manifest_path.suffix + ".tmp")
+        temporary.write_text(
+            json.dumps({"format_version": MANIFEST_VERSION, "files": self.files})
+        )
+        os.replace(temporary, self.manifest_path)
+
+
+def sync_directory(
+    path: Union[str, Path],
+    store_path: Union[str, Path],
+    splitter: Optional[CharacterTextSplitter] = None,
+) -> SyncStats:
+    """Incrementally re-index ``path`` into the saved store at ``store_path``.
+
+    The manifest is kept inside the store directory and written only after
+    the store itself has been saved.
+    """
+
+    store_path = Path(store_path)
+    if (store_path / "manifest.json").exists():
+        vector_db = VectorDatabase.load(store_path)
+    else:
+        vector_db = VectorDatabase()
+    indexer = IncrementalIndexer(
+        vector_db, store_path / "files.json", splitter, store_path=store_path
+    )
+    return indexer.sync(path)
+
+
+if __name__ == "__main__":
+    import sys
+
+    source = sys.argv[1] if len(sys.argv) > 1 else "data"
+    target = sys.argv[2] if len(sys.argv) > 2 else "vector_store"
+    print(sync_directory(source, target))
@@ -0,0 +1,422 @@
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from aimakerspace.matrix_store import MatrixStore, top_k_indices, top_k_indices_many
+
+# Upper bound on the entries of one (queries x rows) score block in ``search_many``.
+_SCORE_BLOCK = 1 << 24
+
+
+class SearchIndex:
+    """Interface for structures answering cosine top-k queries over a ``MatrixStore``.
+
+    The store owns the vectors; an index only keeps whatever auxiliary
+    structure it needs to find candidate rows quickly.
+    """
+
+    name = "base"
+
+    def add(self, store: MatrixStore, rows: np.ndarray) -> None:
+        """Register ``rows`` of ``store`` that were appended or overwritten."""
+
+        raise NotImplementedError
+
+    def remove(self, store: MatrixStore, rows: np.ndarray) -> None:
+        """Forget ``rows`` that are about to be released from ``store``."""
+
+        return None
+
+    def check_dimension(self, dim: int) -> None:
+        """Raise ``ValueError`` if vectors of dimension ``dim`` cannot be indexed."""
+
+        return None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the index's own structures (the store is not counted)."""
+
+        return 0
+
+    def resident_bytes(self, store: MatrixStore) -> int:
+        """Bytes that must stay in memory to keep answering queries over ``store``.
+
+        Scoring reads every float row, so by default this is the store plus
+        the index's own structures.
+        """
+
+        return store.nbytes + self.nbytes
+
+    def search(
+        self,
+        store: MatrixStore,
+        query: np.ndarray,
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(rows, scores)`` of the best ``k`` matches, best first.
+
+        When ``mask`` is given (a boolean array over the rows of ``store``)
+        only rows where it is set may be returned.
+        """
+
+        raise NotImplementedError
+
+    def search_many(
+        self,
+        store: MatrixStore,
+        queries: np.ndarray,
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Answer a 2-D batch of ``queries``; one ``(rows, scores)`` pair per query."""
+
+        return [self.search(store, query, k, mask) for query in queries]
+
+    def save(self, directory: Path) -> None:
+        """Persist any trained state next to a saved store."""
+
+        return None
+
+    def load(self, directory: Path, store: MatrixStore) -> None:
+        """Restore state written by ``save`` for the rows of ``store``."""
+
+        return None
+
+
+class FlatIndex(SearchIndex):
+    """Exact search: score every row with one matrix-vector product."""
+
+    name = "flat"
+
+    def add(self, store: MatrixStore, rows: np.ndarray) -> None:
+        return None
+
+    def search(
+        self,
+        store: MatrixStore,
+        query: np.ndarray,
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if mask is not None:
+            # Only the selected rows are gathered and scored.
+            candidates = np.flatnonzero(mask)
+            scores = store.cosine_scores(query, candidates)
+            best = top_k_indices(scores, k)
+            return candidates[best], scores[best]
+
+        scores = store.cosine_scores(query)
+        rows = top_k_indices(scores, k)
+        return rows, scores[rows]
+
+    def search_many(
+        self,
+        store: MatrixStore,
+        queries: np.ndarray,
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        candidates = None if mask is None else np.flatnonzero(mask)
+        count = len(store) if candidates is None else len(candidates)
+        block = max(1, _SCORE_BLOCK // max(1, count))
+        results: List[Tuple[np.ndarray, np.ndarray]] = []
+        for start in range(0, len(queries), block):
+            scores = store.cosine_scores_many(queries[start : start + block], candidates)
+            for query_scores, best in zip(scores, top_k_indices_many(scores, k)):
+                rows = best if candidates is None else candidates[best]
+                results.append((rows, query_scores[best]))
+        return results
+
+
+class IVFIndex(SearchIndex):
+    """Inverted-file index over spherical k-means centroids.
+
+    Rows are bucketed by their nearest centroid; a query scores the
+    ``nprobe`` closest centroids and then only the rows in those buckets.
+    Raising ``nprobe`` trades latency for recall. Until ``min_train_size``
+    vectors have been added the index answers queries exactly.
+
+    :param nlist: Number of centroids; defaults to ``4 * sqrt(n)`` at training time
+    :param nprobe: Number of buckets scanned per query
+    :param min_train_size: Vectors required before centroids are trained
+    :param max_train_size: Upper bound on the sample used for k-means
+    :param n_iter: Number of k-means iterations
+    :param seed: Seed for sampling and centroid initialisation
+    """
+
+    name = "ivf"
+    state_file = "ivf_index.npz"
+
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        min_train_size: int = 4096,
+        max_train_size: int = 65536,
+        n_iter: int = 20,
+        seed: int = 0,
+    ):
+        if nlist is not None and nlist <= 0:
+            raise ValueError("nlist must be a positive integer")
+        if nprobe <= 0:
+            raise ValueError("nprobe must be a positive integer")
+
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.max_train_size = max_train_size
+        self.n_iter = n_iter
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._list_sizes = np.empty(0, dtype=np.int64)
+        self._assignments = np.empty(0, dtype=np.int64)
+        self._count = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the centroids, inverted lists and row assignments."""
+
+        if not self.is_trained:
+            return 0
+        return (
+            self.centroids.nbytes
+            + sum(bucket.nbytes for bucket in self._lists)
+            + self._list_sizes.nbytes
+            + self._assignments.nbytes
+        )
+
+    def add(self, store: MatrixStore, rows: np.ndarray) -> None:
+        if not self.is_trained:
+            if len(store) >= self.min_train_size:
+                self.train(store)
+            return
+
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0:
+            return
+        self._grow_assignments(len(store))
+        self._count = len(store)
+        self._assign(rows, self._nearest_centroids(store, rows))
+
+    def remove(self, store: MatrixStore, rows: np.ndarray) -> None:
+        if not self.is_trained:
+            return
+        for row in np.asarray(rows, dtype=np.int64).tolist():
+            previous = self._assignments[row]
+            if previous >= 0:
+                self._remove_from_list(previous, row)
+                self._assignments[row] = -1
+
+    def train(self, store: MatrixStore) -> None:
+        """(Re)train centroids on a sample of ``store`` and reassign every row."""
+
+        live_rows = np.flatnonzero(store.alive)
+        count = len(live_rows)
+        if count == 0:
+            raise ValueError("Cannot train an IVF index on an empty store")
+
+        rng = np.random.default_rng(self.seed)
+        nlist = self.nlist or max(1, int(4 * np.sqrt(count)))
+        nlist = min(nlist, count)
+
+        sample_size = min(count, self.max_train_size)
+        sample_rows = np.sort(rng.choice(live_rows, size=sample_size, replace=False))
+        sample = store.unit_rows(sample_rows)
+        self.centroids = _spherical_kmeans(sample, nlist, self.n_iter, rng)
+
+        assignments = np.full(len(store), -1, dtype=np.int64)
+        assignments[live_rows] = self._nearest_centroids(store, live_rows)
+        self._build_lists(store, assignments)
+
+    def save(self, directory: Path) -> None:
+        if not self.is_trained:
+            return
+        np.savez(
+            Path(directory) / self.state_file,
+            centroids=self.centroids,
+            assignments=self._assignments[: self._count],
+            nprobe=self.nprobe,
+        )
+
+    def load(self, directory: Path, store: MatrixStore) -> None:
+        state_path = Path(directory) / self.state_file
+        if not state_path.exists():
+            if len(store) >= self.min_train_size:
+                self.train(store)
+            return
+
+        with np.load(state_path) as state:
+            self.centroids = state["centroids"].astype(store.dtype)
+            self.nprobe = int(state["nprobe"])
+            assignments = state["assignments"]
+        if assignments.shape[0] != len(store):
+            raise ValueError("Saved IVF assignments do not match the number of vectors")
+        self._build_lists(store, assignments)
+
+    def _build_lists(self, store: MatrixStore, assignments: np.ndarray) -> None:
+        nlist = self.centroids.shape[0]
+        count = assignments.shape[0]
+        assigned = np.flatnonzero(assignments >= 0)
+        order = assigned[np.argsort(assignments[assigned], kind="stable")]
+        sizes = np.bincount(assignments[assigned], minlength=nlist)
+        self._lists = [
+            np.concatenate([bucket, np.empty(max(16, len(bucket)), dtype=np.int64)])
+            for bucket in np.split(order, np.cumsum(sizes)[:-1])
+        ]
+        self._list_sizes = sizes.astype(np.int64)
+        self._assignments = np.full(max(store.capacity, count), -1, dtype=np.int64)
+        self._assignments[:count] = assignments
+        self._count = count
+
+    def search(
+        self,
+        store: MatrixStore,
+        query: np.ndarray,
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.is_trained:
+            return FlatIndex().search(store, query, k, mask)
+
+        probe_count = min(self.nprobe, len(self._lists))
+        if mask is not None:
+            # A filter selecting fewer rows than the probed lists would hold is
+            # answered exactly; otherwise it prunes the probed candidates.
+            expected = probe_count * self._list_sizes.sum() / max(1, len(self._lists))
+            if np.count_nonzero(mask) <= expected:
+                return FlatIndex().search(store, query, k, mask)
+
+        query_vector = np.asarray(query, dtype=store.dtype)
+        centroid_scores = self.centroids @ query_vector
+        probes = top_k_indices(centroid_scores, probe_count)
+        candidates = np.concatenate(
+            [self._lists[probe][: self._list_sizes[probe]] for probe in probes]
+        )
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        if candidates.size == 0:
+            return candidates, np.empty(0, dtype=store.dtype)
+
+        scores = store.cosine_scores(query_vector, candidates)
+        best = top_k_indices(scores, k)
+        return candidates[best], scores[best]
+
+    def _nearest_centroids(self, store: MatrixStore, rows: np.ndarray) -> np.ndarray:
+        nearest = np.empty(len(rows), dtype=np.int64)
+        for start in range(0, len(rows), 8192):
+            block = rows[start : start + 8192]
+            nearest[start : start + len(block)] = np.argmax(
+                store.matrix[block] @ self.centroids.T, axis=1
+            )
+        return nearest
+
+    def _assign(self, rows: np.ndarray, lists: np.ndarray) -> None:
+        for row, list_id in zip(rows.tolist(), lists.tolist()):
+            previous = self._assignments[row]
+            if previous == list_id:
+                continue
+            if previous >= 0:
+                self._remove_from_list(previous, row)
+            self._append_to_list(list_id, row)
+            self._assignments[row] = list_id
+
+    def _append_to_list(self, list_id: int, row: int) -> None:
+        size = self._list_sizes[list_id]
+        bucket = self._lists[list_id]
+        if size == bucket.shape[0]:
+            grown = np.empty(bucket.shape[0] * 2, dtype=np.int64)
+            grown[:size] = bucket[:size]
+            self._lists[list_id] = bucket = grown
+        bucket[size] = row
+        self._list_sizes[list_id] = size + 1
+
+    def _remove_from_list(self, list_id: int, row: int) -> None:
+        size = self._list_sizes[list_id]
+        bucket = self._lists[list_id]
+        position = int(np.flatnonzero(bucket[:size] == row)[0])
+        bucket[position] = bucket[size - 1]
+        self._list_sizes[list_id] = size - 1
+
+    def _grow_assignments(self, required: int) -> None:
+        if required <= self._assignments.shape[0]:
+            return
+        grown = np.full(max(required, 2 * self._assignments.shape[0]), -1, dtype=np.int64)
+        grown[: self._assignments.shape[0]] = self._assignments
+        self._assignments = grown
+
+
+def _spherical_kmeans(
+    vectors: np.ndarray, k: int, n_iter: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Cluster unit-length ``vectors`` into ``k`` unit-length centroids."""
+
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = np.argmax(vectors @ centroids.T, axis=1)
+        counts = np.bincount(labels, minlength=k)
+        occupied = np.flatnonzero(counts)
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts[occupied])[:-1]])
+        sums = np.zeros_like(centroids)
+        sums[occupied] = np.add.reduceat(vectors[order], starts, axis=0)
+
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            sums[empty] = vectors[rng.choice(len(vectors), size=empty.size, replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0)
+    return centroids
+
+
+def recall_at_k(
+    store: MatrixStore,
+    index: SearchIndex,
+    queries: Iterable[Iterable[float]],
+    k: int,
+) -> float:
+    """Mean fraction of the exact top-``k`` rows that ``index`` also returns."""
+
+    exact = FlatIndex()
+    hits = 0
+    total = 0
+    for query in queries:
+        expected, _ = exact.search(store, query, k)
+        found, _ = index.search(store, query, k)
+        hits += len(np.intersect1d(expected, found))
+        total += len(expected)
+    return hits / total if total else 1.0
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(200, 256))
+    data = centers[rng.integers(0, 200, size=50_000)] + rng.normal(
+        scale=0.5, size=(50_000, 256)
+    )
+    queries = data[rng.choice(len(data), size=200, replace=False)] + rng.normal(
+        scale=0.1, size=(200, 256)
+    )
+
+    store = MatrixStore()
+    store.extend(data)
+    ivf = IVFIndex()
+    ivf.train(store)
+
+    for nprobe in (1, 4, 8, 16, 32):
+        ivf.nprobe = nprobe
+        started = time.perf_counter()
+        for query in queries:
+            ivf.search(store, query, 10)
+        latency_ms = (time.perf_counter() - started) / len(queries) * 1000
+        recall = recall_at_k(store, ivf, queries, 10)
+        print(f"nprobe={nprobe:>3}  recall@10={recall:.3f}  latency={latency_ms:.2f} ms")
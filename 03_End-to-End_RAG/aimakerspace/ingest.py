@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from aimakerspace.text_utils import CharacterTextSplitter
+from aimakerspace.vectordatabase import Record, VectorDatabase, record_id
+
+_EXHAUSTED = object()
+
+
+@dataclass
+class IngestStats:
+    """Counters describing one streaming ingest run."""
+
+    documents: int = 0
+    chunks: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+
+
+async def aingest_documents(
+    documents: Iterable[str],
+    vector_db: VectorDatabase,
+    splitter: Optional[CharacterTextSplitter] = None,
+    batch_size: int = 256,
+    max_in_flight: int = 2,
+) -> IngestStats:
+    """Stream ``documents`` through split -> embed -> insert in bounded batches.
+
+    Documents are pulled lazily (pass ``loader.iter_documents()``) on a worker
+    thread so file I/O overlaps with embedding requests. Chunks are grouped
+    into batches of ``batch_size``; up to ``max_in_flight`` batches are
+    embedded concurrently while the next ones are being produced. Each chunk
+    is stored as a ``Record`` with a ``record_id`` id and the position of its
+    source document as ``{"document": n}`` metadata. Peak memory
+    is therefore bounded by roughly ``2 * max_in_flight * batch_size`` chunks
+    plus the document currently being split; duplicate chunks are counted by
+    digest, which costs a few dozen bytes per distinct chunk.
+    """
+
+    if batch_size <= 0 or max_in_flight <= 0:
+        raise ValueError("batch_size and max_in_flight must be positive integers")
+
+    splitter = splitter or CharacterTextSplitter()
+    queue: "asyncio.Queue[Optional[List[Record]]]" = asyncio.Queue(maxsize=max_in_flight)
+    stats = IngestStats()
+    started = time.perf_counter()
+
+    async def produce() -> None:
+        iterator = iter(documents)
+        batch: List[Record] = []
+        seen: Counter = Counter()
+        while True:
+            document = await asyncio.to_thread(next, iterator, _EXHAUSTED)
+            if document is _EXHAUSTED:
+                break
+            metadata = {"document": stats.documents}
+            stats.documents += 1
+            for chunk in splitter.iter_split(document):
+                # Count by digest so the counter does not keep every chunk alive.
+                digest = hashlib.sha256(chunk.encode("utf-8")).digest()
+                batch.append(Record(record_id(chunk, seen[digest]), chunk, dict(metadata)))
+                seen[digest] += 1
+                if len(batch) == batch_size:
+                    await queue.put(batch)
+                    batch = []
+        if batch:
+            await queue.put(batch)
+        for _ in range(max_in_flight):
+            await queue.put(None)
+
+    async def consume() -> None:
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            embeddings = await vector_db.embedding_model.async_get_embeddings(
+                [record.text for record in batch]
+            )
+            vector_db.upsert_many(batch, embeddings)
+            stats.chunks += len(batch)
+            stats.batches += 1
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(produce())
+            for _ in range(max_in_flight):
+                group.create_task(consume())
+    except* Exception as errors:
+        # Surface the first failure (e.g. an API error) rather than the group.
+        raise errors.exceptions[0] from errors
+    finally:
+        stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+if __name__ == "__main__":
+    import sys
+
+    from aimakerspace.text_utils import PDFLoader, TextFileLoader
+
+    source = sys.argv[1] if len(sys.argv) > 1 else "data"
+    loader = PDFLoader(source) if source.lower().endswith(".pdf") else TextFileLoader(source)
+    vector_db = VectorDatabase()
+    ingest_stats = asyncio.run(aingest_documents(loader.iter_documents(), vector_db))
+    print(
+        f"Ingested {ingest_stats.documents} documents / {ingest_stats.chunks} chunks "
+        f"in {ingest_stats.elapsed:.2f}s ({ingest_stats.chunks_per_second:.1f} chunks/s)"
+    )
@@ -0,0 +1,273 @@
+"""Ingestion throughput benchmark: load -> split -> embed -> index, fully offline.
+
+Run ``python -m aimakerspace.ingest_benchmark --documents 200`` to
+generate a synthetic text corpus, or pass ``--path`` to a directory of
+``.txt``/``.pdf`` files. Embeddings are requested from a local
+``FakeEmbeddingServer`` whose latency, rate limit and error rate are
+configurable, so batching and concurrency settings can be compared
+without an API key; ``--embedding-backend hashing`` embeds locally with
+``HashingEmbeddingModel`` instead. The report (JSON) has per-stage wall
+time and docs/sec, chunks/sec and bytes/sec.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from aimakerspace.embedding_backends import EmbeddingBackend, HashingEmbeddingModel
+from aimakerspace.fake_embedding_server import FakeEmbeddingServer
+from aimakerspace.openai_utils.batching import EmbeddingScheduler
+from aimakerspace.openai_utils.embedding import EmbeddingModel
+from aimakerspace.text_utils import CharacterTextSplitter, PDFLoader, TextFileLoader
+from aimakerspace.vectordatabase import VectorDatabase, records_from_texts
+
+_WORDS = (
+    "market startup founder product customer growth venture capital team revenue "
+    "software platform network engineer company build sell hire risk scale"
+).split()
+
+
+@dataclass
+class StageResult:
+    """Wall time and volume of one ingestion stage."""
+
+    name: str
+    seconds: float
+    items: int
+    bytes: int = 0
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class IngestBenchmarkResult:
+    """Totals of one ingestion run plus its per-stage breakdown."""
+
+    documents: int
+    chunks: int
+    bytes: int
+    seconds: float
+    stages: List[StageResult] = field(default_factory=list)
+    embedding: Dict[str, float] = field(default_factory=dict)
+    server: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.seconds if self.seconds else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict:
+        report = asdict(self)
+        report["stages"] = [
+            {**asdict(stage), "items_per_second": stage.items_per_second}
+            for stage in self.stages
+        ]
+        report.update(
+            docs_per_second=self.docs_per_second,
+            chunks_per_second=self.chunks_per_second,
+            bytes_per_second=self.bytes_per_second,
+        )
+        return report
+
+
+def write_synthetic_corpus(
+    directory: Path, documents: int = 100, words_per_document: int = 2000, seed: int = 0
+) -> Path:
+    """Write ``documents`` random-prose ``.txt`` files into ``directory``."""
+
+    rng = random.Random(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for number in range(documents):
+        sentences = []
+        remaining = words_per_document
+        while remaining > 0:
+            length = min(remaining, rng.randint(8, 25))
+            words = rng.choices(_WORDS, k=length)
+            sentences.append(" ".join(words).capitalize() + ".")
+            remaining -= length
+        (directory / f"doc_{number:06d}.txt").write_text(" ".join(sentences), encoding="utf-8")
+    return directory
+
+
+@contextmanager
+def _environment(variables: Dict[str, str]) -> Iterator[None]:
+    previous = {name: os.environ.get(name) for name in variables}
+    os.environ.update(variables)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def run(
+    path: Path,
+    server: Optional[FakeEmbeddingServer],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    scheduler: Optional[EmbeddingScheduler] = None,
+    index: bool = True,
+    embedding_model: Optional[EmbeddingBackend] = None,
+) -> IngestBenchmarkResult:
+    """Ingest every document under ``path``.
+
+    Embeddings come from ``embedding_model`` when given, otherwise from an
+    ``EmbeddingModel`` pointed at ``server``.
+    """
+
+    path = Path(path)
+    stages: List[StageResult] = []
+    started = time.perf_counter()
+
+    stage_started = time.perf_counter()
+    documents = TextFileLoader(str(path)).load_documents() if _has(path, ".txt") else []
+    stages.append(
+        StageResult("load_text", time.perf_counter() - stage_started, len(documents),
+                    sum(len(document.encode("utf-8")) for document in documents))
+    )
+    if _has(path, ".pdf"):
+        stage_started = time.perf_counter()
+        pdf_documents = PDFLoader(str(path)).load_documents()
+        stages.append(
+            StageResult("load_pdf", time.perf_counter() - stage_started, len(pdf_documents),
+                        sum(len(document.encode("utf-8")) for document in pdf_documents))
+        )
+        documents.extend(pdf_documents)
+    corpus_bytes = sum(stage.bytes for stage in stages)
+
+    stage_started = time.perf_counter()
+    chunks = CharacterTextSplitter(chunk_size, chunk_overlap).split_texts(documents)
+    stages.append(StageResult("split", time.perf_counter() - stage_started, len(chunks),
+                              sum(len(chunk.encode("utf-8")) for chunk in chunks)))
+
+    if embedding_model is None:
+        with _environment(server.environment()):
+            embedding_model = EmbeddingModel(scheduler=scheduler)
+    stage_started = time.perf_counter()
+    vectors = asyncio.run(embedding_model.async_get_embeddings(chunks))
+    stages.append(StageResult("embed", time.perf_counter() - stage_started, len(vectors)))
+
+    if index:
+        stage_started = time.perf_counter()
+        vector_db = VectorDatabase(embedding_model=embedding_model)
+        vector_db.upsert_many(records_from_texts(chunks), vectors)
+        stages.append(StageResult("index", time.perf_counter() - stage_started, len(vector_db)))
+
+    scheduler = getattr(embedding_model, "scheduler", None)
+    stats = None if scheduler is None else scheduler.last_stats
+    return IngestBenchmarkResult(
+        documents=len(documents),
+        chunks=len(chunks),
+        bytes=corpus_bytes,
+        seconds=time.perf_counter() - started,
+        stages=stages,
+        embedding={} if stats is None else {
+            "requests": stats.requests,
+            "retries": stats.retries,
+            "tokens": stats.tokens,
+            "texts_per_second": stats.texts_per_second,
+            "tokens_per_second": stats.tokens_per_second,
+        },
+        server={} if server is None else asdict(server.stats),
+    )
+
+
+def _has(path: Path, suffix: str) -> bool:
+    if path.is_file():
+        return path.suffix.lower() == suffix
+    return any(entry.is_file() for entry in path.rglob(f"*{suffix}"))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=None, help="Directory or file to ingest")
+    parser.add_argument("--documents", type=int, default=100, help="Synthetic documents")
+    parser.add_argument("--words", type=int, default=2000, help="Words per synthetic document")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--per-input-latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per second")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--embedding-backend", choices=("fake-openai", "hashing"), default="fake-openai")
+    parser.add_argument("--no-index", action="store_true", help="Skip the VectorDatabase stage")
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    scheduler = EmbeddingScheduler(
+        max_concurrency=args.concurrency, max_batch_size=args.batch_size, base_delay=0.05
+    )
+    server = FakeEmbeddingServer(
+        dimensions=args.dimensions,
+        latency=args.latency,
+        jitter=args.jitter,
+        per_input_latency=args.per_input_latency,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+    )
+    with tempfile.TemporaryDirectory() as scratch, server:
+        path = Path(args.path) if args.path else write_synthetic_corpus(
+            Path(scratch), args.documents, args.words
+        )
+        result = run(
+            path,
+            server,
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            scheduler=scheduler,
+            index=not args.no_index,
+            embedding_model=(
+                HashingEmbeddingModel(dimensions=args.dimensions)
+                if args.embedding_backend == "hashing"
+                else None
+            ),
+        )
+
+    for stage in result.stages:
+        print(
+            f"{stage.name:>9}: {stage.seconds:8.3f}s  {stage.items:>8} items  "
+            f"{stage.items_per_second:10.1f}/s",
+            file=sys.stderr,
+        )
+    print(
+        f"    total: {result.seconds:8.3f}s  {result.docs_per_second:.1f} docs/s  "
+        f"{result.chunks_per_second:.1f} chunks/s  {result.bytes_per_second / 1e6:.2f} MB/s",
+        file=sys.stderr,
+    )
+    report = {"parameters": vars(args), **result.to_dict()}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file_handle:
+            file_handle.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""Spans, counters and histograms for the aimakerspace hot paths.
+
+Instrumented code calls ``span``, ``increment`` and ``observe``; nothing is
+recorded until a sink is registered with ``add_sink``. Without sinks
+``span`` returns a shared no-op object and the metric functions return
+immediately, so instrumentation costs one tuple check per call site.
+
+    sink = InMemorySink()
+    add_sink(sink)
+    pipeline.run_pipeline("What is a good founder?")
+    print(sink.summary())
+
+``LoggingSink`` writes every record to a ``logging.Logger``;
+``OpenTelemetrySink`` forwards spans and metrics to the OpenTelemetry API
+(``pip install opentelemetry-api`` plus an SDK/exporter of your choice).
+"""
+
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+Attributes = Dict[str, Any]
+
+_sinks: Tuple["Sink", ...] = ()
+_sinks_lock = threading.Lock()
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar(
+    "aimakerspace_span", default=None
+)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """A timed operation; use through ``span`` (or ``start_span`` + ``end``)."""
+
+    __slots__ = (
+        "name", "attributes", "span_id", "parent_id", "start_ns", "start_time_ns",
+        "end_ns", "error", "events", "_sinks", "_token",
+    )
+
+    def __init__(self, name: str, attributes: Attributes, sinks: Tuple["Sink", ...]):
+        parent = _current.get()
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_time_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[BaseException] = None
+        self.events: List[Tuple[str, int, Attributes]] = []
+        self._sinks = sinks
+        self._token: Optional[contextvars.Token] = None
+        for sink in sinks:
+            sink.on_span_start(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+    @property
+    def end_time_ns(self) -> int:
+        return self.start_time_ns + ((self.end_ns or self.start_ns) - self.start_ns)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        """Mark a point inside the span, e.g. the first streamed token."""
+
+        self.events.append((name, time.perf_counter_ns() - self.start_ns, attributes))
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.perf_counter_ns()
+        self.error = error
+        for sink in self._sinks:
+            sink.on_span_end(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.end(exc)
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        return None
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        return None
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes: Any):
+    """Context manager timing the enclosed block as a span nested in the current one."""
+
+    return start_span(name, **attributes)
+
+
+def start_span(name: str, **attributes: Any):
+    """Start a span that is ended explicitly with ``end()``.
+
+    Unlike ``span`` it does not become the current span, so it is safe to
+    keep open across ``yield`` in generators.
+    """
+
+    sinks = _sinks
+    if not sinks:
+        return NOOP_SPAN
+    return Span(name, attributes, sinks)
+
+
+@contextmanager
+def activate(current):
+    """Make a ``start_span`` span current for the enclosed block without ending it."""
+
+    if current is NOOP_SPAN:
+        yield current
+        return
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+def increment(name: str, value: float = 1, **attributes: Any) -> None:
+    """Add ``value`` to the counter ``name``."""
+
+    sinks = _sinks
+    if not sinks:
+        return
+    for sink in sinks:
+        sink.on_metric("counter", name, value, attributes)
+
+
+def observe(name: str, value: float, **attributes: Any) -> None:
+    """Record ``value`` in the histogram ``name``."""
+
+    sinks = _sinks
+    if not sinks:
+        return
+    for sink in sinks:
+        sink.on_metric("histogram", name, value, attributes)
+
+
+def enabled() -> bool:
+    return bool(_sinks)
+
+
+def add_sink(sink: "Sink") -> "Sink":
+    global _sinks
+    with _sinks_lock:
+        _sinks = _sinks + (sink,)
+    return sink
+
+
+def remove_sink(sink: "Sink") -> None:
+    global _sinks
+    with _sinks_lock:
+        _sinks = tuple(registered for registered in _sinks if registered is not sink)
+
+
+class Sink:
+    """Receiver of instrumentation records; override the hooks you need."""
+
+    def on_span_start(self, span: Span) -> None:
+        return None
+
+    def on_span_end(self, span: Span) -> None:
+        return None
+
+    def on_metric(self, kind: str, name: str, value: float, attributes: Attributes) -> None:
+        return None
+
+
+class InMemorySink(Sink):
+    """Keeps finished spans, counter totals and histogram samples for inspection."""
+
+    def __init__(self, max_spans: int = 10_000):
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.histograms: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def on_span_end(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+            if len(self.spans) > self.max_spans:
+                del self.spans[: len(self.spans) - self.max_spans]
+            self.histograms[f"{span.name}.duration_ms"].append(span.duration_ms)
+
+    def on_metric(self, kind: str, name: str, value: float, attributes: Attributes) -> None:
+        with self._lock:
+            if kind == "counter":
+                self.counters[name] += value
+            else:
+                self.histograms[name].append(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+            self.histograms.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, mean, p50, p99 and max of every histogram (span durations included)."""
+
+        import numpy as np
+
+        with self._lock:
+            samples = {name: list(values) for name, values in self.histograms.items()}
+        summary = {}
+        for name, values in samples.items():
+            array = np.asarray(values, dtype=np.float64)
+            summary[name] = {
+                "count": float(array.size),
+                "mean": float(array.mean()),
+                "p50": float(np.percentile(array, 50)),
+                "p99": float(np.percentile(array, 99)),
+                "max": float(array.max()),
+            }
+        return summary
+
+    def iter_tree(self, root: Span) -> Iterator[Tuple[int, Span]]:
+        """Yield ``(depth, span)`` for ``root`` and its recorded descendants."""
+
+        children = defaultdict(list)
+        for recorded in self.spans:
+            children[recorded.parent_id].append(recorded)
+        stack = [(0, root)]
+        while stack:
+            depth, current = stack.pop()
+            yield depth, current
+            stack.extend(
+                (depth + 1, child)
+                for child in sorted(children[current.span_id], key=lambda s: -s.start_ns)
+            )
+
+
+class LoggingSink(Sink):
+    """Writes finished spans and metrics to ``logger`` at ``level``."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        self.logger = logger or logging.getLogger("aimakerspace")
+        self.level = level
+
+    def on_span_end(self, span: Span) -> None:
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(
+                self.level,
+                "span %s %.2fms%s %s",
+                span.name,
+                span.duration_ms,
+                " error=%r" % span.error if span.error is not None else "",
+                span.attributes,
+            )
+
+    def on_metric(self, kind: str, name: str, value: float, attributes: Attributes) -> None:
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s %s %s %s", kind, name, value, attributes)
+
+
+class OpenTelemetrySink(Sink):
+    """Forwards spans and metrics to OpenTelemetry tracers and meters.
+
+    Spans keep their nesting and timestamps; counters and histograms become
+    OTel ``Counter``/``Histogram`` instruments. Exporting is configured the
+    usual way through the OpenTelemetry SDK.
+    """
+
+    def __init__(self, tracer: Any = None, meter: Any = None):
+        # Imported here so programs without this sink never pay for opentelemetry.
+        try:
+            from opentelemetry import metrics as otel_metrics
+            from opentelemetry import trace as otel_trace
+        except ImportError as error:
+            raise ImportError(
+                "OpenTelemetrySink requires the 'opentelemetry-api' package"
+            ) from error
+        self._trace = otel_trace
+        self.tracer = tracer or otel_trace.get_tracer("aimakerspace")
+        self.meter = meter or otel_metrics.get_meter("aimakerspace")
+        self._open: Dict[int, Any] = {}
+        self._instruments: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def on_span_start(self, span: Span) -> None:
+        with self._lock:
+            parent = self._open.get(span.parent_id)
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = self.tracer.start_span(
+            span.name,
+            context=context,
+            attributes=_otel_attributes(span.attributes),
+            start_time=span.start_time_ns,
+        )
+        with self._lock:
+            self._open[span.span_id] = otel_span
+
+    def on_span_end(self, span: Span) -> None:
+        with self._lock:
+            otel_span = self._open.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attributes(_otel_attributes(span.attributes))
+        for name, offset_ns, attributes in span.events:
+            otel_span.add_event(
+                name, _otel_attributes(attributes), timestamp=span.start_time_ns + offset_ns
+            )
+        if span.error is not None:
+            otel_span.record_exception(span.error)
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        otel_span.end(end_time=span.end_time_ns)
+
+    def on_metric(self, kind: str, name: str, value: float, attributes: Attributes) -> None:
+        key = (kind, name)
+        with self._lock:
+            instrument = self._instruments.get(key)
+            if instrument is None:
+                create = self.meter.create_counter if kind == "counter" else self.meter.create_histogram
+                instrument = self._instruments[key] = create(name)
+        if kind == "counter":
+            instrument.add(value, _otel_attributes(attributes))
+        else:
+            instrument.record(value, _otel_attributes(attributes))
+
+
+def _otel_attributes(attributes: Attributes) -> Attributes:
+    return {
+        key: value if isinstance(value, (str, bool, int, float)) else str(value)
+        for key, value in attributes.items()
+        if value is not None
+    }
@@ -0,0 +1,304 @@
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the ``k`` largest ``scores`` in descending order.
+
+    Uses ``argpartition`` so only the selected ``k`` entries are sorted.
+    Entries scored ``-inf`` (released rows) are never returned.
+    """
+
+    count = scores.shape[0]
+    if k >= count:
+        ranked = np.argsort(-scores, kind="stable")
+    else:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+    if ranked.size and scores[ranked[-1]] == -np.inf:
+        ranked = ranked[scores[ranked] > -np.inf]
+    return ranked
+
+
+def top_k_indices_many(scores: np.ndarray, k: int) -> List[np.ndarray]:
+    """Row-wise ``top_k_indices`` for a 2-D ``(queries, candidates)`` score matrix."""
+
+    if scores.shape[1] > k:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    selected = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-selected, axis=1, kind="stable")
+    ranked = np.take_along_axis(candidates, order, axis=1)
+    finite = np.take_along_axis(selected, order, axis=1) > -np.inf
+    if finite.all():
+        return list(ranked)
+    return [row[keep] for row, keep in zip(ranked, finite)]
+
+
+class MatrixStore:
+    """Growable, contiguous embedding matrix with precomputed row norms.
+
+    Rows are appended into a preallocated buffer that doubles in size when
+    full, so inserts are amortised O(d) and searches can score every stored
+    vector with a single matrix-vector product. Released rows are marked dead
+    (they score ``-inf``) and their slots are reused by later inserts.
+    """
+
+    def __init__(
+        self,
+        dtype: np.dtype = np.float32,
+        initial_capacity: int = 1024,
+        growth_factor: float = 2.0,
+    ):
+        if initial_capacity <= 0:
+            raise ValueError("initial_capacity must be a positive integer")
+        if growth_factor <= 1.0:
+            raise ValueError("growth_factor must be greater than 1")
+
+        self.dtype = np.dtype(dtype)
+        self.initial_capacity = initial_capacity
+        self.growth_factor = growth_factor
+        self._matrix: Optional[np.ndarray] = None
+        self._norms = np.empty(0, dtype=self.dtype)
+        self._alive = np.empty(0, dtype=bool)
+        self._free: List[int] = []
+        self._size = 0
+
+    @classmethod
+    def from_arrays(
+        cls,
+        matrix: np.ndarray,
+        norms: np.ndarray,
+        alive: Optional[np.ndarray] = None,
+    ) -> "MatrixStore":
+        """Wrap existing (possibly memory-mapped) arrays without copying them.
+
+        The arrays are used as-is until the store has to grow, at which point
+        the rows are copied into a fresh in-memory buffer.
+        """
+
+        if matrix.ndim != 2 or norms.shape != (matrix.shape[0],):
+            raise ValueError("matrix must be 2-D and norms must have one entry per row")
+
+        store = cls(dtype=matrix.dtype, initial_capacity=max(1, matrix.shape[0]))
+        if matrix.shape[0]:
+            store._matrix = matrix
+            store._norms = norms
+            store._alive = (
+                np.ones(matrix.shape[0], dtype=bool)
+                if alive is None
+                else np.array(alive, dtype=bool)
+            )
+            store._free = np.flatnonzero(~store._alive).tolist()
+            store._size = matrix.shape[0]
+        return store
+
+    def __len__(self) -> int:
+        """Number of allocated rows, including released ones awaiting reuse."""
+
+        return self._size
+
+    @property
+    def live_count(self) -> int:
+        return self._size - len(self._free)
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Boolean mask of the allocated rows that hold a live vector."""
+
+        return self._alive[: self._size]
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Dimensionality of the stored vectors, or ``None`` when empty."""
+
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """View of the populated rows of the embedding matrix."""
+
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=self.dtype)
+        return self._matrix[: self._size]
+
+    @property
+    def norms(self) -> np.ndarray:
+        """View of the L2 norms of the populated rows."""
+
+        return self._norms[: self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the matrix and norm buffers (including spare capacity)."""
+
+        matrix_bytes = 0 if self._matrix is None else self._matrix.nbytes
+        return matrix_bytes + self._norms.nbytes + self._alive.nbytes
+
+    def row(self, row: int) -> np.ndarray:
+        """Return a read-only view of the vector stored at ``row``."""
+
+        if not 0 <= row < self._size:
+            raise IndexError(f"row {row} out of range for store of size {self._size}")
+        view = self._matrix[row]
+        view.flags.writeable = False
+        return view
+
+    def unit_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Return L2-normalised copies of ``rows`` (zero vectors stay zero)."""
+
+        vectors = np.array(self._matrix[rows], dtype=self.dtype)
+        norms = self._norms[rows][:, np.newaxis]
+        return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    def append(self, vector: Iterable[float]) -> int:
+        """Append ``vector`` and return the row it was stored at."""
+
+        return int(self.extend(np.asarray(vector, dtype=self.dtype)[np.newaxis, :])[0])
+
+    def extend(self, vectors: np.ndarray) -> np.ndarray:
+        """Store a 2-D batch of vectors and return the rows they occupy.
+
+        Slots freed by ``release`` are filled first, so the returned rows are
+        not necessarily contiguous.
+        """
+
+        batch = self._coerce_batch(vectors)
+        reused = [self._free.pop() for _ in range(min(len(self._free), batch.shape[0]))]
+        start = self._size
+        stop = start + batch.shape[0] - len(reused)
+        self._reserve(stop, batch.shape[1])
+        rows = np.concatenate(
+            [np.array(reused, dtype=np.int64), np.arange(start, stop, dtype=np.int64)]
+        )
+        self._matrix[rows] = batch
+        self._norms[rows] = np.linalg.norm(batch, axis=1)
+        self._alive[rows] = True
+        self._size = stop
+        return rows
+
+    def release(self, rows: Iterable[int]) -> None:
+        """Mark ``rows`` as deleted so they are skipped by search and reused later."""
+
+        for row in rows:
+            row = int(row)
+            if not 0 <= row < self._size or not self._alive[row]:
+                raise IndexError(f"row {row} is not a live row of this store")
+            self._alive[row] = False
+            self._free.append(row)
+
+    def set_row(self, row: int, vector: Iterable[float]) -> None:
+        """Overwrite the vector stored at ``row`` and refresh its norm."""
+
+        if not 0 <= row < self._size:
+            raise IndexError(f"row {row} out of range for store of size {self._size}")
+        values = self._coerce_batch(np.asarray(vector, dtype=self.dtype)[np.newaxis, :])
+        self._matrix[row] = values[0]
+        self._norms[row] = np.linalg.norm(self._matrix[row])
+
+    def cosine_scores(
+        self, query: Iterable[float], rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Cosine similarity between ``query`` and every stored row.
+
+        When ``rows`` is given only those rows are scored, in that order.
+        """
+
+        count = self._size if rows is None else len(rows)
+        if count == 0:
+            return np.empty(0, dtype=self.dtype)
+
+        query_vector = self._coerce_query(query)
+        query_norm = np.linalg.norm(query_vector)
+        if query_norm == 0:
+            scores = np.zeros(count, dtype=self.dtype)
+            scores[~(self.alive if rows is None else self._alive[rows])] = -np.inf
+            return scores
+
+        if rows is None:
+            dots = self.matrix @ query_vector
+            norms = self.norms
+            alive = self.alive
+        else:
+            dots = self._matrix[rows] @ query_vector
+            norms = self._norms[rows]
+            alive = self._alive[rows]
+        denominators = norms * query_norm
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(denominators > 0, dots / denominators, 0.0)
+        if self._free:
+            scores[~alive] = -np.inf
+        return scores.astype(self.dtype, copy=False)
+
+    def cosine_scores_many(
+        self, queries: np.ndarray, rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Cosine similarities of a 2-D batch of ``queries`` as a ``(queries, rows)`` matrix.
+
+        All queries are scored with one matrix-matrix product.
+        """
+
+        query_matrix = self._coerce_batch(queries)
+        if rows is None:
+            matrix, norms, alive = self.matrix, self.norms, self.alive
+        else:
+            matrix, norms, alive = self._matrix[rows], self._norms[rows], self._alive[rows]
+        if matrix.shape[0] == 0:
+            return np.empty((query_matrix.shape[0], 0), dtype=self.dtype)
+
+        dots = query_matrix @ matrix.T
+        denominators = np.linalg.norm(query_matrix, axis=1)[:, np.newaxis] * norms
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(denominators > 0, dots / denominators, 0.0)
+        if not alive.all():
+            scores[:, ~alive] = -np.inf
+        return scores.astype(self.dtype, copy=False)
+
+    def _coerce_query(self, query: Iterable[float]) -> np.ndarray:
+        query_vector = np.asarray(query, dtype=self.dtype)
+        if query_vector.ndim != 1 or query_vector.shape[0] != self.dim:
+            raise ValueError(
+                f"Query has shape {query_vector.shape}, expected ({self.dim},)"
+            )
+        return query_vector
+
+    def _coerce_batch(self, vectors: np.ndarray) -> np.ndarray:
+        batch = np.asarray(vectors, dtype=self.dtype)
+        if batch.ndim != 2:
+            raise ValueError(f"Expected a 2-D batch of vectors, got shape {batch.shape}")
+        if self.dim is not None and batch.shape[1] != self.dim:
+            raise ValueError(
+                f"Vector dimension {batch.shape[1]} does not match store dimension {self.dim}"
+            )
+        return batch
+
+    def _reserve(self, required: int, dim: int) -> None:
+        if self._matrix is None:
+            capacity = max(self.initial_capacity, required)
+            self._matrix = np.empty((capacity, dim), dtype=self.dtype)
+            self._norms = np.empty(capacity, dtype=self.dtype)
+            self._alive = np.zeros(capacity, dtype=bool)
+            return
+
+        if required <= self.capacity:
+            return
+
+        capacity = self.capacity
+        while capacity < required:
+            capacity = int(capacity * self.growth_factor) + 1
+
+        matrix = np.empty((capacity, dim), dtype=self.dtype)
+        matrix[: self._size] = self._matrix[: self._size]
+        norms = np.empty(capacity, dtype=self.dtype)
+        norms[: self._size] = self._norms[: self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+        self._matrix = matrix
+        self._norms = norms
+        self._alive = alive
@@ -0,0 +1,85 @@
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, Mapping, Optional, Set
+
+import numpy as np
+
+MetadataFilter = Mapping[str, Any]
+
+
+class MetadataIndex:
+    """Inverted index from metadata ``(field, value)`` pairs to store rows.
+
+    Scalar values are indexed as-is; list, tuple and set values are indexed
+    once per element, so a ``{"tags": [...]}`` field matches any of its tags.
+    Unhashable values (e.g. nested dicts) are stored but not filterable.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[Hashable, Set[int]]] = defaultdict(dict)
+
+    def add(self, row: int, metadata: Mapping[str, Any]) -> None:
+        for field, value in metadata.items():
+            for term in _terms(value):
+                self._postings[field].setdefault(term, set()).add(row)
+
+    def remove(self, row: int, metadata: Mapping[str, Any]) -> None:
+        for field, value in metadata.items():
+            values = self._postings.get(field)
+            if values is None:
+                continue
+            for term in _terms(value):
+                rows = values.get(term)
+                if rows is None:
+                    continue
+                rows.discard(row)
+                if not rows:
+                    del values[term]
+
+    def rows(self, metadata_filter: MetadataFilter) -> Set[int]:
+        """Rows matching every field of ``metadata_filter``.
+
+        A scalar condition requires equality; a list, tuple or set condition
+        matches any of its values.
+        """
+
+        matched: Optional[Set[int]] = None
+        # Intersect the most selective fields first so the working set stays small.
+        candidates = sorted(
+            (self._field_rows(field, condition) for field, condition in metadata_filter.items()),
+            key=len,
+        )
+        for rows in candidates:
+            matched = set(rows) if matched is None else matched & rows
+            if not matched:
+                return set()
+        return set() if matched is None else matched
+
+    def mask(self, metadata_filter: MetadataFilter, size: int) -> np.ndarray:
+        """Boolean mask of length ``size`` selecting the rows that match."""
+
+        mask = np.zeros(size, dtype=bool)
+        rows = self.rows(metadata_filter)
+        if rows:
+            mask[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+        return mask
+
+    def _field_rows(self, field: str, condition: Any) -> Set[int]:
+        values = self._postings.get(field, {})
+        if isinstance(condition, (list, tuple, set, frozenset)):
+            rows: Set[int] = set()
+            for value in condition:
+                rows |= values.get(_term(value), set())
+            return rows
+        return values.get(_term(condition), set())
+
+
+def _terms(value: Any) -> Iterable[Hashable]:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [item for item in value if isinstance(item, Hashable)]
+    return [value] if isinstance(value, Hashable) else []
+
+
+def _term(value: Any) -> Hashable:
+    if not isinstance(value, Hashable):
+        raise ValueError(f"Filter values must be hashable, got {type(value).__name__}")
+    return value
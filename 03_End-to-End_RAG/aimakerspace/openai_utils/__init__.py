@@ -0,0 +1,38 @@
+"""OpenAI chat and embedding wrappers, prompt templates and request batching.
+
+Names are resolved lazily on first access (see ``aimakerspace.__init__``)
+so importing the package does not import ``openai``.
+"""
+
+from importlib import import_module
+from typing import Any, List
+
+_EXPORTS = {
+    "EmbeddingScheduler": "aimakerspace.openai_utils.batching",
+    "ThroughputStats": "aimakerspace.openai_utils.batching",
+    "ChatOpenAI": "aimakerspace.openai_utils.chatmodel",
+    "EmbeddingModel": "aimakerspace.openai_utils.embedding",
+    "EmbeddingCache": "aimakerspace.openai_utils.embedding_cache",
+    "AssistantRolePrompt": "aimakerspace.openai_utils.prompts",
+    "BasePrompt": "aimakerspace.openai_utils.prompts",
+    "PackedContext": "aimakerspace.openai_utils.prompts",
+    "SystemRolePrompt": "aimakerspace.openai_utils.prompts",
+    "UserRolePrompt": "aimakerspace.openai_utils.prompts",
+    "pack_context": "aimakerspace.openai_utils.prompts",
+    "count_tokens": "aimakerspace.openai_utils.tokenizer",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,230 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from aimakerspace.openai_utils.tokenizer import count_tokens
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def _retryable_errors() -> Tuple[Type[BaseException], ...]:
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError,
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # ``RETRYABLE_ERRORS`` needs ``openai``, which is slow to import; build it on first access.
+    if name == "RETRYABLE_ERRORS":
+        return _retryable_errors()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@dataclass
+class ThroughputStats:
+    """Counters describing one scheduler run."""
+
+    texts: int = 0
+    tokens: int = 0
+    requests: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.texts / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.texts} texts / {self.tokens} tokens in {self.requests} requests "
+            f"({self.retries} retries) over {self.elapsed:.2f}s: "
+            f"{self.texts_per_second:.1f} texts/s, {self.tokens_per_second:.0f} tokens/s"
+        )
+
+
+class EmbeddingScheduler:
+    """Pack texts into token-bounded batches and send them with bounded concurrency.
+
+    Batches are cut whenever adding the next text would exceed
+    ``max_tokens_per_batch`` or ``max_batch_size`` inputs. At most
+    ``max_concurrency`` requests are in flight; rate-limit, timeout,
+    connection and 5xx errors are retried with exponential backoff and full
+    jitter (honouring ``Retry-After`` when the API sends it). Retrying is
+    left entirely to the scheduler, so ``request`` should not retry on its
+    own (build OpenAI clients with ``max_retries=0``); every attempt then
+    shows up in ``last_stats``. If one batch fails for good, the batches
+    still in flight are cancelled before the error is raised.
+
+    :param max_concurrency: Maximum number of in-flight requests
+    :param max_tokens_per_batch: Token budget of a single request
+    :param max_batch_size: Maximum number of inputs in a single request
+    :param max_retries: Retries per batch before the error is raised
+    :param base_delay: First backoff ceiling in seconds
+    :param max_delay: Upper bound on any single backoff in seconds
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_tokens_per_batch: int = 250_000,
+        max_batch_size: int = 1024,
+        max_retries: int = 6,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ):
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be a positive integer")
+        if max_tokens_per_batch <= 0 or max_batch_size <= 0:
+            raise ValueError("Batch limits must be positive integers")
+
+        self.max_concurrency = max_concurrency
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.last_stats: Optional[ThroughputStats] = None
+
+    def pack(
+        self, texts: Sequence[str], model_name: str = "text-embedding-3-small"
+    ) -> List[List[int]]:
+        """Group positions of ``texts`` into consecutive batches within the limits."""
+
+        return self._pack_counts([count_tokens(text, model_name) for text in texts])
+
+    def _pack_counts(self, token_counts: Sequence[int]) -> List[List[int]]:
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for position, tokens in enumerate(token_counts):
+            if current and (
+                current_tokens + tokens > self.max_tokens_per_batch
+                or len(current) >= self.max_batch_size
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(position)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def run(
+        self,
+        texts: Sequence[str],
+        request: Callable[[List[str]], Awaitable[List[T]]],
+        model_name: str = "text-embedding-3-small",
+    ) -> List[T]:
+        """Embed ``texts`` via ``request`` and return results in input order."""
+
+        stats = ThroughputStats(texts=len(texts))
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: List[Optional[T]] = [None] * len(texts)
+
+        async def process(batch: List[int]) -> None:
+            batch_texts = [texts[position] for position in batch]
+            for attempt in range(self.max_retries + 1):
+                stats.requests += 1
+                try:
+                    async with semaphore:
+                        outputs = await request(batch_texts)
+                    break
+                except _retryable_errors() as error:
+                    if attempt == self.max_retries:
+                        raise
+                    stats.retries += 1
+                    # The slot is free while backing off, so other batches keep going.
+                    await asyncio.sleep(self._backoff(attempt, error))
+            _check_output_count(batch_texts, outputs)
+            for position, output in zip(batch, outputs):
+                results[position] = output
+
+        token_counts = [count_tokens(text, model_name) for text in texts]
+        stats.tokens = sum(token_counts)
+        tasks = [
+            asyncio.ensure_future(process(batch)) for batch in self._pack_counts(token_counts)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            stats.elapsed = time.perf_counter() - started
+            self.last_stats = stats
+        return results
+
+    def run_sync(
+        self,
+        texts: Sequence[str],
+        request: Callable[[List[str]], List[T]],
+        model_name: str = "text-embedding-3-small",
+    ) -> List[T]:
+        """Blocking counterpart of ``run`` that sends batches one at a time."""
+
+        stats = ThroughputStats(texts=len(texts))
+        started = time.perf_counter()
+        results: List[T] = []
+        token_counts = [count_tokens(text, model_name) for text in texts]
+        stats.tokens = sum(token_counts)
+        try:
+            for batch in self._pack_counts(token_counts):
+                batch_texts = [texts[position] for position in batch]
+                for attempt in range(self.max_retries + 1):
+                    stats.requests += 1
+                    try:
+                        outputs = request(batch_texts)
+                        break
+                    except _retryable_errors() as error:
+                        if attempt == self.max_retries:
+                            raise
+                        stats.retries += 1
+                        time.sleep(self._backoff(attempt, error))
+                _check_output_count(batch_texts, outputs)
+                results.extend(outputs)
+        finally:
+            stats.elapsed = time.perf_counter() - started
+            self.last_stats = stats
+        return results
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+def _check_output_count(batch: Sequence[str], outputs: Sequence[Any]) -> None:
+    if len(outputs) != len(batch):
+        raise ValueError(
+            f"Request returned {len(outputs)} embeddings for a batch of {len(batch)} texts"
+        )
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
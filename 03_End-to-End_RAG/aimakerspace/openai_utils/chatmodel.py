@@ -1,25 +1,54 @@
 import os
-from typing import Any, AsyncIterator, Iterable, List, MutableMapping
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable, List, MutableMapping, Optional
 
-from dotenv import load_dotenv
-from openai import AsyncOpenAI, OpenAI
+from aimakerspace.instrumentation import observe, span, start_span
 
-load_dotenv()
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
 ChatMessage = MutableMapping[str, Any]
 
 
 class ChatOpenAI:
-    """Thin wrapper around the OpenAI chat completion APIs."""
+    """Thin wrapper around the OpenAI chat completion APIs.
+
+    ``openai`` is imported and the sync/async clients are built on first
+    use, so constructing a ``ChatOpenAI`` (or importing this module) stays
+    cheap for CLI tools and serverless cold starts.
+    """
 
     def __init__(self, model_name: str = "gpt-4o-mini"):
+        from dotenv import load_dotenv
+
+        load_dotenv()
         self.model_name = model_name
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        # Read now: the clients themselves are only built on first use.
+        self.openai_base_url = os.getenv("OPENAI_BASE_URL")
         if self.openai_api_key is None:
             raise ValueError("OPENAI_API_KEY is not set")
 
-        self._client = OpenAI()
-        self._async_client = AsyncOpenAI()
+        self._client: Optional["OpenAI"] = None
+        self._async_client: Optional["AsyncOpenAI"] = None
+
+    @property
+    def client(self) -> "OpenAI":
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(api_key=self.openai_api_key, base_url=self.openai_base_url)
+        return self._client
+
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+
+            self._async_client = AsyncOpenAI(
+                api_key=self.openai_api_key, base_url=self.openai_base_url
+            )
+        return self._async_client
 
     def run(
         self,
@@ -36,9 +65,31 @@ class ChatOpenAI:
         """
 
         message_list = self._coerce_messages(messages)
-        response = self._client.chat.completions.create(
-            model=self.model_name, messages=message_list, **kwargs
-        )
+        with span("llm.completion", model=self.model_name, messages=len(message_list)) as current:
+            response = self.client.chat.completions.create(
+                model=self.model_name, messages=message_list, **kwargs
+            )
+            _record_usage(current, response)
+
+        if text_only:
+            return response.choices[0].message.content
+
+        return response
+
+    async def arun(
+        self,
+        messages: Iterable[ChatMessage],
+        text_only: bool = True,
+        **kwargs: Any,
+    ) -> Any:
+        """Async counterpart of ``run`` using the shared async client."""
+
+        message_list = self._coerce_messages(messages)
+        with span("llm.completion", model=self.model_name, messages=len(message_list)) as current:
+            response = await self.async_client.chat.completions.create(
+                model=self.model_name, messages=message_list, **kwargs
+            )
+            _record_usage(current, response)
 
         if text_only:
             return response.choices[0].message.content
@@ -48,19 +99,51 @@ class ChatOpenAI:
     async def astream(
         self, messages: Iterable[ChatMessage], **kwargs: Any
     ) -> AsyncIterator[str]:
-        """Yield streaming completion chunks as they arrive from the API."""
+        """Yield streaming completion chunks as they arrive from the API.
 
-        message_list = self._coerce_messages(messages)
-        stream = await self._async_client.chat.completions.create(
-            model=self.model_name, messages=message_list, stream=True, **kwargs
-        )
+        The ``llm.stream`` span covers the whole stream and the time to the
+        first token is recorded in the ``llm.time_to_first_token_ms``
+        histogram.
+        """
 
-        async for chunk in stream:
-            content = chunk.choices[0].delta.content
-            if content is not None:
+        message_list = self._coerce_messages(messages)
+        # Not the current span: the generator may be resumed in other contexts.
+        current = start_span("llm.stream", model=self.model_name, messages=len(message_list))
+        started = time.perf_counter()
+        chunks = 0
+        error = None
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model_name, messages=message_list, stream=True, **kwargs
+            )
+            async for chunk in stream:
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content is None:
+                    continue
+                if not chunks:
+                    current.add_event("first_token")
+                    observe(
+                        "llm.time_to_first_token_ms",
+                        (time.perf_counter() - started) * 1000,
+                        model=self.model_name,
+                    )
+                chunks += 1
                 yield content
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            current.set_attribute("chunks", chunks)
+            current.end(error)
 
     def _coerce_messages(self, messages: Iterable[ChatMessage]) -> List[ChatMessage]:
         if isinstance(messages, list):
             return messages
         return list(messages)
+
+
+def _record_usage(current: Any, response: Any) -> None:
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        current.set_attribute("prompt_tokens", usage.prompt_tokens)
+        current.set_attribute("completion_tokens", usage.completion_tokens)
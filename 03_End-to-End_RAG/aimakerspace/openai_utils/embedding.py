@@ -1,17 +1,37 @@
-import asyncio
 import os
-from typing import Iterable, List
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple
 
-from dotenv import load_dotenv
-from openai import AsyncOpenAI, OpenAI
+from aimakerspace.embedding_backends import EmbeddingBackend
+from aimakerspace.instrumentation import span
+from aimakerspace.openai_utils.batching import EmbeddingScheduler
+from aimakerspace.openai_utils.embedding_cache import EmbeddingCache
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
-class EmbeddingModel:
-    """Helper for generating embeddings via the OpenAI API."""
 
-    def __init__(self, embeddings_model_name: str = "text-embedding-3-small"):
+class EmbeddingModel(EmbeddingBackend):
+    """Helper for generating embeddings via the OpenAI API.
+
+    When ``cache`` is provided, texts already embedded with the same model
+    are served from it and only the misses are sent to the API. Requests are
+    packed, throttled and retried by ``scheduler`` (see
+    ``EmbeddingScheduler``), so the OpenAI clients are built with SDK
+    retries disabled, and only when the first request is sent.
+    """
+
+    def __init__(
+        self,
+        embeddings_model_name: str = "text-embedding-3-small",
+        cache: Optional[EmbeddingCache] = None,
+        scheduler: Optional[EmbeddingScheduler] = None,
+    ):
+        from dotenv import load_dotenv
+
         load_dotenv()
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        # Read now: the clients themselves are only built on first use.
+        self.openai_base_url = os.getenv("OPENAI_BASE_URL")
         if self.openai_api_key is None:
             raise ValueError(
                 "OPENAI_API_KEY environment variable is not set. "
@@ -19,47 +39,116 @@ class EmbeddingModel:
             )
 
         self.embeddings_model_name = embeddings_model_name
-        self.async_client = AsyncOpenAI()
-        self.client = OpenAI()
+        self.cache = cache
+        self.scheduler = scheduler or EmbeddingScheduler()
+        self._client: Optional["OpenAI"] = None
+        self._async_client: Optional["AsyncOpenAI"] = None
+
+    @property
+    def client(self) -> "OpenAI":
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(
+                api_key=self.openai_api_key, base_url=self.openai_base_url, max_retries=0
+            )
+        return self._client
+
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+
+            self._async_client = AsyncOpenAI(
+                api_key=self.openai_api_key, base_url=self.openai_base_url, max_retries=0
+            )
+        return self._async_client
 
     async def async_get_embeddings(self, list_of_text: Iterable[str]) -> List[List[float]]:
         """Return embeddings for ``list_of_text`` using the async client."""
 
-        embedding_response = await self.async_client.embeddings.create(
-            input=list(list_of_text), model=self.embeddings_model_name
-        )
-
-        return [item.embedding for item in embedding_response.data]
+        texts = list(list_of_text)
+        with span("embedding.embed", model=self.embeddings_model_name, texts=len(texts)) as current:
+            cached, misses = self._lookup(texts)
+            current.set_attribute("requested", len(misses))
+            fetched = (
+                await self.scheduler.run(misses, self._async_request, self.embeddings_model_name)
+                if misses
+                else []
+            )
+            return self._merge(texts, cached, misses, fetched)
 
     async def async_get_embedding(self, text: str) -> List[float]:
         """Return an embedding for a single text using the async client."""
 
-        embedding = await self.async_client.embeddings.create(
-            input=text, model=self.embeddings_model_name
-        )
-
-        return embedding.data[0].embedding
+        return (await self.async_get_embeddings([text]))[0]
 
     def get_embeddings(self, list_of_text: Iterable[str]) -> List[List[float]]:
         """Return embeddings for ``list_of_text`` using the sync client."""
 
-        embedding_response = self.client.embeddings.create(
-            input=list(list_of_text), model=self.embeddings_model_name
-        )
-
-        return [item.embedding for item in embedding_response.data]
+        texts = list(list_of_text)
+        with span("embedding.embed", model=self.embeddings_model_name, texts=len(texts)) as current:
+            cached, misses = self._lookup(texts)
+            current.set_attribute("requested", len(misses))
+            fetched = (
+                self.scheduler.run_sync(misses, self._request, self.embeddings_model_name)
+                if misses
+                else []
+            )
+            return self._merge(texts, cached, misses, fetched)
 
     def get_embedding(self, text: str) -> List[float]:
         """Return an embedding for a single text using the sync client."""
 
-        embedding = self.client.embeddings.create(
-            input=text, model=self.embeddings_model_name
+        return self.get_embeddings([text])[0]
+
+    async def _async_request(self, texts: List[str]) -> List[List[float]]:
+        embedding_response = await self.async_client.embeddings.create(
+            input=texts, model=self.embeddings_model_name
+        )
+        return [item.embedding for item in embedding_response.data]
+
+    def _request(self, texts: List[str]) -> List[List[float]]:
+        embedding_response = self.client.embeddings.create(
+            input=texts, model=self.embeddings_model_name
         )
+        return [item.embedding for item in embedding_response.data]
 
-        return embedding.data[0].embedding
+    def _lookup(
+        self, texts: List[str]
+    ) -> Tuple[List[Optional[List[float]]], List[str]]:
+        """Return cached vectors (``None`` for misses) and the unique missing texts."""
+
+        if self.cache is None:
+            cached: List[Optional[List[float]]] = [None] * len(texts)
+        else:
+            cached = self.cache.get_many(self.embeddings_model_name, texts)
+        misses = list(
+            dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None)
+        )
+        return cached, misses
+
+    def _merge(
+        self,
+        texts: List[str],
+        cached: List[Optional[List[float]]],
+        misses: List[str],
+        fetched: Sequence[List[float]],
+    ) -> List[List[float]]:
+        """Store freshly fetched vectors and stitch results back into input order."""
+
+        if self.cache is not None and misses:
+            self.cache.put_many(self.embeddings_model_name, misses, fetched)
+        by_text = dict(zip(misses, fetched))
+        return [
+            vector if vector is not None else by_text[text]
+            for text, vector in zip(texts, cached)
+        ]
 
 
 if __name__ == "__main__":
+    import asyncio
+
     embedding_model = EmbeddingModel()
     print(asyncio.run(embedding_model.async_get_embedding("Hello, world!")))
     print(
@@ -0,0 +1,171 @@
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from aimakerspace.instrumentation import increment
+
+CacheKey = Tuple[str, str]
+
+
+def text_fingerprint(text: str) -> str:
+    """Return the SHA-256 hex digest identifying ``text`` in the cache."""
+
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache keyed on ``(model name, text hash)``.
+
+    Entries live in an in-memory LRU tier bounded by ``max_bytes`` and, when
+    ``path`` is given, in a SQLite file that survives restarts. Vectors are
+    held as packed float32 values, so a 1536-d embedding costs about 6 KB.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        path: Optional[Union[str, Path]] = None,
+    ):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be zero or a positive integer")
+
+        self.max_bytes = max_bytes
+        self.path = Path(path) if path is not None else None
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[CacheKey, array]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, text_hash))"
+            )
+            self._connection.commit()
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes currently held by the in-memory tier."""
+
+        return self._memory_bytes
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Return cached embeddings for ``texts`` with ``None`` for misses.
+
+        Every input counts as one hit or miss, both in ``hits``/``misses``
+        and in the ``embedding.cache_hits``/``embedding.cache_misses`` counters.
+        """
+
+        keys = [(model, text_fingerprint(text)) for text in texts]
+        found: Dict[CacheKey, array] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing and self._connection is not None:
+            for key, vector in self._load_persisted(missing).items():
+                found[key] = vector
+                self._remember(key, vector)
+
+        results: List[Optional[List[float]]] = []
+        for key in keys:
+            vector = found.get(key)
+            results.append(None if vector is None else vector.tolist())
+        hits = sum(result is not None for result in results)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(results) - hits
+        increment("embedding.cache_hits", hits, model=model)
+        increment("embedding.cache_misses", len(results) - hits, model=model)
+        return results
+
+    def put_many(
+        self, model: str, texts: Sequence[str], embeddings: Sequence[Sequence[float]]
+    ) -> None:
+        """Store ``embeddings`` for ``texts`` in every configured tier."""
+
+        if len(texts) != len(embeddings):
+            raise ValueError("texts and embeddings must have the same length")
+
+        entries = {
+            (model, text_fingerprint(text)): array("f", embedding)
+            for text, embedding in zip(texts, embeddings)
+        }
+        for key, vector in entries.items():
+            self._remember(key, vector)
+
+        if self._connection is not None:
+            with self._lock:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) "
+                    "VALUES (?, ?, ?)",
+                    [
+                        (model, text_hash, vector.tobytes())
+                        for (model, text_hash), vector in entries.items()
+                    ],
+                )
+                self._connection.commit()
+
+    def clear(self) -> None:
+        """Drop the in-memory tier (the SQLite tier is left untouched)."""
+
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _remember(self, key: CacheKey, vector: array) -> None:
+        size = vector.itemsize * len(vector)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous.itemsize * len(previous)
+            self._memory[key] = vector
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.itemsize * len(evicted)
+
+    def _load_persisted(self, keys: List[CacheKey]) -> Dict[CacheKey, array]:
+        loaded: Dict[CacheKey, array] = {}
+        with self._lock:
+            for start in range(0, len(keys), 400):
+                chunk = keys[start : start + 400]
+                clauses = " OR ".join("(model = ? AND text_hash = ?)" for _ in chunk)
+                params = [value for key in chunk for value in key]
+                rows = self._connection.execute(
+                    f"SELECT model, text_hash, vector FROM embeddings WHERE {clauses}",
+                    params,
+                ).fetchall()
+                for model, text_hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    loaded[(model, text_hash)] = vector
+        return loaded
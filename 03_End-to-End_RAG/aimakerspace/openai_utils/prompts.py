@@ -1,25 +1,69 @@
-import re
-from typing import Any, Dict, List
+import string
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aimakerspace.openai_utils.tokenizer import count_tokens
+
+TemplateField = Tuple[str, str, Optional[str]]
+
+
+@lru_cache(maxsize=512)
+def compile_template(prompt: str) -> Tuple[Tuple[str, ...], Tuple[TemplateField, ...]]:
+    """Parse ``prompt`` once into literal text and ``(name, spec, conversion)`` fields.
+
+    The literals interleave with the fields (there is always one more
+    literal), so rendering is a single pass and a single join. Raises
+    ``ValueError`` for unbalanced braces and positional, attribute or index
+    fields.
+    """
+
+    literals: List[str] = []
+    fields: List[TemplateField] = []
+    pending = ""
+    for literal, name, spec, conversion in string.Formatter().parse(prompt):
+        pending += literal
+        if name is None:
+            continue
+        if not name or name.isdigit() or any(c in name for c in ".["):
+            raise ValueError(f"Unsupported placeholder {{{name}}} in prompt template")
+        literals.append(pending)
+        fields.append((name, spec or "", conversion))
+        pending = ""
+    literals.append(pending)
+    return tuple(literals), tuple(fields)
 
 
 class BasePrompt:
-    """Simple string template helper used to format prompt text."""
+    """Simple string template helper used to format prompt text.
+
+    The template is compiled once (see ``compile_template``), so formatting
+    does not re-scan it for placeholders on every call.
+    """
 
     def __init__(self, prompt: str):
         self.prompt = prompt
-        self._pattern = re.compile(r"\{([^}]+)\}")
+        self._literals, self._fields = compile_template(prompt)
 
     def format_prompt(self, **kwargs: Any) -> str:
-        """Return the prompt with ``kwargs`` substituted for placeholders."""
+        """Return the prompt with ``kwargs`` substituted for placeholders.
+
+        Placeholders without a value render as an empty string.
+        """
 
-        matches = self._pattern.findall(self.prompt)
-        replacements = {match: kwargs.get(match, "") for match in matches}
-        return self.prompt.format(**replacements)
+        parts = [self._literals[0]]
+        for (name, spec, conversion), literal in zip(self._fields, self._literals[1:]):
+            value = kwargs.get(name, "")
+            if conversion is not None:
+                value = {"r": repr, "a": ascii}.get(conversion, str)(value)
+            parts.append(format(value, spec) if spec else str(value))
+            parts.append(literal)
+        return "".join(parts)
 
     def get_input_variables(self) -> List[str]:
         """Return the placeholder names used by this prompt."""
 
-        return self._pattern.findall(self.prompt)
+        return [name for name, _, _ in self._fields]
 
 
 class RolePrompt(BasePrompt):
@@ -51,6 +95,87 @@ class AssistantRolePrompt(RolePrompt):
         super().__init__(prompt, "assistant")
 
 
+@dataclass
+class PackedContext:
+    """Result of ``pack_context``: the rendered context and what went into it."""
+
+    text: str
+    chunks: List[Tuple[str, float]]
+    tokens: int
+    dropped: int = 0
+
+
+def pack_context(
+    chunks: Sequence[Tuple[str, float]],
+    max_tokens: Optional[int] = None,
+    model_name: str = "gpt-4o-mini",
+    source_template: str = "[Source {index}]: {text}",
+    separator: str = "\n\n",
+    min_overlap: int = 20,
+) -> PackedContext:
+    """Fit the best ``(text, score)`` chunks into a ``max_tokens`` context block.
+
+    Chunks are taken greedily in descending score order. Text a chunk
+    shares with an already packed chunk (the ``chunk_overlap`` that
+    ``CharacterTextSplitter`` repeats between neighbours, at least
+    ``min_overlap`` characters long) is trimmed, and chunks that add nothing
+    new are dropped. A chunk that would overflow the budget is skipped in
+    favour of later, smaller ones. Tokens are counted with the cached
+    tokenizer for ``model_name`` and the block is built with a single join.
+    """
+
+    kept: List[Tuple[str, float]] = []
+    pieces: List[str] = []
+    tokens = 0
+    dropped = 0
+    separator_tokens = count_tokens(separator, model_name) if separator else 0
+    for text, score in sorted(chunks, key=lambda chunk: chunk[1], reverse=True):
+        text = _trim_overlap(text, [kept_text for kept_text, _ in kept], min_overlap)
+        if not text:
+            dropped += 1
+            continue
+        piece = source_template.format(index=len(pieces) + 1, text=text, score=score)
+        cost = count_tokens(piece, model_name) + (separator_tokens if pieces else 0)
+        if max_tokens is not None and tokens + cost > max_tokens:
+            dropped += 1
+            continue
+        kept.append((text, score))
+        pieces.append(piece)
+        tokens += cost
+    return PackedContext(separator.join(pieces), kept, tokens, dropped)
+
+
+def _trim_overlap(text: str, packed: List[str], min_overlap: int) -> str:
+    """Strip from ``text`` any head or tail already present in ``packed``.
+
+    The longest overlap wins: a short phrase that happens to repeat at the
+    edge of an unrelated chunk must not be mistaken for the real neighbour.
+    """
+
+    if any(text in other for other in packed):
+        return ""
+    head = max((_overlap_length(other, text, min_overlap) for other in packed), default=0)
+    text = text[head:]
+    tail = max((_overlap_length(text, other, min_overlap) for other in packed), default=0)
+    if tail:
+        text = text[:-tail]
+    return text if text.strip() else ""
+
+
+def _overlap_length(left: str, right: str, min_overlap: int) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``."""
+
+    if min_overlap <= 0 or len(left) < min_overlap or len(right) < min_overlap:
+        return 0
+    anchor = right[:min_overlap]
+    start = left.find(anchor, max(0, len(left) - len(right)))
+    while start != -1:
+        if right.startswith(left[start:]):
+            return len(left) - start
+        start = left.find(anchor, start + 1)
+    return 0
+
+
 if __name__ == "__main__":
     prompt = BasePrompt("Hello {name}, you are {age} years old")
     print(prompt.format_prompt(name="John", age=30))
@@ -0,0 +1,316 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from aimakerspace.instrumentation import activate, observe, span, start_span
+from aimakerspace.openai_utils.chatmodel import ChatOpenAI
+from aimakerspace.openai_utils.prompts import SystemRolePrompt, UserRolePrompt, pack_context
+from aimakerspace.semantic_cache import SemanticCache
+from aimakerspace.vectordatabase import VectorDatabase
+
+RAG_SYSTEM_TEMPLATE = """You are a knowledgeable assistant that answers questions based strictly on provided context.
+
+Instructions:
+- Only answer questions using information from the provided context
+- If the context doesn't contain relevant information, respond with "I don't know"
+- Be accurate and cite specific parts of the context when possible
+- Keep responses {response_style} and {response_length}
+- Only use the provided context. Do not use external knowledge.
+- Only provide answers when you are confident the context supports your response."""
+
+RAG_USER_TEMPLATE = """Context Information:
+{context}
+
+Number of relevant sources found: {context_count}
+{similarity_scores}
+
+Question: {user_query}
+
+Please provide your answer based solely on the context above."""
+
+rag_system_prompt = SystemRolePrompt(RAG_SYSTEM_TEMPLATE)
+rag_user_prompt = UserRolePrompt(RAG_USER_TEMPLATE)
+
+
+class RetrievalAugmentedQAPipeline:
+    """Retrieve context from a ``VectorDatabase`` and answer with ``ChatOpenAI``.
+
+    ``run_pipeline`` is the blocking path. ``arun_pipeline`` embeds the query
+    with the async client and calls the async chat API, optionally streaming
+    tokens, so one event loop can serve many questions at once;
+    ``arun_batch`` answers a list of questions with bounded concurrency.
+
+    With a ``cache`` the query is embedded once, used for retrieval and for
+    a ``SemanticCache`` lookup; a near-duplicate question over the same
+    context is answered from the cache and ``result["cached"]`` is ``True``.
+    The cache must share the retriever's embedding model.
+
+    Retrieved chunks go through ``pack_context``: the overlap adjacent
+    chunks share is included once and, with ``max_context_tokens``, only
+    the best chunks that fit the budget are sent to the model.
+    ``result["context"]`` keeps the chunks as retrieved, while
+    ``result["packed_context"]`` holds the trimmed chunks actually placed in
+    the prompt (which ``similarity_scores`` describe).
+    """
+
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        vector_db_retriever: VectorDatabase,
+        response_style: str = "detailed",
+        include_scores: bool = False,
+        cache: Optional[SemanticCache] = None,
+        max_context_tokens: Optional[int] = None,
+    ) -> None:
+        self.llm = llm
+        self.vector_db_retriever = vector_db_retriever
+        self.response_style = response_style
+        self.include_scores = include_scores
+        self.cache = cache
+        self.max_context_tokens = max_context_tokens
+
+    def run_pipeline(self, user_query: str, k: int = 4, **system_kwargs: Any) -> Dict[str, Any]:
+        """Answer ``user_query`` synchronously from the ``k`` best matching chunks."""
+
+        with span("rag.pipeline", k=k, cache=self.cache is not None) as current:
+            if self.cache is None:
+                with span("rag.retrieve", k=k):
+                    context_list = self.vector_db_retriever.search_by_text(user_query, k=k)
+                messages, result = self._prepare(user_query, context_list, system_kwargs)
+                result["response"] = self.llm.run(messages)
+                return result
+
+            with span("rag.retrieve", k=k):
+                retriever = self.vector_db_retriever
+                query_vector = retriever.embedding_model.get_embedding(user_query)
+                context_list = retriever.search(query_vector, k)
+            messages, result = self._prepare(user_query, context_list, system_kwargs)
+            contexts = [context for context, _ in context_list]
+            namespace = self._cache_namespace(system_kwargs)
+            answer = self.cache.lookup(user_query, contexts, query_vector, namespace)
+            result["cached"] = answer is not None
+            current.set_attribute("cached", result["cached"])
+            if answer is None:
+                answer = self.llm.run(messages)
+                self.cache.store(user_query, contexts, answer, query_vector, namespace)
+            result["response"] = answer
+            return result
+
+    async def arun_pipeline(
+        self,
+        user_query: str,
+        k: int = 4,
+        stream: bool = False,
+        **system_kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Async ``run_pipeline``.
+
+        With ``stream=True`` the returned ``"response"`` is an async iterator
+        of completion tokens (consume it with ``async for``); retrieval has
+        already finished, so ``"context"`` is available before the first
+        token arrives. The ``rag.pipeline`` span then ends with the stream.
+        """
+
+        # Not ended on exit: a streamed answer is still being generated.
+        current = start_span("rag.pipeline", k=k, cache=self.cache is not None, stream=stream)
+        try:
+            with activate(current):
+                result = await self._arun_pipeline(current, user_query, k, stream, system_kwargs)
+        except BaseException as error:
+            current.end(error)
+            raise
+        if stream:
+            result["response"] = _end_with(current, result["response"])
+        else:
+            current.end()
+        return result
+
+    async def _arun_pipeline(
+        self,
+        current: Any,
+        user_query: str,
+        k: int,
+        stream: bool,
+        system_kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        if self.cache is None:
+            with span("rag.retrieve", k=k):
+                context_list = await self.vector_db_retriever.asearch_by_text(user_query, k=k)
+            messages, result = self._prepare(user_query, context_list, system_kwargs)
+            if stream:
+                result["response"] = self.llm.astream(messages)
+            else:
+                result["response"] = await self.llm.arun(messages)
+            return result
+
+        with span("rag.retrieve", k=k):
+            retriever = self.vector_db_retriever
+            query_vector = await retriever.embedding_model.async_get_embedding(user_query)
+            context_list = await asyncio.to_thread(retriever.search, query_vector, k)
+        messages, result = self._prepare(user_query, context_list, system_kwargs)
+        contexts = [context for context, _ in context_list]
+        namespace = self._cache_namespace(system_kwargs)
+        answer = await self.cache.alookup(user_query, contexts, query_vector, namespace)
+        result["cached"] = answer is not None
+        current.set_attribute("cached", result["cached"])
+        if answer is not None:
+            result["response"] = _replay(answer) if stream else answer
+        elif stream:
+            result["response"] = self._stream_and_store(
+                messages, user_query, contexts, query_vector, namespace
+            )
+        else:
+            answer = await self.llm.arun(messages)
+            await self.cache.astore(user_query, contexts, answer, query_vector, namespace)
+            result["response"] = answer
+        return result
+
+    async def astream_pipeline(
+        self, user_query: str, k: int = 4, **system_kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Yield the answer to ``user_query`` token by token."""
+
+        result = await self.arun_pipeline(user_query, k=k, stream=True, **system_kwargs)
+        async for token in result["response"]:
+            yield token
+
+    async def arun_batch(
+        self,
+        user_queries: Sequence[str],
+        k: int = 4,
+        max_concurrency: int = 8,
+        return_exceptions: bool = False,
+        **system_kwargs: Any,
+    ) -> List[Any]:
+        """Answer ``user_queries`` concurrently, at most ``max_concurrency`` at a time.
+
+        Results come back in input order. With ``return_exceptions=True`` a
+        failed question yields its exception instead of aborting the batch.
+        """
+
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be a positive integer")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def answer(user_query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.arun_pipeline(user_query, k=k, **system_kwargs)
+
+        return await asyncio.gather(
+            *(answer(user_query) for user_query in user_queries),
+            return_exceptions=return_exceptions,
+        )
+
+    async def _stream_and_store(
+        self,
+        messages: List[Dict[str, str]],
+        user_query: str,
+        contexts: List[str],
+        query_vector: List[float],
+        namespace: str,
+    ) -> AsyncIterator[str]:
+        tokens = []
+        async for token in self.llm.astream(messages):
+            tokens.append(token)
+            yield token
+        # Only a fully streamed answer is cached.
+        await self.cache.astore(user_query, contexts, "".join(tokens), query_vector, namespace)
+
+    def _cache_namespace(self, system_kwargs: Dict[str, Any]) -> str:
+        # The answer also depends on the prompt settings, not only the context.
+        response_length = system_kwargs.get("response_length", "detailed")
+        return (
+            f"{self.response_style}|{response_length}|{self.include_scores}"
+            f"|{self.max_context_tokens}"
+        )
+
+    def _prepare(
+        self,
+        user_query: str,
+        context_list: List[Tuple[str, float]],
+        system_kwargs: Dict[str, Any],
+    ) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        with span("rag.prompt", chunks=len(context_list)) as current:
+            packed = pack_context(
+                context_list,
+                self.max_context_tokens,
+                model_name=getattr(self.llm, "model_name", "gpt-4o-mini"),
+            )
+            similarity_scores = [
+                f"Source {i}: {score:.3f}" for i, (_, score) in enumerate(packed.chunks, 1)
+            ]
+
+            formatted_system_prompt = rag_system_prompt.create_message(
+                response_style=self.response_style,
+                response_length=system_kwargs.get("response_length", "detailed"),
+            )
+            formatted_user_prompt = rag_user_prompt.create_message(
+                user_query=user_query,
+                context=packed.text,
+                context_count=len(packed.chunks),
+                similarity_scores=(
+                    f"Relevance scores: {', '.join(similarity_scores)}"
+                    if self.include_scores
+                    else ""
+                ),
+            )
+            current.set_attribute("context_tokens", packed.tokens)
+        observe("rag.context_tokens", packed.tokens)
+        result: Dict[str, Any] = {
+            "context": context_list,
+            "context_count": len(context_list),
+            "packed_context": packed.chunks,
+            "context_tokens": packed.tokens,
+            "similarity_scores": similarity_scores if self.include_scores else None,
+            "prompts_used": {
+                "system": formatted_system_prompt,
+                "user": formatted_user_prompt,
+            },
+        }
+        return [formatted_system_prompt, formatted_user_prompt], result
+
+
+async def _replay(answer: str) -> AsyncIterator[str]:
+    yield answer
+
+
+async def _end_with(current: Any, tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Pass ``tokens`` through and end ``current`` once the stream is done."""
+
+    error = None
+    try:
+        async for token in tokens:
+            yield token
+    except Exception as exc:
+        error = exc
+        raise
+    finally:
+        current.end(error)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from aimakerspace.text_utils import CharacterTextSplitter, TextFileLoader
+
+    source = sys.argv[1] if len(sys.argv) > 1 else "data"
+    chunks = CharacterTextSplitter().split_texts(TextFileLoader(source).load_documents())
+    vector_db = asyncio.run(VectorDatabase().abuild_from_list(chunks))
+    pipeline = RetrievalAugmentedQAPipeline(ChatOpenAI(), vector_db, include_scores=True)
+
+    async def main(questions: List[str]) -> None:
+        async for token in pipeline.astream_pipeline(questions[0], k=3):
+            print(token, end="", flush=True)
+        print()
+        for result in await pipeline.arun_batch(questions[1:], k=3, max_concurrency=4):
+            print(result["response"])
+
+    asyncio.run(
+        main(
+            [
+                "What is the 'Michael Eisner Memorial Weak Executive Problem'?",
+                "What makes a good startup founder?",
+                "Why do most startups fail?",
+            ]
+        )
+    )
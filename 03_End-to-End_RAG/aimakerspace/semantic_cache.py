@@ -0,0 +1,226 @@
+import hashlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+from aimakerspace.embedding_backends import EmbeddingBackend
+from aimakerspace.indexes import FlatIndex
+from aimakerspace.instrumentation import increment
+from aimakerspace.openai_utils.embedding_cache import text_fingerprint
+from aimakerspace.vectordatabase import Record, VectorDatabase
+
+
+def context_hash(contexts: Iterable[str], namespace: str = "") -> str:
+    """Order-independent digest of a retrieved context set (plus ``namespace``)."""
+
+    digest = hashlib.sha256(namespace.encode("utf-8"))
+    for fingerprint in sorted({text_fingerprint(text) for text in contexts}):
+        digest.update(b"\0" + fingerprint.encode("ascii"))
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how a ``SemanticCache`` has been used."""
+
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits}/{self.lookups} hits ({self.hit_rate:.1%}), "
+            f"{self.expired} expired, {self.evictions} evicted"
+        )
+
+
+@dataclass
+class _Entry:
+    answer: str
+    created: float
+
+
+class SemanticCache:
+    """Answer cache keyed on query similarity and the retrieved context set.
+
+    Each stored answer is indexed by its query embedding in a small
+    ``VectorDatabase``, tagged with ``context_hash`` of the chunks it was
+    generated from. A lookup returns the answer of the most similar cached
+    query whose context hash matches, provided the cosine similarity is at
+    least ``threshold``; the same question asked against different context
+    therefore never reuses a stale answer.
+
+    Entries older than ``ttl`` seconds are dropped, and once more than
+    ``max_entries`` are held the least recently used one is evicted.
+    Query vectors passed in must come from the same embedding model as
+    ``embedding_model``.
+
+    :param embedding_model: Model used to embed queries given only as text
+        (defaults to ``default_embedding_model()``, created on first use)
+    :param threshold: Minimum cosine similarity for a hit
+    :param ttl: Lifetime of an entry in seconds (``None`` keeps entries forever)
+    :param max_entries: Upper bound on the number of cached answers
+    :param clock: Time source, in seconds
+    """
+
+    def __init__(
+        self,
+        embedding_model: Optional[EmbeddingBackend] = None,
+        threshold: float = 0.95,
+        ttl: Optional[float] = 3600.0,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be a positive integer")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive or None")
+
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = CacheStats()
+        self._vectors = VectorDatabase(
+            embedding_model,
+            initial_capacity=min(max_entries, 1024),
+            index=FlatIndex(),
+            lexical=False,
+        )
+        # ``_recent`` is kept in LRU order, ``_created`` in insertion order so
+        # expired entries are always at its front.
+        self._recent: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._created: "OrderedDict[str, float]" = OrderedDict()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def embedding_model(self) -> EmbeddingBackend:
+        """Model used to embed text queries (see ``VectorDatabase.embedding_model``)."""
+
+        return self._vectors.embedding_model
+
+    @embedding_model.setter
+    def embedding_model(self, embedding_model: EmbeddingBackend) -> None:
+        self._vectors.embedding_model = embedding_model
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def lookup(
+        self,
+        query: str,
+        contexts: Iterable[str],
+        query_vector: Optional[Iterable[float]] = None,
+        namespace: str = "",
+    ) -> Optional[str]:
+        """Return the cached answer for ``query`` over ``contexts``, or ``None``."""
+
+        if query_vector is None:
+            query_vector = self.embedding_model.get_embedding(query)
+        return self._lookup(query_vector, context_hash(contexts, namespace))
+
+    async def alookup(
+        self,
+        query: str,
+        contexts: Iterable[str],
+        query_vector: Optional[Iterable[float]] = None,
+        namespace: str = "",
+    ) -> Optional[str]:
+        """Async ``lookup`` embedding the query with the async client."""
+
+        if query_vector is None:
+            query_vector = await self.embedding_model.async_get_embedding(query)
+        return self._lookup(query_vector, context_hash(contexts, namespace))
+
+    def store(
+        self,
+        query: str,
+        contexts: Iterable[str],
+        answer: str,
+        query_vector: Optional[Iterable[float]] = None,
+        namespace: str = "",
+    ) -> None:
+        """Remember ``answer`` for ``query`` over ``contexts``."""
+
+        if query_vector is None:
+            query_vector = self.embedding_model.get_embedding(query)
+        self._store(query, query_vector, context_hash(contexts, namespace), answer)
+
+    async def astore(
+        self,
+        query: str,
+        contexts: Iterable[str],
+        answer: str,
+        query_vector: Optional[Iterable[float]] = None,
+        namespace: str = "",
+    ) -> None:
+        """Async ``store`` embedding the query with the async client."""
+
+        if query_vector is None:
+            query_vector = await self.embedding_model.async_get_embedding(query)
+        self._store(query, query_vector, context_hash(contexts, namespace), answer)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._drop(list(self._recent))
+
+    def _lookup(self, query_vector: Iterable[float], digest: str) -> Optional[str]:
+        with self._lock:
+            self._expire()
+            hits = self._vectors.search_records(query_vector, 1, filter={"context": digest})
+            if hits and hits[0][1] >= self.threshold:
+                entry_id = hits[0][0].id
+                self._recent.move_to_end(entry_id)
+                self.stats.hits += 1
+                increment("semantic_cache.hits")
+                return self._recent[entry_id].answer
+            self.stats.misses += 1
+            increment("semantic_cache.misses")
+            return None
+
+    def _store(
+        self, query: str, query_vector: Iterable[float], digest: str, answer: str
+    ) -> None:
+        with self._lock:
+            self._expire()
+            entry_id = str(next(self._ids))
+            created = self.clock()
+            self._vectors.upsert(Record(entry_id, query, {"context": digest}), query_vector)
+            self._recent[entry_id] = _Entry(answer, created)
+            self._created[entry_id] = created
+            overflow = len(self._recent) - self.max_entries
+            if overflow > 0:
+                self.stats.evictions += overflow
+                self._drop(list(itertools.islice(self._recent, overflow)))
+
+    def _expire(self) -> None:
+        if self.ttl is None:
+            return
+        deadline = self.clock() - self.ttl
+        expired: List[str] = []
+        for entry_id, created in self._created.items():
+            if created > deadline:
+                break
+            expired.append(entry_id)
+        if expired:
+            self.stats.expired += len(expired)
+            self._drop(expired)
+
+    def _drop(self, entry_ids: List[str]) -> None:
+        self._vectors.delete_many(entry_ids)
+        for entry_id in entry_ids:
+            del self._recent[entry_id]
+            del self._created[entry_id]
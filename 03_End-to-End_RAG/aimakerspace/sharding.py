@@ -0,0 +1,303 @@
+import heapq
+import multiprocessing
+import os
+import weakref
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from aimakerspace.matrix_store import top_k_indices_many
+from aimakerspace.vectordatabase import Record, VectorDatabase
+
+# Each worker is one shard, so BLAS inside a worker must stay single-threaded.
+_THREAD_LIMIT_VARIABLES = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_FRAMEWORK_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+class ShardedVectorDatabase:
+    """Read-only, multi-process snapshot of a ``VectorDatabase`` for exact cosine search.
+
+    The live vectors are L2-normalised and split into ``num_shards``
+    contiguous shards, each placed in its own ``SharedMemory`` block and
+    served by a dedicated worker process. A query is sent to every worker,
+    each returns its local top-``k`` and the parent k-way merges them, so
+    large scans use all cores instead of one. Writes to the source database
+    (vectors, texts and metadata alike) are not seen until ``refresh`` is
+    called.
+
+    Use as a context manager (or call ``close``) to stop the workers and
+    free the shared memory.
+
+    :param vector_db: Database to snapshot
+    :param num_shards: Number of shards / worker processes (defaults to the CPU count)
+    """
+
+    def __init__(self, vector_db: VectorDatabase, num_shards: Optional[int] = None):
+        num_shards = num_shards or os.cpu_count() or 1
+        if num_shards <= 0:
+            raise ValueError("num_shards must be a positive integer")
+
+        self.vector_db = vector_db
+        self.num_shards = num_shards
+        self._workers: List[Tuple[multiprocessing.Process, Connection]] = []
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self._rows = np.empty(0, dtype=np.int64)
+        self._dim: Optional[int] = None
+        self._keys: List[str] = []
+        self._texts: List[str] = []
+        self._metadata: List[dict] = []
+        self._offsets: List[int] = []
+        self._finalizer: Optional[weakref.finalize] = None
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __enter__(self) -> "ShardedVectorDatabase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def refresh(self) -> None:
+        """Re-snapshot the source database into fresh shards and workers."""
+
+        self.close()
+        vector_db = self.vector_db
+        store = vector_db._store
+        rows = np.flatnonzero(store.alive)
+        self._rows = rows
+        self._dim = store.dim
+        self._keys = [vector_db._keys[row] for row in rows.tolist()]
+        self._texts = [vector_db._texts[row] for row in rows.tolist()]
+        self._metadata = [vector_db._metadata[row] for row in rows.tolist()]
+        if rows.size == 0:
+            return
+
+        context = multiprocessing.get_context("spawn")
+        bounds = np.linspace(0, rows.size, min(self.num_shards, rows.size) + 1).astype(int)
+        # Registered before anything is created so a failure partway through
+        # (e.g. out of shared memory) cannot leak the blocks and workers built so far.
+        self._finalizer = weakref.finalize(self, _shutdown, self._workers, self._blocks)
+        try:
+            with _single_threaded_blas():
+                for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+                    shard = store.unit_rows(rows[start:stop]).astype(np.float32, copy=False)
+                    block = shared_memory.SharedMemory(create=True, size=max(1, shard.nbytes))
+                    self._blocks.append(block)
+                    np.ndarray(shard.shape, dtype=np.float32, buffer=block.buf)[:] = shard
+                    parent, child = context.Pipe()
+                    worker = context.Process(
+                        target=_serve_shard,
+                        args=(child, block.name, shard.shape),
+                        daemon=True,
+                    )
+                    worker.start()
+                    child.close()
+                    self._workers.append((worker, parent))
+                    self._offsets.append(start)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Stop the workers and release the shared memory blocks."""
+
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        self._workers = []
+        self._blocks = []
+        self._offsets = []
+
+    def search(self, query_vector: Iterable[float], k: int) -> List[Tuple[str, float]]:
+        """Return ``(text, score)`` for the ``k`` most similar vectors (cosine)."""
+
+        return self.search_many([query_vector], k)[0]
+
+    def search_records(
+        self, query_vector: Iterable[float], k: int
+    ) -> List[Tuple[Record, float]]:
+        """Like ``search`` but return the full ``Record`` of each hit."""
+
+        return [
+            (
+                Record(
+                    id=self._keys[index],
+                    text=self._texts[index],
+                    metadata=dict(self._metadata[index]),
+                ),
+                score,
+            )
+            for index, score in self._search_many([query_vector], k)[0]
+        ]
+
+    def search_many(
+        self, query_vectors: Iterable[Iterable[float]], k: int
+    ) -> List[List[Tuple[str, float]]]:
+        """Search a batch of queries in one round trip to every shard."""
+
+        texts = self._texts
+        return [
+            [(texts[index], score) for index, score in hits]
+            for hits in self._search_many(query_vectors, k)
+        ]
+
+    def search_by_text(
+        self, query_text: str, k: int, return_as_text: bool = False
+    ) -> List:
+        """Embed ``query_text`` with the source database's model and ``search``."""
+
+        query_vector = self.vector_db.embedding_model.get_embedding(query_text)
+        results = self.search(query_vector, k)
+        return [text for text, _ in results] if return_as_text else results
+
+    def _search_many(
+        self, query_vectors: Iterable[Iterable[float]], k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """Return ``(snapshot index, score)`` hits for every query."""
+
+        if k <= 0:
+            raise ValueError("k must be a positive integer")
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        if self._rows.size == 0:
+            return [[] for _ in queries]
+        if queries.ndim != 2 or queries.shape[1] != self._dim:
+            raise ValueError(
+                f"Queries have shape {queries.shape}, expected (n, {self._dim})"
+            )
+        if not self._workers:
+            raise RuntimeError("ShardedVectorDatabase is closed; call refresh() to reopen it")
+
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        unit_queries = np.divide(queries, norms, out=np.zeros_like(queries), where=norms > 0)
+        try:
+            for _, connection in self._workers:
+                connection.send((unit_queries, k))
+            replies = [connection.recv() for _, connection in self._workers]
+        except (EOFError, OSError) as error:
+            # A worker died mid-request, so the pipes are out of step: stop them all.
+            self.close()
+            raise RuntimeError(
+                "A shard worker exited; call refresh() to restart the workers"
+            ) from error
+        for succeeded, value in replies:
+            if not succeeded:
+                raise value
+        partials = [value for _, value in replies]
+
+        results = []
+        for position in range(len(queries)):
+            shard_hits = (
+                zip((offset + rows).tolist(), scores.tolist())
+                for offset, (rows, scores) in zip(
+                    self._offsets, (partial[position] for partial in partials)
+                )
+            )
+            merged = heapq.merge(*shard_hits, key=lambda hit: -hit[1])
+            results.append(list(_take(merged, k)))
+        return results
+
+
+def _serve_shard(connection: Connection, block_name: str, shape: Tuple[int, int]) -> None:
+    """Worker loop: score incoming query batches against one shard (runs in a child)."""
+
+    block = shared_memory.SharedMemory(name=block_name)
+    shard = np.ndarray(shape, dtype=np.float32, buffer=block.buf)
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+            try:
+                queries, k = message
+                scores = queries @ shard.T
+                reply = (
+                    True,
+                    [
+                        (best, query_scores[best])
+                        for query_scores, best in zip(scores, top_k_indices_many(scores, k))
+                    ],
+                )
+            except Exception as error:  # reported to and re-raised by the parent
+                reply = (False, error)
+            connection.send(reply)
+    finally:
+        del shard
+        block.close()
+
+
+def _shutdown(
+    workers: List[Tuple[multiprocessing.Process, Connection]],
+    blocks: List[shared_memory.SharedMemory],
+) -> None:
+    for worker, connection in workers:
+        try:
+            connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        connection.close()
+    for worker, _ in workers:
+        worker.join(timeout=5)
+        if worker.is_alive():
+            worker.terminate()
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def _take(iterator: Iterator, count: int) -> Iterator:
+    for _, item in zip(range(count), iterator):
+        yield item
+
+
+@contextmanager
+def _single_threaded_blas():
+    previous = {name: os.environ.get(name) for name in _THREAD_LIMIT_VARIABLES}
+    os.environ.update({name: "1" for name in _THREAD_LIMIT_VARIABLES})
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+if __name__ == "__main__":
+    import time
+
+    from aimakerspace.embedding_backends import HashingEmbeddingModel
+    from aimakerspace.indexes import FlatIndex
+
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(400_000, 384)).astype(np.float32)
+    queries = rng.normal(size=(64, 384)).astype(np.float32)
+
+    vector_db = VectorDatabase(HashingEmbeddingModel(384), index=FlatIndex(), lexical=False)
+    vector_db.upsert_many([Record(str(i), str(i)) for i in range(len(data))], data)
+
+    started = time.perf_counter()
+    expected = vector_db.search_many(queries, 10)
+    print(f"single process: {(time.perf_counter() - started) / len(queries) * 1000:.2f} ms/query")
+
+    with ShardedVectorDatabase(vector_db) as sharded:
+        sharded.search_many(queries[:1], 10)  # fault the shared pages in
+        started = time.perf_counter()
+        found = sharded.search_many(queries, 10)
+        elapsed = (time.perf_counter() - started) / len(queries) * 1000
+        print(f"{sharded.num_shards} shards:      {elapsed:.2f} ms/query")
+    agree = np.mean([[t for t, _ in a] == [t for t, _ in b] for a, b in zip(expected, found)])
+    print(f"identical top-10 for {agree:.0%} of queries")
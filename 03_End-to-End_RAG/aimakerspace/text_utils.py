@@ -1,7 +1,24 @@
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+from multiprocessing.connection import Connection, wait
 from pathlib import Path
-from typing import Iterable, List
-
-import PyPDF2
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from aimakerspace.openai_utils.tokenizer import count_tokens
 
 
 class TextFileLoader:
@@ -33,6 +50,11 @@ class TextFileLoader:
         self.load()
         return self.documents
 
+    def iter_documents(self) -> Iterator[str]:
+        """Lazily yield documents one at a time without populating ``self.documents``."""
+
+        return iter(self._iter_documents())
+
     def _iter_documents(self) -> Iterable[str]:
         if self.path.is_dir():
             yield from self._iter_directory(self.path)
@@ -70,8 +92,14 @@ class CharacterTextSplitter:
     def split(self, text: str) -> List[str]:
         """Split ``text`` into chunks preserving the configured overlap."""
 
+        return list(self.iter_split(text))
+
+    def iter_split(self, text: str) -> Iterator[str]:
+        """Lazily yield the chunks that ``split`` would return."""
+
         step = self.chunk_size - self.chunk_overlap
-        return [text[i : i + self.chunk_size] for i in range(0, len(text), step)]
+        for i in range(0, len(text), step):
+            yield text[i : i + self.chunk_size]
 
     def split_texts(self, texts: List[str]) -> List[str]:
         """Split multiple texts and flatten the resulting chunks."""
@@ -82,12 +110,182 @@ class CharacterTextSplitter:
         return chunks
 
 
+class ChunkSpan(NamedTuple):
+    """Location of a chunk as ``texts[doc_id][start:end]``."""
+
+    doc_id: int
+    start: int
+    end: int
+
+    def text(self, texts: Sequence[str]) -> str:
+        """Materialise the chunk from the source ``texts``."""
+
+        return texts[self.doc_id][self.start : self.end]
+
+
+class TokenTextSplitter:
+    """Split text into chunks of about ``chunk_size`` tokens along natural boundaries.
+
+    The text is cut into paragraphs and sentences first (a single sentence
+    longer than a chunk is cut between words) and these units are packed
+    greedily until the token budget is reached. Consecutive chunks share
+    whole trailing units worth at most ``chunk_overlap`` tokens, so the
+    overlap never starts mid-sentence.
+
+    ``iter_spans``/``split_spans`` return ``ChunkSpan`` offsets into the
+    source texts instead of copies; ``split``/``iter_split`` materialise the
+    chunk strings and are drop-in replacements for ``CharacterTextSplitter``.
+    Token counts come from ``count_tokens`` (tiktoken when installed).
+    """
+
+    _BOUNDARY = re.compile(r"\n\s*\n|(?<=[.!?])\s+|\n")
+
+    def __init__(
+        self,
+        chunk_size: int = 256,
+        chunk_overlap: int = 32,
+        model_name: str = "text-embedding-3-small",
+    ):
+        if chunk_size <= chunk_overlap:
+            raise ValueError("Chunk size must be greater than chunk overlap")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.model_name = model_name
+
+    def split(self, text: str) -> List[str]:
+        """Split ``text`` into chunk strings."""
+
+        return list(self.iter_split(text))
+
+    def iter_split(self, text: str) -> Iterator[str]:
+        """Lazily yield the chunks that ``split`` would return."""
+
+        for span in self.iter_spans(text):
+            yield text[span.start : span.end]
+
+    def split_texts(self, texts: List[str]) -> List[str]:
+        """Split multiple texts and flatten the resulting chunks."""
+
+        return [span.text(texts) for span in self.split_spans(texts)]
+
+    def split_spans(self, texts: Iterable[str]) -> List[ChunkSpan]:
+        """Chunk offsets for every text, with ``doc_id`` its position in ``texts``."""
+
+        spans: List[ChunkSpan] = []
+        for doc_id, text in enumerate(texts):
+            spans.extend(self.iter_spans(text, doc_id))
+        return spans
+
+    def iter_spans(self, text: str, doc_id: int = 0) -> Iterator[ChunkSpan]:
+        """Yield the chunk offsets of ``text`` without copying any chunk."""
+
+        units = list(self._units(text))
+        first = 0
+        while first < len(units):
+            last, tokens = first, 0
+            while last < len(units) and (last == first or tokens + units[last][2] <= self.chunk_size):
+                tokens += units[last][2]
+                last += 1
+            yield ChunkSpan(doc_id, units[first][0], units[last - 1][1])
+            if last == len(units):
+                return
+
+            # Start the next chunk on whole units covering at most ``chunk_overlap`` tokens.
+            following, overlap = last, 0
+            while following - 1 > first and overlap + units[following - 1][2] <= self.chunk_overlap:
+                following -= 1
+                overlap += units[following][2]
+            first = following
+
+    def _units(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield ``(start, end, tokens)`` of the stripped sentences and paragraphs of ``text``."""
+
+        position = 0
+        for match in self._BOUNDARY.finditer(text):
+            yield from self._fit(text, position, match.start())
+            position = match.end()
+        yield from self._fit(text, position, len(text))
+
+    def _fit(self, text: str, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """Trim ``text[start:end]`` and cut it between words if it exceeds a chunk."""
+
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
+            return
+
+        tokens = count_tokens(text[start:end], self.model_name)
+        if tokens <= self.chunk_size:
+            yield start, end, tokens
+            return
+
+        width = max(1, (end - start) * self.chunk_size // tokens)
+        while start < end:
+            stop = min(end, start + width)
+            if stop < end:
+                space = text.rfind(" ", start + 1, stop)
+                if space > start:
+                    stop = space
+            yield start, stop, count_tokens(text[start:stop], self.model_name)
+            start = stop
+            while start < end and text[start].isspace():
+                start += 1
+
+
+def _extract_pages(file_path: str, start: int, stop: Optional[int]) -> str:
+    """Extract and join the text of pages ``start:stop`` (runs in worker processes)."""
+
+    # Imported here so text-only jobs never pay for PyPDF2.
+    import PyPDF2
+
+    with open(file_path, "rb") as file_handle:
+        pdf_reader = PyPDF2.PdfReader(file_handle)
+        extracted_pages = [
+            page.extract_text() or "" for page in pdf_reader.pages[start:stop]
+        ]
+    return "\n".join(extracted_pages)
+
+
 class PDFLoader:
-    """Extract text from PDF files stored at a path."""
+    """Extract text from PDF files stored at a path.
+
+    With ``max_workers`` other than 1, files are extracted in that many worker
+    processes (``None`` uses every core) and files larger than
+    ``split_threshold_bytes`` are further split into ``pages_per_task`` page
+    ranges. Output order always matches the sorted file order. When
+    ``timeout`` is set extraction always runs in worker processes: a page
+    range still running ``timeout`` seconds after a worker picked it up gets
+    that worker killed and replaced, and its file is skipped and recorded in
+    ``self.skipped`` instead of stalling the batch. Files whose extraction
+    raises or takes its worker down are skipped and recorded the same way;
+    only the default in-process mode lets such errors propagate.
+    """
+
+    _extract = staticmethod(_extract_pages)
+
+    def __init__(
+        self,
+        path: str,
+        max_workers: Optional[int] = 1,
+        timeout: Optional[float] = None,
+        split_threshold_bytes: int = 20 * 1024 * 1024,
+        pages_per_task: int = 50,
+    ):
+        if max_workers is not None and max_workers <= 0:
+            raise ValueError("max_workers must be a positive integer or None")
+        if pages_per_task <= 0:
+            raise ValueError("pages_per_task must be a positive integer")
 
-    def __init__(self, path: str):
         self.path = Path(path)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.split_threshold_bytes = split_threshold_bytes
+        self.pages_per_task = pages_per_task
         self.documents: List[str] = []
+        self.skipped: List[Path] = []
 
     def load(self) -> None:
         """Populate ``self.documents`` from the configured path."""
@@ -97,7 +295,7 @@ class PDFLoader:
     def load_file(self) -> None:
         """Load a single PDF specified by ``self.path``."""
 
-        self.documents = [self._read_pdf(self.path)]
+        self.documents = list(self._iter_paths([self.path]))
 
     def load_directory(self) -> None:
         """Load all PDF files contained within ``self.path``."""
@@ -110,26 +308,193 @@ class PDFLoader:
         self.load()
         return self.documents
 
+    def iter_documents(self) -> Iterator[str]:
+        """Lazily yield documents one at a time without populating ``self.documents``."""
+
+        return iter(self._iter_documents())
+
     def _iter_documents(self) -> Iterable[str]:
         if self.path.is_dir():
             yield from self._iter_directory(self.path)
         elif self.path.is_file() and self.path.suffix.lower() == ".pdf":
-            yield self._read_pdf(self.path)
+            yield from self._iter_paths([self.path])
         else:
             raise ValueError(
                 "Provided path must be a directory or a .pdf file: " f"{self.path}"
             )
 
     def _iter_directory(self, directory: Path) -> Iterable[str]:
-        for entry in sorted(directory.rglob("*.pdf")):
-            if entry.is_file():
-                yield self._read_pdf(entry)
+        paths = (entry for entry in sorted(directory.rglob("*.pdf")) if entry.is_file())
+        yield from self._iter_paths(paths)
+
+    def _iter_paths(self, paths: Iterable[Path]) -> Iterable[str]:
+        if self.max_workers == 1 and self.timeout is None:
+            for path in paths:
+                yield self._read_pdf(path)
+        else:
+            # A timeout can only be enforced by killing the process doing the
+            # work, so it always runs in worker processes (one by default).
+            yield from self._iter_pooled(paths)
+
+    def _iter_pooled(self, paths: Iterable[Path]) -> Iterable[str]:
+        workers = self.max_workers or os.cpu_count() or 1
+        context = multiprocessing.get_context("spawn")
+        remaining_paths = iter(paths)
+        files: Deque[_PendingFile] = deque()
+        tasks: Deque[Tuple[_PendingFile, int, int, Optional[int]]] = deque()
+        idle: List[_ExtractionWorker] = []
+        busy: Dict[Connection, Tuple[_ExtractionWorker, _PendingFile, int, Optional[float]]] = {}
+
+        def stop_worker(connection: Connection) -> None:
+            worker = busy.pop(connection)[0]
+            worker.kill()
+
+        def skip(pending: _PendingFile) -> None:
+            if not pending.skipped:
+                pending.skipped = True
+                self.skipped.append(pending.path)
+
+        try:
+            while True:
+                # Keep a bounded window of files in flight so memory stays flat.
+                while len(files) < 2 * workers:
+                    path = next(remaining_paths, None)
+                    if path is None:
+                        break
+                    ranges = self._page_ranges(path)
+                    pending = _PendingFile(path, len(ranges))
+                    files.append(pending)
+                    tasks.extend(
+                        (pending, part, start, stop) for part, (start, stop) in enumerate(ranges)
+                    )
+
+                while tasks and len(busy) < workers:
+                    pending, part, start, stop = tasks.popleft()
+                    if pending.skipped:
+                        continue
+                    worker = idle.pop() if idle else _ExtractionWorker(context, self._extract)
+                    worker.connection.send((str(pending.path), start, stop))
+                    # The deadline runs from the moment a worker takes the task.
+                    deadline = None if self.timeout is None else time.monotonic() + self.timeout
+                    busy[worker.connection] = (worker, pending, part, deadline)
+
+                while files and (files[0].skipped or files[0].outstanding == 0):
+                    pending = files.popleft()
+                    if not pending.skipped:
+                        yield "\n".join(pending.parts)
+                if not files:
+                    return
+                if not busy:
+                    continue
+
+                deadlines = [deadline for *_, deadline in busy.values() if deadline is not None]
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                for connection in wait(list(busy), timeout=timeout):
+                    worker, pending, part, _ = busy[connection]
+                    try:
+                        succeeded, value = connection.recv()
+                    except EOFError:
+                        # The worker crashed (e.g. in the PDF parser); a new one starts on demand.
+                        stop_worker(connection)
+                        skip(pending)
+                        continue
+                    del busy[connection]
+                    idle.append(worker)
+                    if not succeeded:
+                        skip(pending)
+                        continue
+                    pending.parts[part] = value
+                    pending.outstanding -= 1
+
+                now = time.monotonic()
+                for _, pending, _, deadline in busy.values():
+                    if deadline is not None and deadline <= now:
+                        skip(pending)
+                for connection, (_, pending, _, _) in list(busy.items()):
+                    if pending.skipped:
+                        # Free the slot now; a replacement starts on demand.
+                        stop_worker(connection)
+        finally:
+            for worker in idle:
+                worker.close()
+            for connection in list(busy):
+                stop_worker(connection)
+
+    def _page_ranges(self, path: Path) -> List[Tuple[int, Optional[int]]]:
+        if path.stat().st_size <= self.split_threshold_bytes:
+            return [(0, None)]
+
+        import PyPDF2
+
+        with path.open("rb") as file_handle:
+            page_count = len(PyPDF2.PdfReader(file_handle).pages)
+        return [
+            (start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ] or [(0, None)]
 
     def _read_pdf(self, file_path: Path) -> str:
-        with file_path.open("rb") as file_handle:
-            pdf_reader = PyPDF2.PdfReader(file_handle)
-            extracted_pages = [page.extract_text() or "" for page in pdf_reader.pages]
-        return "\n".join(extracted_pages)
+        return self._extract(str(file_path), 0, None)
+
+
+class _PendingFile:
+    """Bookkeeping for one PDF whose page ranges are being extracted."""
+
+    __slots__ = ("path", "parts", "outstanding", "skipped")
+
+    def __init__(self, path: Path, part_count: int):
+        self.path = path
+        self.parts: List[str] = [""] * part_count
+        self.outstanding = part_count
+        self.skipped = False
+
+
+class _ExtractionWorker:
+    """A child process serving extraction requests over a pipe, one at a time."""
+
+    def __init__(self, context, extract: Callable[[str, int, Optional[int]], str]):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(
+            target=_serve_extraction, args=(child, extract), daemon=True
+        )
+        self.process.start()
+        child.close()
+        # Wait until the child is up so start-up time is not charged to a task.
+        self.connection.recv()
+
+    def close(self) -> None:
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.connection.close()
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+def _serve_extraction(
+    connection: Connection, extract: Callable[[str, int, Optional[int]], str]
+) -> None:
+    """Worker loop: extract the requested page ranges (runs in a child)."""
+
+    connection.send(None)
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        try:
+            connection.send((True, extract(*message)))
+        except Exception as error:  # the parent skips the file
+            connection.send((False, repr(error)))
 
 
 if __name__ == "__main__":
@@ -1,9 +1,23 @@
 import asyncio
-from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, Union
 
 import numpy as np
 
-from aimakerspace.openai_utils.embedding import EmbeddingModel
+from aimakerspace.bm25 import BM25Index
+from aimakerspace.embedding_backends import EmbeddingBackend, default_embedding_model
+from aimakerspace.indexes import FlatIndex, IVFIndex, SearchIndex, recall_at_k
+from aimakerspace.instrumentation import span
+from aimakerspace.matrix_store import MatrixStore, top_k_indices
+from aimakerspace.metadata_index import MetadataFilter, MetadataIndex
+from aimakerspace.quantization import ProductQuantizedIndex, ScalarQuantizedIndex
 
 
 def cosine_similarity(vector_a: np.ndarray, vector_b: np.ndarray) -> float:
@@ -18,36 +32,298 @@ def cosine_similarity(vector_a: np.ndarray, vector_b: np.ndarray) -> float:
     return float(dot_product / (norm_a * norm_b))
 
 
+FORMAT_VERSION = 2
+
+# Rank offset of reciprocal rank fusion (Cormack et al., 2009).
+RRF_K = 60
+
+Metadata = Dict[str, Any]
+
+
+@dataclass
+class Record:
+    """A stored chunk: stable ``id``, the ``text`` it embeds and arbitrary ``metadata``."""
+
+    id: str
+    text: str
+    metadata: Metadata = field(default_factory=dict)
+
+
+def record_id(text: str, ordinal: int = 0) -> str:
+    """Default id for the ``ordinal``-th occurrence of ``text`` in a batch.
+
+    The first occurrence is keyed by the text itself, as stores built from
+    raw texts always were, so ``retrieve_from_key(text)`` and
+    ``vectors[text]`` keep working. Later duplicates get an id derived from
+    the content and ordinal, so they are stored as distinct records and
+    rebuilding from the same texts yields the same ids.
+    """
+
+    if ordinal == 0:
+        return text
+    return f"{hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]}-{ordinal}"
+
+
+def records_from_texts(
+    texts: Iterable[str],
+    metadatas: Optional[Iterable[Metadata]] = None,
+    ids: Optional[Iterable[str]] = None,
+) -> List[Record]:
+    """Wrap raw texts into ``Record`` objects, assigning ``record_id`` ids by default."""
+
+    texts = list(texts)
+    metadatas = [{} for _ in texts] if metadatas is None else list(metadatas)
+    if ids is None:
+        seen: Counter = Counter()
+        ids = []
+        for text in texts:
+            ids.append(record_id(text, seen[text]))
+            seen[text] += 1
+    else:
+        ids = list(ids)
+    if not len(texts) == len(metadatas) == len(ids):
+        raise ValueError("texts, metadatas and ids must have the same length")
+    return [
+        Record(id=id_, text=text, metadata=dict(metadata))
+        for id_, text, metadata in zip(ids, texts, metadatas)
+    ]
+
+
+INDEX_TYPES: Dict[str, Type[SearchIndex]] = {
+    index_type.name: index_type
+    for index_type in (FlatIndex, IVFIndex, ScalarQuantizedIndex, ProductQuantizedIndex)
+}
+
+# Optional state ``save`` may write next to a store. Any of these left over
+# from an earlier save that the current one does not rewrite is removed.
+_STATE_FILES = frozenset(
+    [BM25Index.state_file]
+    + [
+        index_type.state_file
+        for index_type in INDEX_TYPES.values()
+        if hasattr(index_type, "state_file")
+    ]
+)
+
+
 class VectorDatabase:
-    """Minimal in-memory vector store backed by numpy arrays."""
+    """In-memory vector store backed by a contiguous float32 matrix.
 
-    def __init__(self, embedding_model: Optional[EmbeddingModel] = None):
-        self.vectors: Dict[str, np.ndarray] = {}
-        self.embedding_model = embedding_model or EmbeddingModel()
+    Every vector belongs to a ``Record`` addressed by its id. The legacy
+    ``insert``/``insert_many`` API stores records whose id and text are both
+    the given key.
+    """
+
+    def __init__(
+        self,
+        embedding_model: Optional[EmbeddingBackend] = None,
+        dtype: np.dtype = np.float32,
+        initial_capacity: int = 1024,
+        index: Optional[SearchIndex] = None,
+        lexical: bool = True,
+    ):
+        """Create an empty store.
+
+        ``index`` selects the search backend: ``FlatIndex`` (the default) is
+        exact, ``IVFIndex`` is approximate and tunable through ``nprobe``,
+        and ``ScalarQuantizedIndex`` / ``ProductQuantizedIndex`` scan 8-bit
+        codes with an optional exact ``rerank`` of the best candidates.
+        With ``lexical`` the store supports ``lexical_search`` and
+        ``hybrid_search``: the first such query builds a ``BM25Index`` over
+        the stored texts, which later writes keep up to date. Stores only
+        searched by vector never tokenize anything.
+        """
+
+        self._store = MatrixStore(dtype=dtype, initial_capacity=initial_capacity)
+        self.index = index or FlatIndex()
+        self._keys: List[Optional[str]] = []
+        self._texts: List[Optional[str]] = []
+        self._metadata: List[Optional[Metadata]] = []
+        self._attributes = MetadataIndex()
+        self.lexical = lexical
+        self.lexical_index: Optional[BM25Index] = None
+        self._rows: Dict[str, int] = {}
+        self._embedding_model = embedding_model
+
+    @property
+    def embedding_model(self) -> EmbeddingBackend:
+        """Model used by the ``*_by_text`` methods, created on first use.
+
+        Deferring the default model (see ``default_embedding_model``) lets
+        stores built from precomputed vectors (benchmarks, loaded snapshots)
+        run without an API key.
+        """
+
+        if self._embedding_model is None:
+            self._embedding_model = default_embedding_model()
+        return self._embedding_model
+
+    @embedding_model.setter
+    def embedding_model(self, embedding_model: EmbeddingBackend) -> None:
+        self._embedding_model = embedding_model
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    @property
+    def vectors(self) -> Dict[str, np.ndarray]:
+        """Mapping of key to stored vector (built on demand; prefer ``retrieve_from_key``)."""
+
+        return {key: self._store.row(row) for key, row in self._rows.items()}
+
+    def get(self, record_id: str) -> Optional[Record]:
+        """Return the record stored under ``record_id`` if present."""
+
+        row = self._rows.get(record_id)
+        return None if row is None else self._record(row)
 
     def insert(self, key: str, vector: Iterable[float]) -> None:
         """Store ``vector`` so that it can be retrieved with ``key`` later on."""
 
-        self.vectors[key] = np.asarray(vector, dtype=float)
+        self.upsert(Record(id=key, text=key), vector)
+
+    def insert_many(self, keys: List[str], vectors: Iterable[Iterable[float]]) -> None:
+        """Store a batch of vectors, copying them into the matrix in one pass."""
+
+        self.upsert_many([Record(id=key, text=key) for key in keys], vectors)
+
+    def upsert(self, record: Record, vector: Iterable[float]) -> None:
+        """Insert ``record`` or replace the record (and vector) with the same id."""
+
+        self.upsert_many([record], [vector])
+
+    def upsert_many(
+        self, records: List[Record], vectors: Iterable[Iterable[float]]
+    ) -> None:
+        """Insert or replace a batch of records in one pass.
+
+        Existing ids are overwritten in place and new ids fill released rows
+        before the matrix grows; only the touched rows are passed to the
+        search index, so nothing is rebuilt. Within a batch the last record
+        for an id wins.
+        """
+
+        batch = np.asarray(vectors, dtype=self._store.dtype)
+        if batch.ndim == 1 and batch.size == 0:
+            batch = batch.reshape(0, self._store.dim or 0)
+        if batch.shape[0] != len(records):
+            raise ValueError("records and vectors must have the same length")
+        if batch.ndim == 2 and batch.shape[0]:
+            # Reject vectors the index cannot take before the store is modified.
+            self.index.check_dimension(batch.shape[1])
+
+        latest: Dict[str, int] = {}
+        for position, record in enumerate(records):
+            latest[record.id] = position
+
+        updated_rows: List[int] = []
+        updated_positions: List[int] = []
+        new_positions: List[int] = []
+        for record_id_, position in latest.items():
+            row = self._rows.get(record_id_)
+            if row is None:
+                new_positions.append(position)
+            else:
+                updated_rows.append(row)
+                updated_positions.append(position)
+
+        rows = np.array(updated_rows, dtype=np.int64)
+        for row, position in zip(updated_rows, updated_positions):
+            self._store.set_row(row, batch[position])
+        if new_positions:
+            appended = self._store.extend(batch[new_positions])
+            rows = np.concatenate([rows, appended])
+        positions = updated_positions + new_positions
+        self._bind(rows.tolist(), [records[position] for position in positions])
+        if rows.size:
+            self.index.add(self._store, rows)
+
+    def delete(self, key: str) -> bool:
+        """Remove ``key`` and its vector; return whether it was present."""
+
+        return self.delete_many([key]) == 1
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Remove every key in ``keys`` that is present and return how many were.
+
+        Freed rows are skipped by search immediately and reused by later
+        inserts, so deleting never shifts or copies the matrix.
+        """
+
+        rows = []
+        for key in dict.fromkeys(keys):
+            row = self._rows.pop(key, None)
+            if row is not None:
+                self._attributes.remove(row, self._metadata[row])
+                self._keys[row] = None
+                self._texts[row] = None
+                self._metadata[row] = None
+                rows.append(row)
+        if rows:
+            rows = np.array(rows, dtype=np.int64)
+            self.index.remove(self._store, rows)
+            if self.lexical_index is not None:
+                self.lexical_index.remove(rows.tolist())
+            self._store.release(rows)
+        return len(rows)
+
+    def _bind(self, rows: List[int], records: List[Record]) -> None:
+        missing = len(self._store) - len(self._keys)
+        if missing > 0:
+            for column in (self._keys, self._texts, self._metadata):
+                column.extend([None] * missing)
+        for row, record in zip(rows, records):
+            if self._metadata[row] is not None:
+                self._attributes.remove(row, self._metadata[row])
+            self._rows[record.id] = row
+            self._keys[row] = record.id
+            self._texts[row] = record.text
+            self._metadata[row] = dict(record.metadata)
+            self._attributes.add(row, record.metadata)
+        if self.lexical_index is not None:
+            self.lexical_index.add(rows, [record.text for record in records])
+
+    def _record(self, row: int) -> Record:
+        return Record(
+            id=self._keys[row], text=self._texts[row], metadata=dict(self._metadata[row])
+        )
 
     def search(
         self,
         query_vector: Iterable[float],
         k: int,
         distance_measure: Callable[[np.ndarray, np.ndarray], float] = cosine_similarity,
+        filter: Optional[MetadataFilter] = None,
     ) -> List[Tuple[str, float]]:
-        """Return the ``k`` vectors most similar to ``query_vector``."""
+        """Return ``(text, score)`` for the ``k`` vectors most similar to ``query_vector``.
 
-        if k <= 0:
-            raise ValueError("k must be a positive integer")
+        The default cosine measure is answered by ``self.index``; any other
+        ``distance_measure`` falls back to scoring every row one at a time.
 
-        query = np.asarray(query_vector, dtype=float)
-        scores = [
-            (key, distance_measure(query, vector))
-            for key, vector in self.vectors.items()
-        ]
-        scores.sort(key=lambda item: item[1], reverse=True)
-        return scores[:k]
+        ``filter`` restricts the search to records whose metadata matches
+        every field (a list value matches any of its elements), e.g.
+        ``{"tenant": "acme", "lang": ["en", "de"]}``. Matching rows are
+        looked up in an inverted index and applied as a mask before scoring,
+        so selective filters make the search cheaper rather than slower.
+        """
+
+        rows, scores = self._search_rows(query_vector, k, distance_measure, filter)
+        return [(self._texts[row], float(score)) for row, score in zip(rows, scores)]
+
+    def search_records(
+        self,
+        query_vector: Iterable[float],
+        k: int,
+        distance_measure: Callable[[np.ndarray, np.ndarray], float] = cosine_similarity,
+        filter: Optional[MetadataFilter] = None,
+    ) -> List[Tuple[Record, float]]:
+        """Like ``search`` but return the full ``Record`` (id, text, metadata) of each hit."""
+
+        rows, scores = self._search_rows(query_vector, k, distance_measure, filter)
+        return [(self._record(row), float(score)) for row, score in zip(rows, scores)]
 
     def search_by_text(
         self,
@@ -55,29 +331,439 @@ class VectorDatabase:
         k: int,
         distance_measure: Callable[[np.ndarray, np.ndarray], float] = cosine_similarity,
         return_as_text: bool = False,
+        filter: Optional[MetadataFilter] = None,
+        mode: str = "dense",
+    ) -> Union[List[Tuple[str, float]], List[str]]:
+        """Search for ``query_text``.
+
+        ``mode="dense"`` embeds the query and runs ``search``; ``"lexical"``
+        runs ``lexical_search`` and ``"hybrid"`` runs ``hybrid_search`` with
+        reciprocal rank fusion.
+        """
+
+        if mode == "dense":
+            query_vector = self.embedding_model.get_embedding(query_text)
+            results = self.search(query_vector, k, distance_measure, filter)
+        elif mode == "lexical":
+            results = self.lexical_search(query_text, k, filter)
+        elif mode == "hybrid":
+            results = self.hybrid_search(query_text, k, filter=filter)
+        else:
+            raise ValueError(f"Unknown search mode: {mode!r}")
+        if return_as_text:
+            return [result[0] for result in results]
+        return results
+
+    async def asearch_by_text(
+        self,
+        query_text: str,
+        k: int,
+        return_as_text: bool = False,
+        filter: Optional[MetadataFilter] = None,
     ) -> Union[List[Tuple[str, float]], List[str]]:
-        """Vector search using an embedding generated from ``query_text``."""
+        """Async cosine ``search_by_text`` for use inside an event loop.
 
-        query_vector = self.embedding_model.get_embedding(query_text)
-        results = self.search(query_vector, k, distance_measure)
+        The query is embedded with the async client and scored on a worker
+        thread, so concurrent requests overlap instead of blocking the loop.
+        """
+
+        query_vector = await self.embedding_model.async_get_embedding(query_text)
+        results = await asyncio.to_thread(self.search, query_vector, k, filter=filter)
         if return_as_text:
             return [result[0] for result in results]
         return results
 
+    def lexical_search(
+        self, query_text: str, k: int, filter: Optional[MetadataFilter] = None
+    ) -> List[Tuple[str, float]]:
+        """Return ``(text, bm25 score)`` for the ``k`` best keyword matches of ``query_text``."""
+
+        rows, scores = self._lexical_rows(query_text, k, self._filter_mask(filter))
+        return [(self._texts[row], float(score)) for row, score in zip(rows, scores)]
+
+    def hybrid_search(
+        self,
+        query_text: str,
+        k: int,
+        fusion: str = "rrf",
+        alpha: float = 0.5,
+        candidates: Optional[int] = None,
+        filter: Optional[MetadataFilter] = None,
+        query_vector: Optional[Iterable[float]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Fuse dense (cosine) and lexical (BM25) retrieval for ``query_text``.
+
+        The best ``candidates`` hits of each retriever (default ``max(50,
+        4 * k)``) are merged with reciprocal rank fusion (``fusion="rrf"``)
+        or, with ``fusion="weighted"``, by ``alpha * dense + (1 - alpha) *
+        lexical`` over min-max normalised scores. Returns ``(text, fused
+        score)`` pairs; pass ``query_vector`` to skip embedding the query.
+        """
+
+        return [
+            (self._texts[row], score)
+            for row, score in self._hybrid_rows(
+                query_text, k, fusion, alpha, candidates, filter, query_vector
+            )
+        ]
+
+    def search_many(
+        self,
+        query_vectors: Iterable[Iterable[float]],
+        k: int,
+        filter: Optional[MetadataFilter] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """Cosine ``search`` for a batch of query vectors, one result list per query.
+
+        The queries are scored together with matrix-matrix products instead
+        of one matrix-vector product each.
+        """
+
+        return [
+            [(self._texts[row], float(score)) for row, score in zip(rows, scores)]
+            for rows, scores in self._search_rows_many(query_vectors, k, filter)
+        ]
+
+    def search_by_texts(
+        self,
+        query_texts: List[str],
+        k: int,
+        return_as_text: bool = False,
+        filter: Optional[MetadataFilter] = None,
+    ) -> Union[List[List[Tuple[str, float]]], List[List[str]]]:
+        """``search_by_text`` for many queries, embedded in one batched request."""
+
+        query_vectors = self.embedding_model.get_embeddings(query_texts)
+        return self._format_many(self.search_many(query_vectors, k, filter), return_as_text)
+
+    async def asearch_by_texts(
+        self,
+        query_texts: List[str],
+        k: int,
+        return_as_text: bool = False,
+        filter: Optional[MetadataFilter] = None,
+    ) -> Union[List[List[Tuple[str, float]]], List[List[str]]]:
+        """Async ``search_by_texts``; scoring runs off the event loop."""
+
+        query_vectors = await self.embedding_model.async_get_embeddings(query_texts)
+        results = await asyncio.to_thread(self.search_many, query_vectors, k, filter)
+        return self._format_many(results, return_as_text)
+
+    @staticmethod
+    def _format_many(
+        results: List[List[Tuple[str, float]]], return_as_text: bool
+    ) -> Union[List[List[Tuple[str, float]]], List[List[str]]]:
+        if return_as_text:
+            return [[text for text, _ in hits] for hits in results]
+        return results
+
+    def _search_rows_many(
+        self,
+        query_vectors: Iterable[Iterable[float]],
+        k: int,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        with span(
+            "vectordb.search_many", k=k, index=type(self.index).__name__, filtered=bool(metadata_filter)
+        ) as current:
+            if k <= 0:
+                raise ValueError("k must be a positive integer")
+            queries = np.asarray(query_vectors, dtype=self._store.dtype)
+            current.set_attribute("queries", len(queries))
+            if queries.size == 0:
+                return []
+            empty = np.empty(0, dtype=np.int64), np.empty(0, dtype=self._store.dtype)
+            if not self._rows:
+                return [empty] * len(queries)
+
+            mask = self._filter_mask(metadata_filter)
+            if mask is not None and not mask.any():
+                return [empty] * len(queries)
+            return self.index.search_many(self._store, queries, k, mask)
+
+    def _filter_mask(self, metadata_filter: Optional[MetadataFilter]) -> Optional[np.ndarray]:
+        if not metadata_filter:
+            return None
+        return self._attributes.mask(metadata_filter, len(self._store))
+
+    def _lexical_rows(
+        self, query_text: str, k: int, mask: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.lexical:
+            raise ValueError("Lexical search needs a store created with lexical=True")
+        if k <= 0:
+            raise ValueError("k must be a positive integer")
+        lexical_index = self.lexical_index
+        if lexical_index is None:
+            live_rows = np.flatnonzero(self._store.alive).tolist()
+            lexical_index = BM25Index()
+            lexical_index.add(live_rows, [self._texts[row] for row in live_rows])
+            self.lexical_index = lexical_index
+        return lexical_index.search(query_text, k, len(self._store), mask)
+
+    def _hybrid_rows(
+        self,
+        query_text: str,
+        k: int,
+        fusion: str,
+        alpha: float,
+        candidates: Optional[int],
+        metadata_filter: Optional[MetadataFilter],
+        query_vector: Optional[Iterable[float]],
+    ) -> List[Tuple[int, float]]:
+        if fusion not in ("rrf", "weighted"):
+            raise ValueError(f"Unknown fusion method: {fusion!r}")
+        if not self._rows:
+            return []
+        depth = candidates or max(50, 4 * k)
+        mask = self._filter_mask(metadata_filter)
+        if mask is not None and not mask.any():
+            return []
+        if query_vector is None:
+            query_vector = self.embedding_model.get_embedding(query_text)
+
+        dense_rows, dense_scores = self.index.search(self._store, query_vector, depth, mask)
+        lexical_rows, lexical_scores = self._lexical_rows(query_text, depth, mask)
+        fused: Dict[int, float] = {}
+        if fusion == "rrf":
+            for rows in (dense_rows, lexical_rows):
+                for rank, row in enumerate(rows.tolist()):
+                    fused[row] = fused.get(row, 0.0) + 1.0 / (RRF_K + rank + 1)
+        else:
+            for rows, scores, weight in (
+                (dense_rows, dense_scores, alpha),
+                (lexical_rows, lexical_scores, 1.0 - alpha),
+            ):
+                for row, score in zip(rows.tolist(), _min_max(scores).tolist()):
+                    fused[row] = fused.get(row, 0.0) + weight * score
+        return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def _search_rows(
+        self,
+        query_vector: Iterable[float],
+        k: int,
+        distance_measure: Callable[[np.ndarray, np.ndarray], float],
+        metadata_filter: Optional[MetadataFilter] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        with span(
+            "vectordb.search", k=k, index=type(self.index).__name__, filtered=bool(metadata_filter)
+        ):
+            if k <= 0:
+                raise ValueError("k must be a positive integer")
+            empty = np.empty(0, dtype=np.int64), np.empty(0, dtype=self._store.dtype)
+            if not self._rows:
+                return empty
+
+            mask = self._filter_mask(metadata_filter)
+            if mask is not None and not mask.any():
+                return empty
+
+            if distance_measure is cosine_similarity:
+                return self.index.search(self._store, query_vector, k, mask)
+
+            query = np.asarray(query_vector, dtype=self._store.dtype)
+            candidates = np.flatnonzero(self._store.alive if mask is None else mask)
+            scores = np.fromiter(
+                (distance_measure(query, self._store.matrix[row]) for row in candidates),
+                dtype=float,
+                count=len(candidates),
+            )
+            best = top_k_indices(scores, k)
+            return candidates[best], scores[best]
+
     def retrieve_from_key(self, key: str) -> Optional[np.ndarray]:
-        """Return the stored vector for ``key`` if present."""
+        """Return the stored vector for the record id ``key`` if present."""
+
+        row = self._rows.get(key)
+        return None if row is None else self._store.row(row)
+
+    def evaluate_recall(self, query_vectors: Iterable[Iterable[float]], k: int) -> float:
+        """Recall@k of ``self.index`` against exact search over the same vectors."""
+
+        return recall_at_k(self._store, self.index, query_vectors, k)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the store to the directory ``path``.
+
+        The directory holds ``vectors.npy``, ``norms.npy`` and ``alive.npy``
+        (the matrix, its row norms and which rows are live), ``keys.bin`` and
+        ``texts.bin`` with their ``*_offsets.npy`` (UTF-8 record ids and
+        texts, empty for deleted rows), ``metadata.jsonl`` (one JSON object
+        per row), any trained index state and ``manifest.json``.
+
+        Every file is written to a staging directory first and then moved
+        into place with ``os.replace``, ``manifest.json`` last. Each file is
+        therefore swapped atomically, and saving over the directory a
+        memory-mapped store was loaded from never truncates a file the
+        store is still reading.
+        """
 
-        return self.vectors.get(key)
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=".save-", dir=directory))
+        try:
+            self._write(staging)
+            names = sorted(entry.name for entry in staging.iterdir())
+            names.remove("manifest.json")
+            for name in names:
+                os.replace(staging / name, directory / name)
+            for name in _STATE_FILES.difference(names):
+                (directory / name).unlink(missing_ok=True)
+            os.replace(staging / "manifest.json", directory / "manifest.json")
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
 
-    async def abuild_from_list(self, list_of_text: List[str]) -> "VectorDatabase":
-        """Populate the vector store asynchronously from raw text snippets."""
+    def _write(self, directory: Path) -> None:
+        np.save(directory / "vectors.npy", self._store.matrix)
+        np.save(directory / "norms.npy", self._store.norms)
+        np.save(directory / "alive.npy", self._store.alive)
 
-        embeddings = await self.embedding_model.async_get_embeddings(list_of_text)
-        for text, embedding in zip(list_of_text, embeddings):
-            self.insert(text, embedding)
+        count = len(self._store)
+        _write_strings(directory, "keys", self._keys[:count])
+        _write_strings(directory, "texts", self._texts[:count])
+        with (directory / "metadata.jsonl").open("w", encoding="utf-8") as handle:
+            for metadata in self._metadata[:count]:
+                handle.write(json.dumps(metadata) + "\n")
+
+        self.index.save(directory)
+        if self.lexical_index is not None:
+            self.lexical_index.save(directory)
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "count": len(self._store),
+            "dim": self._store.dim,
+            "dtype": self._store.dtype.name,
+            "index": self.index.name,
+            "lexical_documents": (
+                None if self.lexical_index is None else len(self.lexical_index)
+            ),
+            "state_files": sorted(
+                _STATE_FILES.intersection(entry.name for entry in directory.iterdir())
+            ),
+        }
+        (directory / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        mmap: bool = True,
+        embedding_model: Optional[EmbeddingBackend] = None,
+        index: Optional[SearchIndex] = None,
+        lexical: bool = True,
+    ) -> "VectorDatabase":
+        """Open a store written by ``save`` without re-embedding anything.
+
+        With ``mmap=True`` the vectors are memory-mapped copy-on-write, so
+        opening is O(1) regardless of size and worker processes share the
+        OS page cache. Later inserts copy the matrix into memory.
+        """
+
+        directory = Path(path)
+        manifest = json.loads((directory / "manifest.json").read_text())
+        version = manifest["format_version"]
+        if version not in (1, FORMAT_VERSION):
+            raise ValueError(f"Unsupported vector store format version: {version}")
+
+        mmap_mode = "c" if mmap else None
+        matrix = np.load(directory / "vectors.npy", mmap_mode=mmap_mode)
+        norms = np.load(directory / "norms.npy", mmap_mode=mmap_mode)
+        keys = _read_strings(directory, "keys")
+        if len(keys) != matrix.shape[0]:
+            raise ValueError("Key table does not match the number of stored vectors")
+        alive_path = directory / "alive.npy"
+        alive = np.load(alive_path) if alive_path.exists() else None
+        if version == 1:
+            # Version 1 stores used the chunk text as the key and had no metadata.
+            texts = list(keys)
+            metadata = [{} for _ in keys]
+        else:
+            texts = _read_strings(directory, "texts")
+            with (directory / "metadata.jsonl").open(encoding="utf-8") as handle:
+                metadata = [json.loads(line) for line in handle]
+
+        if index is None:
+            index = INDEX_TYPES[manifest["index"]]()
+        vector_db = cls(
+            embedding_model=embedding_model,
+            dtype=matrix.dtype,
+            index=index,
+            lexical=lexical,
+        )
+        vector_db._store = MatrixStore.from_arrays(matrix, norms, alive)
+        live = vector_db._store.alive.tolist()
+        vector_db._keys = [key if live[row] else None for row, key in enumerate(keys)]
+        vector_db._texts = [text if live[row] else None for row, text in enumerate(texts)]
+        vector_db._metadata = [
+            value if live[row] else None for row, value in enumerate(metadata)
+        ]
+        vector_db._rows = {key: row for row, key in enumerate(keys) if live[row]}
+        for row, value in enumerate(vector_db._metadata):
+            if value:
+                vector_db._attributes.add(row, value)
+
+        # Stores saved before ``state_files`` was recorded trust whatever is on disk.
+        state_files = manifest.get("state_files")
+        live_rows = np.flatnonzero(vector_db._store.alive)
+        if lexical and (state_files is None or BM25Index.state_file in state_files):
+            lexical_index = BM25Index()
+            # Anything that does not match the live rows is left to be
+            # rebuilt from the texts on the first lexical query.
+            if lexical_index.load(directory) and np.array_equal(
+                lexical_index.rows(), live_rows
+            ):
+                vector_db.lexical_index = lexical_index
+        if state_files is None or getattr(index, "state_file", None) in state_files:
+            index.load(directory, vector_db._store)
+        else:
+            # No saved state: behave as if the rows had just been added.
+            index.add(vector_db._store, live_rows)
+        return vector_db
+
+    async def abuild_from_list(
+        self,
+        list_of_text: List[str],
+        metadatas: Optional[List[Metadata]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> "VectorDatabase":
+        """Populate the vector store asynchronously from raw text snippets.
+
+        Each snippet becomes a ``Record``; ids default to ``record_id``
+        (the snippet itself, with distinct ids for repeated snippets).
+        """
+
+        records = records_from_texts(list_of_text, metadatas, ids)
+        embeddings = await self.embedding_model.async_get_embeddings(list(list_of_text))
+        if embeddings:
+            self.upsert_many(records, embeddings)
         return self
 
 
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    if scores.size == 0:
+        return scores
+    low, high = float(scores.min()), float(scores.max())
+    if high == low:
+        return np.ones_like(scores)
+    return (scores - low) / (high - low)
+
+
+def _write_strings(directory: Path, name: str, values: List[Optional[str]]) -> None:
+    encoded = [b"" if value is None else value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    (directory / f"{name}.bin").write_bytes(b"".join(encoded))
+    suffix = "key" if name == "keys" else name.rstrip("s")
+    np.save(directory / f"{suffix}_offsets.npy", offsets)
+
+
+def _read_strings(directory: Path, name: str) -> List[str]:
+    suffix = "key" if name == "keys" else name.rstrip("s")
+    offsets = np.load(directory / f"{suffix}_offsets.npy").tolist()
+    data = (directory / f"{name}.bin").read_bytes()
+    return [data[start:stop].decode("utf-8") for start, stop in zip(offsets[:-1], offsets[1:])]
+
+
 if __name__ == "__main__":
     list_of_text = [
         "I like to eat broccoli and bananas.",
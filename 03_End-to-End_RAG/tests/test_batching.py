@@ -0,0 +1,126 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from aimakerspace.openai_utils import batching
+from aimakerspace.openai_utils.batching import EmbeddingScheduler
+
+
+class _Flaky(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("try again")
+        headers = {} if retry_after is None else {"retry-after": str(retry_after)}
+        self.response = type("Response", (), {"headers": headers})()
+
+
+@pytest.fixture(autouse=True)
+def _retry_flaky(monkeypatch):
+    monkeypatch.setattr(batching, "_retryable_errors", lambda: (_Flaky,))
+
+
+def _embed(texts):
+    return [[float(len(text))] for text in texts]
+
+
+def test_pack_respects_token_and_size_limits():
+    scheduler = EmbeddingScheduler(max_tokens_per_batch=10, max_batch_size=3)
+
+    assert scheduler._pack_counts([4, 4, 4, 1, 1, 1, 1, 20, 1]) == [
+        [0, 1], [2, 3, 4], [5, 6], [7], [8],
+    ]
+    assert scheduler.pack([]) == []
+
+
+def test_run_retries_and_returns_results_in_input_order():
+    scheduler = EmbeddingScheduler(max_batch_size=2, base_delay=0)
+    failures = {"c": 2}
+
+    async def request(texts):
+        if failures.get(texts[0]):
+            failures[texts[0]] -= 1
+            raise _Flaky()
+        return _embed(texts)
+
+    texts = ["a", "bb", "c", "dddd", "eeeee"]
+    assert asyncio.run(scheduler.run(texts, request)) == _embed(texts)
+    stats = scheduler.last_stats
+    assert (stats.texts, stats.requests, stats.retries) == (5, 5, 2)
+
+
+def test_run_gives_up_after_max_retries():
+    scheduler = EmbeddingScheduler(max_retries=2, base_delay=0)
+    calls = []
+
+    def request(texts):
+        calls.append(texts)
+        raise _Flaky()
+
+    with pytest.raises(_Flaky):
+        scheduler.run_sync(["a"], request)
+    assert len(calls) == 3 and scheduler.last_stats.retries == 2
+
+
+def test_backoff_honours_retry_after_up_to_max_delay():
+    scheduler = EmbeddingScheduler(base_delay=0, max_delay=5)
+
+    assert scheduler._backoff(0, _Flaky()) == 0
+    assert scheduler._backoff(0, _Flaky(retry_after=2)) == 2
+    assert scheduler._backoff(0, _Flaky(retry_after=60)) == 5
+
+
+def test_backing_off_batch_does_not_hold_a_concurrency_slot():
+    scheduler = EmbeddingScheduler(max_concurrency=1, max_batch_size=1, max_delay=1)
+    events = []
+
+    async def request(texts):
+        events.append(texts[0])
+        if events == ["slow"]:
+            raise _Flaky(retry_after=0.2)
+        return _embed(texts)
+
+    asyncio.run(scheduler.run(["slow", "fast"], request))
+    assert events == ["slow", "fast", "slow"]
+
+
+def test_failed_batch_cancels_batches_in_flight():
+    scheduler = EmbeddingScheduler(max_batch_size=1)
+    cancelled = []
+
+    async def request(texts):
+        if texts == ["bad"]:
+            raise RuntimeError("boom")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(texts[0])
+            raise
+        return _embed(texts)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(scheduler.run(["slow", "bad"], request))
+    assert cancelled == ["slow"]
+
+
+def test_short_responses_are_rejected():
+    scheduler = EmbeddingScheduler()
+
+    async def request(texts):
+        return _embed(texts)[:-1]
+
+    with pytest.raises(ValueError, match="1 embeddings for a batch of 2"):
+        asyncio.run(scheduler.run(["a", "b"], request))
+    with pytest.raises(ValueError):
+        scheduler.run_sync(["a", "b"], lambda texts: _embed(texts)[:-1])
+
+
+@pytest.mark.parametrize("module", ["batching.py", "tokenizer.py"])
+def test_chapter_copies_stay_identical(module):
+    # Each chapter ships a self-contained aimakerspace package; these two
+    # modules are meant to be the same file in both.
+    root = Path(__file__).resolve().parents[2]
+    copies = [
+        root / chapter / "aimakerspace" / "openai_utils" / module
+        for chapter in ("02_Embeddings_and_RAG", "03_End-to-End_RAG")
+    ]
+    assert copies[0].read_text() == copies[1].read_text()
@@ -0,0 +1,57 @@
+import json
+from dataclasses import replace
+
+import pytest
+
+from aimakerspace import benchmark
+
+
+@pytest.mark.parametrize("dim", [2, 3, 64])
+def test_every_backend_runs_at_small_dimensions(dim):
+    results = benchmark.run([600], dim=dim, k=5, num_queries=10, clusters=8)
+
+    assert [result.backend for result in results] == list(benchmark.default_backends(dim))
+    by_backend = {result.backend: result for result in results}
+    assert by_backend["flat"].recall == 1.0
+    assert by_backend["pq+rerank"].recall >= by_backend["pq"].recall
+    assert all(result.size == 600 and result.dim == dim for result in results)
+
+
+def test_resident_bytes_are_reported_per_backend():
+    results = {
+        result.backend: result
+        for result in benchmark.run([2000], dim=64, k=5, num_queries=5, backends=["flat", "sq8", "pq"])
+    }
+    flat, sq8, pq = results["flat"], results["sq8"], results["pq"]
+
+    assert flat.resident_bytes == flat.vector_bytes
+    assert sq8.vector_bytes == flat.vector_bytes
+    assert sq8.resident_bytes < flat.resident_bytes / 3
+    assert pq.resident_bytes < sq8.resident_bytes
+
+
+def test_compare_flags_regressions_only():
+    (result,) = benchmark.run([500], dim=8, k=5, num_queries=5, backends=["flat"])
+    baseline = [json.loads(json.dumps(result.__dict__))]
+
+    assert benchmark.compare(baseline, [result]) == []
+    slower = replace(result, p50_ms=result.p50_ms * 2 + 1, recall=result.recall - 0.5)
+    assert len(benchmark.compare(baseline, [slower])) == 2
+    assert benchmark.compare(baseline, [replace(result, size=1)]) == []
+
+
+def test_main_writes_json_and_fails_on_regression(tmp_path):
+    output = tmp_path / "results.json"
+    benchmark.main(["--sizes", "300", "--dim", "2", "--queries", "5", "--output", str(output)])
+    report = json.loads(output.read_text())
+    assert report["version"] == benchmark.RESULTS_VERSION
+    assert {row["backend"] for row in report["results"]} == set(benchmark.default_backends(2))
+
+    for row in report["results"]:
+        row["recall"] = 2.0
+    output.write_text(json.dumps(report))
+    with pytest.raises(SystemExit):
+        benchmark.main(
+            ["--sizes", "300", "--dim", "2", "--queries", "5", "--backends", "flat",
+             "--baseline", str(output)]
+        )
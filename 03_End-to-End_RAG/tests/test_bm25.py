@@ -0,0 +1,108 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from aimakerspace.bm25 import BM25Index, tokenize
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.vectordatabase import RRF_K, VectorDatabase
+
+TEXTS = [
+    "The Michael Eisner Memorial Weak Executive Problem",
+    "Strong executives hire strong teams",
+    "Startups die when the executive team is weak",
+    "Hiring is the most important job of a founder",
+    "A founder should hire slowly and fire quickly",
+]
+
+
+def _reference_scores(texts, query, k1=1.5, b=0.75):
+    documents = [Counter(tokenize(text)) for text in texts]
+    average_length = sum(sum(doc.values()) for doc in documents) / len(documents)
+    scores = []
+    for doc in documents:
+        score = 0.0
+        for token, repeats in Counter(tokenize(query)).items():
+            frequency = sum(token in other for other in documents)
+            if token not in doc:
+                continue
+            idf = math.log1p((len(documents) - frequency + 0.5) / (frequency + 0.5))
+            norm = k1 * (1 - b + b * sum(doc.values()) / average_length)
+            score += repeats * idf * doc[token] * (k1 + 1) / (doc[token] + norm)
+        scores.append(score)
+    return scores
+
+
+def test_scores_match_the_okapi_formula():
+    index = BM25Index()
+    index.add(range(len(TEXTS)), TEXTS)
+
+    query = "weak executive founder founder"
+    np.testing.assert_allclose(
+        index.scores(query, len(TEXTS)), _reference_scores(TEXTS, query), rtol=1e-5
+    )
+    rows, _ = index.search("eisner", 3, len(TEXTS))
+    assert rows.tolist() == [0]
+
+
+def test_incremental_updates_match_a_fresh_index(tmp_path):
+    index = BM25Index()
+    index.add(range(len(TEXTS)), TEXTS)
+    index.add([1], ["Weak founders hire weak executives"])
+    index.remove([3])
+    for row in range(20):
+        index.add([len(TEXTS) + row], [f"filler document number {row}"])
+        index.remove([len(TEXTS) + row])
+
+    live = {0: TEXTS[0], 1: "Weak founders hire weak executives", 2: TEXTS[2], 4: TEXTS[4]}
+    fresh = BM25Index()
+    fresh.add(live.keys(), live.values())
+    size = len(TEXTS) + 20
+    for query in ("weak executive", "founder hire", "filler"):
+        np.testing.assert_allclose(index.scores(query, size), fresh.scores(query, size), rtol=1e-5)
+
+    index.save(tmp_path)
+    loaded = BM25Index()
+    assert loaded.load(tmp_path)
+    assert loaded.rows().tolist() == [0, 1, 2, 4]
+    np.testing.assert_allclose(loaded.scores("weak", size), index.scores("weak", size))
+
+
+def test_hybrid_search_finds_rare_terms_and_respects_weights():
+    vector_db = VectorDatabase(HashingEmbeddingModel(64))
+    vector_db.insert_many(TEXTS, HashingEmbeddingModel(64).get_embeddings(TEXTS))
+
+    assert vector_db.lexical_search("Eisner", 1)[0][0] == TEXTS[0]
+    assert vector_db.search_by_text("Michael Eisner", 1, mode="hybrid")[0][0] == TEXTS[0]
+
+    query = "weak executive team"
+    query_vector = vector_db.embedding_model.get_embedding(query)
+    dense = [text for text, _ in vector_db.search(query_vector, 5)]
+    lexical = [text for text, _ in vector_db.lexical_search(query, 5)]
+    for alpha, expected in ((1.0, dense), (0.0, lexical)):
+        fused = vector_db.hybrid_search(
+            query, 1, fusion="weighted", alpha=alpha, query_vector=query_vector
+        )
+        assert fused == [(expected[0], pytest.approx(1.0))]
+
+    fused = dict(vector_db.hybrid_search(query, 5, query_vector=query_vector))
+    for text, score in fused.items():
+        ranks = [hits.index(text) for hits in (dense, lexical) if text in hits]
+        assert score == pytest.approx(sum(1.0 / (RRF_K + rank + 1) for rank in ranks))
+
+    with pytest.raises(ValueError):
+        vector_db.hybrid_search(query, 2, fusion="max")
+    with pytest.raises(ValueError):
+        VectorDatabase(HashingEmbeddingModel(8), lexical=False).lexical_search(query, 1)
+
+
+def test_lexical_index_follows_writes_and_filters():
+    vector_db = VectorDatabase(HashingEmbeddingModel(32))
+    vector_db.insert_many(TEXTS, HashingEmbeddingModel(32).get_embeddings(TEXTS))
+    assert vector_db.lexical_search("eisner", 1)
+
+    vector_db.delete(TEXTS[0])
+    assert vector_db.lexical_search("eisner", 1) == []
+    vector_db.insert("Eisner again", HashingEmbeddingModel(32).get_embedding("Eisner again"))
+    assert vector_db.lexical_search("eisner", 1)[0][0] == "Eisner again"
@@ -0,0 +1,75 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from aimakerspace.embedding_backends import (
+    EMBEDDING_BACKEND_VARIABLE,
+    EmbeddingBackend,
+    HashingEmbeddingModel,
+    default_embedding_model,
+)
+
+
+def test_hashing_vectors_are_deterministic_unit_length():
+    model = HashingEmbeddingModel(64)
+    vectors = model.embed(["the quick brown fox", "The quick brown fox!", ""])
+
+    assert vectors.shape == (3, 64) and vectors.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(vectors[:2], axis=1), 1.0, rtol=1e-6)
+    np.testing.assert_array_equal(vectors[0], vectors[1])
+    assert not vectors[2].any()
+    again = HashingEmbeddingModel(64).embed(["the quick brown fox"])
+    np.testing.assert_array_equal(again[0], vectors[0])
+    assert model.get_embedding("the quick brown fox") == vectors[0].tolist()
+
+
+def test_hashing_similarity_follows_shared_words():
+    model = HashingEmbeddingModel(256)
+    query, near, far = model.embed(
+        ["startup founders raise capital", "founders raise venture capital", "a recipe for bread"]
+    )
+
+    assert float(query @ near) > float(query @ far)
+
+
+def test_seed_and_ngrams_change_the_projection():
+    text = ["founders raise venture capital"]
+    base = HashingEmbeddingModel(128).embed(text)[0]
+
+    assert not np.array_equal(HashingEmbeddingModel(128, seed=1).embed(text)[0], base)
+    assert not np.array_equal(HashingEmbeddingModel(128, ngrams=1).embed(text)[0], base)
+    names = {HashingEmbeddingModel(128, seed=seed).embeddings_model_name for seed in (0, 1)}
+    assert len(names) == 2
+
+
+def test_async_variants_match_the_sync_ones():
+    model = HashingEmbeddingModel(32)
+    texts = ["alpha beta", "gamma"]
+
+    assert asyncio.run(model.async_get_embeddings(iter(texts))) == model.get_embeddings(texts)
+    assert asyncio.run(model.async_get_embedding("gamma")) == model.get_embedding("gamma")
+    with pytest.raises(NotImplementedError):
+        EmbeddingBackend().get_embedding("x")
+
+
+def test_hashing_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        HashingEmbeddingModel(0)
+    with pytest.raises(ValueError):
+        HashingEmbeddingModel(8, ngrams=0)
+
+
+def test_default_embedding_model_follows_the_environment(monkeypatch):
+    monkeypatch.setenv(EMBEDDING_BACKEND_VARIABLE, "Hashing")
+    assert isinstance(default_embedding_model(), HashingEmbeddingModel)
+
+    monkeypatch.setenv(EMBEDDING_BACKEND_VARIABLE, "word2vec")
+    with pytest.raises(ValueError):
+        default_embedding_model()
+
+    monkeypatch.setenv(EMBEDDING_BACKEND_VARIABLE, "openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    from aimakerspace.openai_utils.embedding import EmbeddingModel
+
+    assert isinstance(default_embedding_model(), EmbeddingModel)
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from aimakerspace.instrumentation import InMemorySink, add_sink, remove_sink
+from aimakerspace.openai_utils.embedding import EmbeddingModel
+from aimakerspace.openai_utils.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def sink():
+    sink = add_sink(InMemorySink())
+    yield sink
+    remove_sink(sink)
+
+
+def test_cache_counts_every_input_once(sink):
+    cache = EmbeddingCache()
+    cache.put_many("model", ["a"], [[1.0, 2.0]])
+
+    assert cache.get_many("model", ["a", "b", "b", "a"]) == [[1.0, 2.0], None, None, [1.0, 2.0]]
+    assert cache.get_many("other-model", ["a"]) == [None]
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert sink.counters["embedding.cache_hits"] == 2
+    assert sink.counters["embedding.cache_misses"] == 3
+
+
+def test_memory_tier_evicts_least_recently_used_entries():
+    cache = EmbeddingCache(max_bytes=2 * 4 * 4)
+    cache.put_many("model", ["a", "b"], [[1.0] * 4, [2.0] * 4])
+    cache.get_many("model", ["a"])
+    cache.put_many("model", ["c"], [[3.0] * 4])
+
+    assert len(cache) == 2 and cache.memory_bytes == 32
+    assert cache.get_many("model", ["a", "b", "c"])[1] is None
+
+
+def test_sqlite_tier_survives_a_restart(tmp_path):
+    path = tmp_path / "cache" / "embeddings.sqlite"
+    cache = EmbeddingCache(path=path)
+    cache.put_many("model", ["a"], [[0.5, 0.25]])
+    cache.close()
+
+    reopened = EmbeddingCache(path=path)
+    assert len(reopened) == 0
+    assert reopened.get_many("model", ["a"]) == [[0.5, 0.25]]
+    assert len(reopened) == 1
+    reopened.close()
+
+
+def test_embedding_model_only_requests_unique_misses(monkeypatch, sink):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    cache = EmbeddingCache()
+    embedding_model = EmbeddingModel(cache=cache)
+    requested = []
+
+    def request(texts):
+        requested.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    async def async_request(texts):
+        return request(texts)
+
+    monkeypatch.setattr(embedding_model, "_request", request)
+    monkeypatch.setattr(embedding_model, "_async_request", async_request)
+
+    assert embedding_model.get_embeddings(["aa", "b", "aa"]) == [[2.0], [1.0], [2.0]]
+    assert asyncio.run(embedding_model.async_get_embeddings(["b", "ccc"])) == [[1.0], [3.0]]
+    assert requested == [["aa", "b"], ["ccc"]]
+    assert (cache.hits, cache.misses) == (1, 4)
+    assert sink.counters["embedding.cache_misses"] == cache.misses
@@ -0,0 +1,99 @@
+import pytest
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.incremental import IncrementalIndexer, chunk_id, sync_directory
+from aimakerspace.text_utils import CharacterTextSplitter
+from aimakerspace.vectordatabase import VectorDatabase
+
+
+class _RecordingEmbeddingModel(HashingEmbeddingModel):
+    def __init__(self):
+        super().__init__(dimensions=32)
+        self.calls = []
+
+    def get_embeddings(self, list_of_text):
+        texts = list(list_of_text)
+        self.calls.append(texts)
+        return super().get_embeddings(texts)
+
+
+def _indexer(tmp_path, vector_db, **kwargs):
+    splitter = CharacterTextSplitter(chunk_size=10, chunk_overlap=0)
+    return IncrementalIndexer(vector_db, tmp_path / "files.json", splitter, **kwargs)
+
+
+def test_sync_embeds_only_new_and_changed_chunks(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("0123456789abcdefghij")
+    (docs / "b.txt").write_text("klmnopqrst")
+    model = _RecordingEmbeddingModel()
+    vector_db = VectorDatabase(model)
+
+    stats = _indexer(tmp_path, vector_db).sync(docs)
+    assert (stats.added, stats.chunks_embedded, len(vector_db)) == (2, 3, 3)
+
+    stats = _indexer(tmp_path, vector_db).sync(docs)
+    assert (stats.unchanged, stats.chunks_embedded) == (2, 0)
+
+    # Edit the second chunk of a.txt, append a third, and drop b.txt.
+    (docs / "a.txt").write_text("0123456789ABCDEFGHIJuvwxyz")
+    (docs / "b.txt").unlink()
+    model.calls.clear()
+    stats = _indexer(tmp_path, vector_db).sync(docs)
+    a = str((docs / "a.txt").resolve())
+    b = str((docs / "b.txt").resolve())
+    assert (stats.updated, stats.removed, stats.chunks_deleted) == (1, 1, 1)
+    assert sorted(text for call in model.calls for text in call) == ["ABCDEFGHIJ", "uvwxyz"]
+    assert vector_db.get(chunk_id(a, 2)).metadata == {"source": a, "chunk": 2}
+    assert chunk_id(b, 0) not in vector_db
+
+    # Shortening a file deletes the chunks past its new end.
+    (docs / "a.txt").write_text("0123456789")
+    stats = _indexer(tmp_path, vector_db).sync(docs)
+    assert (stats.chunks_embedded, stats.chunks_deleted, len(vector_db)) == (0, 2, 1)
+
+
+def test_sync_embeds_changed_files_in_bounded_batches(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for name in "abc":
+        (docs / f"{name}.txt").write_text(name * 25)
+    model = _RecordingEmbeddingModel()
+
+    stats = _indexer(tmp_path, VectorDatabase(model), batch_size=2).sync(docs)
+
+    assert stats.chunks_embedded == 9
+    assert max(len(call) for call in model.calls) <= 2
+
+
+def test_files_missing_from_the_store_are_reindexed(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("0123456789")
+    _indexer(tmp_path, VectorDatabase(HashingEmbeddingModel(32))).sync(docs)
+
+    fresh = VectorDatabase(HashingEmbeddingModel(32))
+    stats = _indexer(tmp_path, fresh).sync(docs)
+    assert (stats.updated, stats.chunks_embedded, len(fresh)) == (1, 1, 1)
+
+
+def test_manifest_is_written_only_after_the_store_is_saved(tmp_path, monkeypatch):
+    monkeypatch.setenv("AIMAKERSPACE_EMBEDDING_BACKEND", "hashing")
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("some text")
+    store = tmp_path / "store"
+
+    def fail(self, path):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(VectorDatabase, "save", fail)
+        with pytest.raises(OSError):
+            sync_directory(docs, store)
+    assert not (store / "files.json").exists()
+
+    assert sync_directory(docs, store).added == 1
+    assert sync_directory(docs, store).unchanged == 1
+    assert len(VectorDatabase.load(store)) == 1
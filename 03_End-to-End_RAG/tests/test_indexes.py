@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.indexes import FlatIndex, IVFIndex, recall_at_k
+from aimakerspace.matrix_store import MatrixStore
+from aimakerspace.vectordatabase import VectorDatabase
+
+
+def _clustered(count: int, dim: int = 32, clusters: int = 20, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    data = centers[rng.integers(0, clusters, size=count)] + rng.normal(
+        scale=0.3, size=(count, dim)
+    )
+    queries = data[rng.choice(count, size=50, replace=False)] + rng.normal(
+        scale=0.05, size=(50, dim)
+    )
+    return data.astype(np.float32), queries.astype(np.float32)
+
+
+def test_ivf_is_exact_until_trained():
+    data, queries = _clustered(100)
+    store = MatrixStore()
+    index = IVFIndex(min_train_size=1000)
+    index.add(store, store.extend(data))
+
+    assert not index.is_trained
+    assert recall_at_k(store, index, queries, 10) == 1.0
+
+
+def test_ivf_recall_rises_with_nprobe():
+    data, queries = _clustered(3000)
+    store = MatrixStore()
+    index = IVFIndex(nlist=40, nprobe=1, min_train_size=1000)
+    index.add(store, store.extend(data))
+    assert index.is_trained and index.nbytes > 0
+
+    low = recall_at_k(store, index, queries, 10)
+    index.nprobe = 40
+    assert recall_at_k(store, index, queries, 10) == 1.0
+    index.nprobe = 8
+    assert low <= recall_at_k(store, index, queries, 10)
+    assert recall_at_k(store, index, queries, 10) >= 0.9
+
+
+def test_ivf_follows_overwrites_and_deletes():
+    data, queries = _clustered(2000)
+    vector_db = VectorDatabase(
+        HashingEmbeddingModel(32),
+        index=IVFIndex(nlist=20, nprobe=20, min_train_size=1000),
+        lexical=False,
+    )
+    vector_db.insert_many([f"key-{row}" for row in range(len(data))], data)
+
+    vector_db.insert("key-0", queries[0])
+    assert vector_db.search(queries[0], 1)[0][0] == "key-0"
+    vector_db.delete("key-0")
+    assert "key-0" not in [key for key, _ in vector_db.search(queries[0], 10)]
+    assert vector_db.evaluate_recall(queries, 10) == 1.0
+
+
+def test_ivf_state_round_trips(tmp_path):
+    data, queries = _clustered(2000)
+    vector_db = VectorDatabase(
+        HashingEmbeddingModel(32), index=IVFIndex(nprobe=4, min_train_size=1000), lexical=False
+    )
+    vector_db.insert_many([f"key-{row}" for row in range(len(data))], data)
+    vector_db.save(tmp_path)
+
+    loaded = VectorDatabase.load(tmp_path)
+    assert isinstance(loaded.index, IVFIndex) and loaded.index.nprobe == 4
+    np.testing.assert_array_equal(loaded.index.centroids, vector_db.index.centroids)
+    assert loaded.search_many(queries, 5) == vector_db.search_many(queries, 5)
+
+
+def test_ivf_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        IVFIndex(nprobe=0)
+    with pytest.raises(ValueError):
+        IVFIndex(nlist=0)
+    assert FlatIndex().nbytes == 0
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.ingest import aingest_documents
+from aimakerspace.text_utils import CharacterTextSplitter
+from aimakerspace.vectordatabase import VectorDatabase, record_id
+
+
+class _FailingEmbeddingModel(HashingEmbeddingModel):
+    async def async_get_embeddings(self, list_of_text):
+        raise RuntimeError("embedding service unavailable")
+
+
+def test_ingest_streams_every_chunk_with_document_metadata():
+    documents = ["alpha beta gamma delta", "same", "same"]
+    pulled = []
+
+    def iter_documents():
+        for document in documents:
+            pulled.append(document)
+            yield document
+
+    vector_db = VectorDatabase(HashingEmbeddingModel(32))
+    splitter = CharacterTextSplitter(chunk_size=10, chunk_overlap=2)
+    stats = asyncio.run(
+        aingest_documents(iter_documents(), vector_db, splitter, batch_size=2, max_in_flight=1)
+    )
+
+    expected_chunks = sum(len(splitter.split(document)) for document in documents)
+    assert pulled == documents
+    assert (stats.documents, stats.chunks) == (3, expected_chunks)
+    assert stats.batches == -(-expected_chunks // 2)
+    assert len(vector_db) == expected_chunks
+
+    # Duplicate chunks become distinct records, ids match ``records_from_texts``.
+    assert vector_db.get("same").metadata == {"document": 1}
+    assert vector_db.get(record_id("same", 1)).metadata == {"document": 2}
+    assert vector_db.search_by_text("alpha beta", k=1)[0][0].startswith("alpha")
+
+
+def test_ingest_surfaces_the_first_embedding_error():
+    vector_db = VectorDatabase(_FailingEmbeddingModel(32))
+
+    with pytest.raises(RuntimeError, match="unavailable"):
+        asyncio.run(aingest_documents(["some text"] * 10, vector_db, batch_size=1))
+    assert len(vector_db) == 0
+
+
+def test_ingest_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        asyncio.run(aingest_documents([], VectorDatabase(HashingEmbeddingModel(8)), batch_size=0))
@@ -0,0 +1,99 @@
+import base64
+import json
+
+import httpx
+import numpy as np
+import pytest
+
+from aimakerspace import ingest_benchmark
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.fake_embedding_server import FakeEmbeddingServer
+from aimakerspace.openai_utils.batching import EmbeddingScheduler
+
+
+def _scheduler(**overrides) -> EmbeddingScheduler:
+    settings = dict(max_concurrency=4, max_batch_size=16, base_delay=0.01, max_delay=0.05)
+    settings.update(overrides)
+    return EmbeddingScheduler(**settings)
+
+
+def test_fake_server_ingests_a_synthetic_corpus(tmp_path):
+    corpus = ingest_benchmark.write_synthetic_corpus(tmp_path, documents=5, words_per_document=300)
+    assert len(list(corpus.glob("*.txt"))) == 5
+
+    with FakeEmbeddingServer(dimensions=16, latency=0.0) as server:
+        result = ingest_benchmark.run(corpus, server, chunk_size=400, chunk_overlap=50,
+                                      scheduler=_scheduler())
+
+    stages = {stage.name: stage for stage in result.stages}
+    assert list(stages) == ["load_text", "split", "embed", "index"]
+    assert result.documents == stages["load_text"].items == 5
+    assert result.chunks == stages["split"].items == stages["embed"].items
+    assert stages["index"].items == result.chunks
+    assert result.bytes == sum(path.stat().st_size for path in corpus.glob("*.txt"))
+    assert server.stats.inputs == result.chunks
+    assert result.embedding["requests"] == server.stats.requests >= result.chunks / 16
+
+    report = result.to_dict()
+    assert report["chunks_per_second"] == pytest.approx(result.chunks / result.seconds)
+    assert {stage["name"] for stage in report["stages"]} == set(stages)
+
+
+def test_fake_server_vectors_match_embed_in_either_encoding():
+    with FakeEmbeddingServer(dimensions=8, latency=0.0) as server:
+        for encoding_format in ("float", "base64"):
+            response = httpx.post(
+                f"{server.base_url}/embeddings",
+                json={"input": ["alpha", "beta"], "model": "m", "encoding_format": encoding_format},
+            )
+            data = response.json()["data"]
+            for text, item in zip(["alpha", "beta"], data):
+                embedding = item["embedding"]
+                if encoding_format == "base64":
+                    vector = np.frombuffer(base64.b64decode(embedding), dtype=np.float32)
+                else:
+                    vector = np.asarray(embedding, dtype=np.float32)
+                np.testing.assert_allclose(vector, server.embed(text), rtol=1e-6)
+        assert httpx.post(f"{server.base_url}/models", json={}).status_code == 404
+
+
+def test_injected_errors_and_rate_limits_are_retried(tmp_path):
+    corpus = ingest_benchmark.write_synthetic_corpus(tmp_path, documents=3, words_per_document=300)
+    with FakeEmbeddingServer(dimensions=8, latency=0.0, error_rate=0.3, rate_limit=200, seed=1) as server:
+        result = ingest_benchmark.run(corpus, server, chunk_size=200, chunk_overlap=0,
+                                      scheduler=_scheduler(max_batch_size=2), index=False)
+
+    assert [stage.name for stage in result.stages] == ["load_text", "split", "embed"]
+    assert server.stats.errors + server.stats.rate_limited > 0
+    assert result.embedding["retries"] == server.stats.errors + server.stats.rate_limited
+    assert server.stats.inputs == result.chunks
+
+
+def test_local_backend_skips_the_server(tmp_path):
+    corpus = ingest_benchmark.write_synthetic_corpus(tmp_path, documents=2, words_per_document=200)
+    result = ingest_benchmark.run(corpus, None, chunk_size=300, chunk_overlap=0,
+                                  embedding_model=HashingEmbeddingModel(32))
+
+    assert result.server == {} and result.embedding == {}
+    assert result.chunks > 0
+
+
+def test_server_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        FakeEmbeddingServer(rate_limit=0)
+    with pytest.raises(ValueError):
+        FakeEmbeddingServer(error_rate=1.5)
+
+
+def test_main_writes_a_json_report(tmp_path, capsys):
+    output = tmp_path / "ingest.json"
+    ingest_benchmark.main([
+        "--documents", "3", "--words", "200", "--dimensions", "8", "--latency", "0",
+        "--chunk-size", "300", "--chunk-overlap", "0", "--output", str(output),
+    ])
+
+    report = json.loads(output.read_text())
+    assert report["documents"] == 3 and report["chunks"] > 0
+    assert report["parameters"]["dimensions"] == 8
+    assert report["server"]["inputs"] == report["chunks"]
+    assert "docs/s" in capsys.readouterr().err
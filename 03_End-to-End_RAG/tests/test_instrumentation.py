@@ -0,0 +1,141 @@
+import asyncio
+import logging
+
+import pytest
+
+from aimakerspace import instrumentation
+from aimakerspace.instrumentation import (
+    NOOP_SPAN,
+    InMemorySink,
+    LoggingSink,
+    activate,
+    add_sink,
+    increment,
+    observe,
+    remove_sink,
+    span,
+    start_span,
+)
+
+
+@pytest.fixture
+def sink():
+    sink = add_sink(InMemorySink())
+    yield sink
+    remove_sink(sink)
+
+
+def test_nothing_is_recorded_without_sinks():
+    assert not instrumentation.enabled()
+    assert span("idle", size=1) is NOOP_SPAN
+    assert start_span("idle") is NOOP_SPAN
+    with span("idle") as current, activate(current):
+        current.set_attribute("key", "value")
+        current.add_event("event")
+    increment("idle.count")
+    observe("idle.latency", 1.0)
+
+
+def test_spans_nest_and_record_attributes_events_and_errors(sink):
+    with span("outer", size=2) as outer:
+        outer.set_attribute("hits", 3)
+        with span("inner") as inner:
+            inner.add_event("first_token", position=0)
+    with pytest.raises(RuntimeError):
+        with span("failing"):
+            raise RuntimeError("boom")
+
+    inner_span, outer_span, failing = sink.spans
+    assert inner_span.parent_id == outer_span.span_id and outer_span.parent_id is None
+    assert outer_span.attributes == {"size": 2, "hits": 3}
+    assert inner_span.events[0][0] == "first_token" and inner_span.events[0][2] == {"position": 0}
+    assert failing.parent_id is None and isinstance(failing.error, RuntimeError)
+    assert outer_span.duration_ms >= inner_span.duration_ms >= 0
+    assert outer_span.end_time_ns >= outer_span.start_time_ns
+    assert [(depth, recorded.name) for depth, recorded in sink.iter_tree(outer_span)] == [
+        (0, "outer"), (1, "inner")
+    ]
+    assert sink.summary()["outer.duration_ms"]["count"] == 1.0
+
+
+def test_started_spans_end_once_and_only_nest_when_activated(sink):
+    stream = start_span("stream")
+    with span("sibling"):
+        pass
+    with activate(stream):
+        with span("child"):
+            pass
+    stream.end()
+    stream.end(RuntimeError("late"))
+
+    parents = {recorded.name: recorded.parent_id for recorded in sink.spans}
+    assert parents == {"sibling": None, "child": stream.span_id, "stream": None}
+    assert stream.error is None and len(sink.spans) == 3
+
+
+def test_spans_nest_per_task(sink):
+    async def work(name):
+        with span(name):
+            await asyncio.sleep(0)
+            with span(f"{name}.step"):
+                await asyncio.sleep(0)
+
+    async def main():
+        with span("root"):
+            await asyncio.gather(work("a"), work("b"))
+
+    asyncio.run(main())
+    by_name = {recorded.name: recorded for recorded in sink.spans}
+    assert by_name["a"].parent_id == by_name["b"].parent_id == by_name["root"].span_id
+    assert by_name["a.step"].parent_id == by_name["a"].span_id
+    assert by_name["b.step"].parent_id == by_name["b"].span_id
+
+
+def test_metrics_reach_every_sink(sink):
+    second = add_sink(InMemorySink())
+    try:
+        increment("cache.hits")
+        increment("cache.hits", 2, model="m")
+        observe("latency_ms", 5.0)
+        observe("latency_ms", 15.0)
+    finally:
+        remove_sink(second)
+    increment("cache.hits")
+
+    assert sink.counters["cache.hits"] == 4 and second.counters["cache.hits"] == 3
+    summary = sink.summary()["latency_ms"]
+    assert summary["count"] == 2.0 and summary["mean"] == 10.0 and summary["max"] == 15.0
+
+    sink.clear()
+    assert not sink.spans and not sink.counters and not sink.histograms
+
+
+def test_in_memory_sink_keeps_the_latest_spans():
+    sink = add_sink(InMemorySink(max_spans=2))
+    try:
+        for name in ("one", "two", "three"):
+            with span(name):
+                pass
+    finally:
+        remove_sink(sink)
+
+    assert [recorded.name for recorded in sink.spans] == ["two", "three"]
+    assert len(sink.histograms["one.duration_ms"]) == 1
+
+
+def test_logging_sink_writes_spans_and_metrics(caplog):
+    logger = logging.getLogger("aimakerspace.tests")
+    sink = add_sink(LoggingSink(logger, level=logging.INFO))
+    try:
+        with caplog.at_level(logging.INFO, logger=logger.name):
+            with pytest.raises(ValueError):
+                with span("load", path="a.txt"):
+                    raise ValueError("bad")
+            increment("documents", 3)
+    finally:
+        remove_sink(sink)
+
+    span_line, metric_line = caplog.messages
+    assert span_line.startswith("span load") and "error=ValueError('bad')" in span_line
+    assert "'path': 'a.txt'" in span_line
+    assert metric_line == "counter documents 3 {}"
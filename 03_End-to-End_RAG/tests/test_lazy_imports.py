@@ -0,0 +1,54 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("openai", "httpx", "tiktoken", "opentelemetry", "PyPDF2")
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "aimakerspace",
+        "aimakerspace.vectordatabase",
+        "aimakerspace.rag",
+        "aimakerspace.semantic_cache",
+        "aimakerspace.text_utils",
+        "aimakerspace.instrumentation",
+        "aimakerspace.openai_utils.embedding",
+        "aimakerspace.openai_utils.chatmodel",
+    ],
+)
+def test_importing_does_not_load_optional_dependencies(module):
+    # A fresh interpreter: this test process has long since imported them.
+    script = (
+        f"import sys, {module}\n"
+        f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    )
+    loaded = subprocess.run(
+        [sys.executable, "-c", script], cwd=PACKAGE_ROOT, capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+    assert loaded == ""
+
+
+def test_token_counts_fall_back_without_tiktoken(monkeypatch):
+    from aimakerspace.openai_utils import tokenizer
+
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    tokenizer.get_encoding.cache_clear()
+    try:
+        assert tokenizer.get_encoding("text-embedding-3-small") is None
+        assert tokenizer.count_tokens("x" * 40) == 40 // tokenizer.CHARS_PER_TOKEN + 1
+    finally:
+        tokenizer.get_encoding.cache_clear()
+
+
+def test_opentelemetry_sink_reports_the_missing_package(monkeypatch):
+    from aimakerspace.instrumentation import OpenTelemetrySink
+
+    monkeypatch.setitem(sys.modules, "opentelemetry", None)
+    with pytest.raises(ImportError, match="opentelemetry-api"):
+        OpenTelemetrySink()
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.matrix_store import MatrixStore, top_k_indices, top_k_indices_many
+from aimakerspace.vectordatabase import VectorDatabase, cosine_similarity
+
+
+def _brute_force_top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> list:
+    scores = [cosine_similarity(query, row) for row in matrix]
+    return sorted(range(len(matrix)), key=lambda row: -scores[row])[:k]
+
+
+def test_top_k_indices_is_sorted_and_skips_released_rows():
+    scores = np.array([0.1, 0.9, -np.inf, 0.5, 0.7], dtype=np.float32)
+
+    assert top_k_indices(scores, 3).tolist() == [1, 4, 3]
+    assert top_k_indices(scores, 10).tolist() == [1, 4, 3, 0]
+    reversed_scores = np.where(np.isinf(scores), scores, -scores)
+    assert [
+        row.tolist() for row in top_k_indices_many(np.stack([scores, reversed_scores]), 4)
+    ] == [[1, 4, 3, 0], [0, 3, 4, 1]]
+
+
+def test_store_grows_and_reuses_released_rows():
+    store = MatrixStore(initial_capacity=2)
+    rows = store.extend(np.eye(3, dtype=np.float32))
+
+    assert rows.tolist() == [0, 1, 2]
+    assert store.capacity >= 3 and store.live_count == 3
+
+    store.release([1])
+    assert store.alive.tolist() == [True, False, True]
+    assert store.append([0.0, 3.0, 4.0]) == 1
+    assert store.norms[1] == pytest.approx(5.0)
+
+    with pytest.raises(ValueError):
+        store.append([1.0, 2.0])
+
+
+def test_cosine_scores_match_the_row_by_row_definition():
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((50, 8)).astype(np.float32)
+    store = MatrixStore()
+    store.extend(matrix)
+    query = rng.standard_normal(8).astype(np.float32)
+
+    expected = [cosine_similarity(query, row) for row in matrix]
+    np.testing.assert_allclose(store.cosine_scores(query), expected, rtol=1e-5)
+    np.testing.assert_allclose(
+        store.cosine_scores_many(np.stack([query, -query]))[1], -np.asarray(expected), rtol=1e-5
+    )
+
+    store.release([3])
+    assert store.cosine_scores(query)[3] == -np.inf
+
+
+def test_vector_database_search_matches_brute_force():
+    rng = np.random.default_rng(1)
+    matrix = rng.standard_normal((200, 16)).astype(np.float32)
+    vector_db = VectorDatabase(HashingEmbeddingModel(16), lexical=False)
+    vector_db.insert_many([f"key-{row}" for row in range(len(matrix))], matrix)
+    query = rng.standard_normal(16).astype(np.float32)
+
+    expected = [f"key-{row}" for row in _brute_force_top_k(matrix, query, 5)]
+    assert [key for key, _ in vector_db.search(query, 5)] == expected
+
+    # Any other measure falls back to scoring row by row.
+    def dot(a, b):
+        return float(np.dot(a, b))
+
+    best = int(np.argmax(matrix @ query))
+    assert vector_db.search(query, 1, distance_measure=dot)[0][0] == f"key-{best}"
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.indexes import IVFIndex
+from aimakerspace.metadata_index import MetadataIndex
+from aimakerspace.quantization import ScalarQuantizedIndex
+from aimakerspace.vectordatabase import Record, VectorDatabase
+
+
+def _tenant_store(index=None, count=2000, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    records = [
+        Record(
+            f"doc-{row}",
+            f"doc-{row}",
+            {"tenant": f"t{row % 10}", "tags": ["even" if row % 2 == 0 else "odd", "all"]},
+        )
+        for row in range(count)
+    ]
+    vector_db = VectorDatabase(HashingEmbeddingModel(dim), index=index, lexical=False)
+    vector_db.upsert_many(records, vectors)
+    return vector_db, vectors
+
+
+def test_metadata_index_matches_scalars_lists_and_intersections():
+    index = MetadataIndex()
+    index.add(0, {"tenant": "a", "tags": ["x", "y"], "nested": {"ignored": 1}})
+    index.add(1, {"tenant": "b", "tags": ["y"]})
+    index.add(2, {"tenant": "a"})
+
+    assert index.rows({"tenant": "a"}) == {0, 2}
+    assert index.rows({"tags": "y"}) == {0, 1}
+    assert index.rows({"tenant": ["a", "b"], "tags": "y"}) == {0, 1}
+    assert index.rows({"tenant": "a", "tags": "missing"}) == set()
+    assert index.mask({"tenant": "b"}, 4).tolist() == [False, True, False, False]
+
+    index.remove(0, {"tenant": "a", "tags": ["x", "y"]})
+    assert index.rows({"tags": "x"}) == set()
+
+
+@pytest.mark.parametrize(
+    "make_index",
+    [
+        lambda: None,
+        lambda: IVFIndex(nlist=16, nprobe=16, min_train_size=1000),
+        lambda: ScalarQuantizedIndex(rerank=50, min_train_size=1000),
+    ],
+)
+def test_filtered_search_matches_brute_force_over_the_slice(make_index):
+    vector_db, vectors = _tenant_store(make_index())
+    query = vectors[3] + 0.01
+
+    hits = vector_db.search_records(query, 5, filter={"tenant": "t3"})
+    assert all(record.metadata["tenant"] == "t3" for record, _ in hits)
+    allowed = np.arange(3, len(vectors), 10)
+    scores = vectors[allowed] @ query / np.linalg.norm(vectors[allowed], axis=1)
+    expected = [f"doc-{row}" for row in allowed[np.argsort(-scores)[:5]]]
+    assert [record.id for record, _ in hits] == expected
+
+
+def test_filters_follow_upserts_and_deletes():
+    vector_db, vectors = _tenant_store()
+
+    assert len(vector_db.search(vectors[0], 50, filter={"tenant": "t0", "tags": "odd"})) == 0
+    assert len(vector_db.search(vectors[0], 500, filter={"tenant": ["t0", "t1"]})) == 400
+
+    vector_db.upsert(Record("doc-0", "moved", {"tenant": "t1"}), vectors[0])
+    vector_db.delete("doc-10")
+    hits = vector_db.search(vectors[0], 500, filter={"tenant": "t0"})
+    assert len(hits) == 198 and "moved" not in [text for text, _ in hits]
+    assert vector_db.search(vectors[0], 1, filter={"tenant": "t1"})[0][0] == "moved"
+    assert vector_db.search(vectors[0], 5, filter={"tenant": "nobody"}) == []
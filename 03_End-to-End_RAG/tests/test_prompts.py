@@ -0,0 +1,73 @@
+import pytest
+
+from aimakerspace.openai_utils.prompts import (
+    BasePrompt,
+    SystemRolePrompt,
+    UserRolePrompt,
+    compile_template,
+    pack_context,
+)
+from aimakerspace.openai_utils.tokenizer import count_tokens
+from aimakerspace.rag import RAG_SYSTEM_TEMPLATE, RAG_USER_TEMPLATE
+from aimakerspace.text_utils import CharacterTextSplitter
+
+
+def test_compiled_templates_render_like_str_format():
+    values = {
+        "context": "chunk {not a field}",
+        "context_count": 3,
+        "similarity_scores": "",
+        "user_query": "Why?",
+        "response_style": "detailed",
+        "response_length": "brief",
+    }
+    for template in (RAG_SYSTEM_TEMPLATE, RAG_USER_TEMPLATE):
+        assert BasePrompt(template).format_prompt(**values) == template.format(**values)
+
+    prompt = BasePrompt("{{literal}} {score:.2f} {name!r} {missing}!")
+    assert prompt.format_prompt(score=0.12345, name="x") == "{literal} 0.12 'x' !"
+    assert prompt.get_input_variables() == ["score", "name", "missing"]
+
+
+def test_templates_are_parsed_once_and_shared():
+    compile_template.cache_clear()
+    SystemRolePrompt("Hello {name}")
+    UserRolePrompt("Hello {name}")
+
+    info = compile_template.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
+    assert UserRolePrompt("Hi {name}").create_message(name="Ada") == {
+        "role": "user",
+        "content": "Hi Ada",
+    }
+    assert UserRolePrompt("Hi {name}").create_message(apply_format=False)["content"] == "Hi {name}"
+
+
+@pytest.mark.parametrize("template", ["{0}", "{}", "{user.name}", "{items[0]}", "{unclosed", "}"])
+def test_unsupported_placeholders_are_rejected(template):
+    with pytest.raises(ValueError):
+        BasePrompt(template)
+
+
+def test_pack_context_trims_splitter_overlap_and_respects_the_budget():
+    document = " ".join(f"sentence number {number} of the essay." for number in range(40))
+    chunks = CharacterTextSplitter(chunk_size=200, chunk_overlap=50).split(document)
+    scored = [(chunk, 1.0 - position / 100) for position, chunk in enumerate(chunks)]
+
+    packed = pack_context(scored, source_template="{text}", separator="")
+    assert packed.text == document and packed.dropped == 0
+    assert [text for text, _ in packed.chunks][0] == chunks[0]
+    assert packed.tokens == sum(count_tokens(text) for text, _ in packed.chunks)
+
+    budget = pack_context(scored[::-1], max_tokens=60)
+    assert budget.tokens <= 60 and budget.dropped == len(chunks) - len(budget.chunks)
+    assert budget.chunks[0] == scored[0]
+    assert budget.text.startswith(f"[Source 1]: {chunks[0]}")
+
+
+def test_pack_context_drops_contained_duplicates():
+    packed = pack_context([("alpha beta gamma", 0.5), ("beta", 0.9), ("alpha beta gamma", 0.1)])
+
+    assert packed.chunks == [("beta", 0.9), ("alpha beta gamma", 0.5)]
+    assert packed.dropped == 1
+    assert packed.text == "[Source 1]: beta\n\n[Source 2]: alpha beta gamma"
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.indexes import recall_at_k
+from aimakerspace.matrix_store import MatrixStore
+from aimakerspace.quantization import ProductQuantizedIndex, ScalarQuantizedIndex
+from aimakerspace.vectordatabase import VectorDatabase
+
+
+def _clustered(count: int, dim: int = 32, clusters: int = 20, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    data = centers[rng.integers(0, clusters, size=count)] + rng.normal(
+        scale=0.3, size=(count, dim)
+    )
+    queries = data[rng.choice(count, size=50, replace=False)] + rng.normal(
+        scale=0.05, size=(50, dim)
+    )
+    return data.astype(np.float32), queries.astype(np.float32)
+
+
+def _trained(index, data):
+    store = MatrixStore()
+    index.add(store, store.extend(data))
+    assert index.is_trained
+    return store
+
+
+def test_scalar_codes_are_a_quarter_of_the_floats_and_keep_recall():
+    data, queries = _clustered(2000)
+    index = ScalarQuantizedIndex(min_train_size=1000)
+    store = _trained(index, data)
+
+    assert index.nbytes == data.size
+    assert recall_at_k(store, index, queries, 10) >= 0.9
+
+
+def test_product_quantizer_recall_improves_with_rerank():
+    data, queries = _clustered(2000)
+    index = ProductQuantizedIndex(m=8, min_train_size=1000, max_train_size=2000)
+    store = _trained(index, data)
+    assert index.nbytes == len(data) * 8
+
+    coarse = recall_at_k(store, index, queries, 10)
+    index.rerank = 100
+    assert recall_at_k(store, index, queries, 10) >= max(coarse, 0.9)
+
+
+def test_quantized_search_skips_deleted_rows():
+    data, queries = _clustered(2000)
+    vector_db = VectorDatabase(
+        HashingEmbeddingModel(32),
+        index=ScalarQuantizedIndex(rerank=50, min_train_size=1000),
+        lexical=False,
+    )
+    vector_db.insert_many([f"key-{row}" for row in range(len(data))], data)
+    nearest = vector_db.search(queries[0], 1)[0][0]
+
+    vector_db.delete(nearest)
+    assert nearest not in [key for key, _ in vector_db.search(queries[0], 20)]
+
+
+@pytest.mark.parametrize(
+    "make_index",
+    [
+        lambda: ScalarQuantizedIndex(rerank=20, min_train_size=1000),
+        lambda: ProductQuantizedIndex(m=8, rerank=20, min_train_size=1000),
+    ],
+)
+def test_quantized_state_round_trips_through_a_memory_mapped_load(tmp_path, make_index):
+    data, queries = _clustered(2000)
+    vector_db = VectorDatabase(HashingEmbeddingModel(32), index=make_index(), lexical=False)
+    vector_db.insert_many([f"key-{row}" for row in range(len(data))], data)
+    vector_db.save(tmp_path)
+    assert (tmp_path / vector_db.index.state_file).exists()
+
+    loaded = VectorDatabase.load(tmp_path, mmap=True)
+    assert type(loaded.index) is type(vector_db.index)
+    assert loaded.index.rerank == 20
+    np.testing.assert_array_equal(
+        loaded.index._codes[: len(data)], vector_db.index._codes[: len(data)]
+    )
+    assert loaded.search_many(queries, 5) == vector_db.search_many(queries, 5)
+
+
+def test_loading_another_quantizer_retrains_instead_of_misreading_state(tmp_path):
+    data, queries = _clustered(2000)
+    vector_db = VectorDatabase(
+        HashingEmbeddingModel(32), index=ScalarQuantizedIndex(min_train_size=1000), lexical=False
+    )
+    vector_db.insert_many([f"key-{row}" for row in range(len(data))], data)
+    vector_db.save(tmp_path)
+
+    loaded = VectorDatabase.load(
+        tmp_path, index=ProductQuantizedIndex(m=8, min_train_size=1000)
+    )
+    assert loaded.index.is_trained and loaded.index.nbytes == len(data) * 8
+
+    # State files that were renamed by hand are rejected by kind.
+    (tmp_path / "sq8_index.npz").rename(tmp_path / "pq_index.npz")
+    with pytest.raises(ValueError, match="sq8"):
+        ProductQuantizedIndex(m=8).load(tmp_path, loaded._store)
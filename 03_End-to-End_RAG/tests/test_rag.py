@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.instrumentation import InMemorySink, add_sink, remove_sink
+from aimakerspace.rag import RetrievalAugmentedQAPipeline
+from aimakerspace.vectordatabase import VectorDatabase
+
+CHUNKS = [
+    "Founders should hire slowly and fire quickly.",
+    "The Michael Eisner Memorial Weak Executive Problem is about hiring weak executives.",
+    "Most startups fail because they never find product market fit.",
+]
+
+
+class _FakeLLM:
+    model_name = "gpt-4o-mini"
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _answer(self, messages):
+        self.calls += 1
+        question = messages[-1]["content"].split("Question: ")[1].split("\n")[0]
+        if self.fail_on and self.fail_on in question:
+            raise RuntimeError(f"cannot answer {question}")
+        return f"answer to {question}"
+
+    def run(self, messages):
+        return self._answer(messages)
+
+    async def arun(self, messages):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return self._answer(messages)
+        finally:
+            self.in_flight -= 1
+
+    async def astream(self, messages):
+        for token in self._answer(messages).split(" "):
+            yield token + " "
+
+
+def _pipeline(llm=None, **kwargs):
+    vector_db = asyncio.run(VectorDatabase(HashingEmbeddingModel(64)).abuild_from_list(CHUNKS))
+    return RetrievalAugmentedQAPipeline(llm or _FakeLLM(), vector_db, **kwargs)
+
+
+def test_async_pipeline_matches_the_blocking_one():
+    pipeline = _pipeline(include_scores=True)
+    question = "What is the weak executive problem?"
+
+    blocking = pipeline.run_pipeline(question, k=2)
+    result = asyncio.run(pipeline.arun_pipeline(question, k=2))
+    assert result == blocking
+    assert result["response"] == f"answer to {question}"
+    assert result["context_count"] == 2 and len(result["similarity_scores"]) == 2
+
+
+def test_streamed_answer_ends_the_pipeline_span_when_exhausted():
+    pipeline = _pipeline()
+    sink = add_sink(InMemorySink())
+
+    async def consume():
+        result = await pipeline.arun_pipeline("Why do startups fail?", k=1, stream=True)
+        assert result["context"]
+        assert not [span for span in sink.spans if span.name == "rag.pipeline"]
+        return "".join([token async for token in result["response"]])
+
+    try:
+        assert asyncio.run(consume()).strip() == "answer to Why do startups fail?"
+        (pipeline_span,) = [span for span in sink.spans if span.name == "rag.pipeline"]
+        assert {span.name for span in sink.spans if span.parent_id == pipeline_span.span_id} >= {
+            "rag.retrieve", "rag.prompt"
+        }
+    finally:
+        remove_sink(sink)
+
+
+def test_batch_keeps_order_bounds_concurrency_and_collects_errors():
+    llm = _FakeLLM(fail_on="broken")
+    pipeline = _pipeline(llm)
+    questions = [f"question {number}" for number in range(6)] + ["broken question"]
+
+    results = asyncio.run(pipeline.arun_batch(questions, k=1, max_concurrency=2, return_exceptions=True))
+    assert [result["response"] for result in results[:-1]] == [
+        f"answer to {question}" for question in questions[:-1]
+    ]
+    assert isinstance(results[-1], RuntimeError)
+    assert llm.max_in_flight == 2
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(pipeline.arun_batch(questions, k=1))
+    with pytest.raises(ValueError):
+        asyncio.run(pipeline.arun_batch(questions, max_concurrency=0))
+
+
+def test_result_keeps_retrieved_chunks_next_to_the_packed_ones():
+    overlap = "shared sentence repeated by the splitter between neighbours"
+    first, second = f"first part {overlap}", f"{overlap} second part"
+    vector_db = asyncio.run(
+        VectorDatabase(HashingEmbeddingModel(64)).abuild_from_list([first, second])
+    )
+    pipeline = RetrievalAugmentedQAPipeline(_FakeLLM(), vector_db, include_scores=True)
+
+    result = pipeline.run_pipeline("question", k=2)
+    hits = vector_db.search_by_text("question", k=2)
+    assert result["context"] == hits and result["context_count"] == 2
+    (top, top_score), (other, other_score) = hits
+    trimmed = " second part" if other == second else "first part "
+    assert result["packed_context"] == [(top, top_score), (trimmed, other_score)]
+    assert result["prompts_used"]["user"]["content"].count(overlap) == 1
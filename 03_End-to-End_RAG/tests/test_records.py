@@ -0,0 +1,56 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.vectordatabase import Record, VectorDatabase, record_id, records_from_texts
+
+
+def test_duplicate_texts_become_distinct_records():
+    records = records_from_texts(["a", "b", "a"], [{"page": 1}, {"page": 2}, {"page": 3}])
+
+    assert [record.id for record in records] == ["a", "b", record_id("a", 1)]
+    assert record_id("a", 1) != "a" and record_id("a", 1) == record_id("a", 1)
+    with pytest.raises(ValueError):
+        records_from_texts(["a"], ids=["x", "y"])
+
+    vector_db = asyncio.run(
+        VectorDatabase(HashingEmbeddingModel(32)).abuild_from_list(
+            ["a", "b", "a"], metadatas=[{"page": 1}, {"page": 2}, {"page": 3}]
+        )
+    )
+    assert len(vector_db) == 3
+    assert vector_db.get(record_id("a", 1)) == Record(record_id("a", 1), "a", {"page": 3})
+    assert vector_db.retrieve_from_key("a") is not None
+
+
+def test_upsert_overwrites_in_place_and_last_write_wins():
+    vector_db = VectorDatabase(HashingEmbeddingModel(4))
+    vector_db.upsert_many(
+        [Record("x", "first"), Record("y", "other"), Record("x", "second")],
+        [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0]],
+    )
+    assert len(vector_db) == 2 and vector_db.get("x").text == "second"
+
+    capacity = vector_db._store.capacity
+    vector_db.upsert(Record("x", "third", {"v": 3}), [0, 0, 0, 1])
+    assert vector_db._store.capacity == capacity and len(vector_db._store) == 2
+    assert vector_db.search_records([0, 0, 0, 1], 1)[0][0] == Record("x", "third", {"v": 3})
+
+    with pytest.raises(ValueError):
+        vector_db.upsert_many([Record("z", "z")], [[1, 0, 0, 0], [0, 1, 0, 0]])
+
+
+def test_delete_frees_rows_for_reuse_and_hides_them_from_search():
+    vector_db = VectorDatabase(HashingEmbeddingModel(4))
+    vector_db.insert_many(["a", "b", "c"], np.eye(3, 4))
+
+    assert vector_db.delete("b") and not vector_db.delete("b")
+    assert vector_db.delete_many(["a", "missing", "a"]) == 1
+    assert "b" not in vector_db and vector_db.get("b") is None
+    assert [text for text, _ in vector_db.search([1, 1, 1, 0], 3)] == ["c"]
+
+    vector_db.insert("d", [0, 1, 0, 0])
+    assert len(vector_db._store) == 3
+    assert vector_db.search([0, 1, 0, 0], 1)[0][0] == "d"
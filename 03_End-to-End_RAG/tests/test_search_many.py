@@ -0,0 +1,63 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.indexes import IVFIndex
+from aimakerspace.vectordatabase import Record, VectorDatabase
+
+
+class _CountingEmbeddingModel(HashingEmbeddingModel):
+    def __init__(self):
+        super().__init__(dimensions=64)
+        self.requests = []
+
+    def get_embeddings(self, list_of_text):
+        texts = list(list_of_text)
+        self.requests.append(texts)
+        return super().get_embeddings(texts)
+
+
+def _assert_same_hits(actual, expected):
+    # Matrix-matrix and matrix-vector products may round the last bit differently.
+    assert [text for text, _ in actual] == [text for text, _ in expected]
+    np.testing.assert_allclose(
+        [score for _, score in actual], [score for _, score in expected], rtol=1e-5
+    )
+
+
+@pytest.mark.parametrize(
+    "make_index", [lambda: None, lambda: IVFIndex(nlist=8, nprobe=8, min_train_size=500)]
+)
+def test_search_many_matches_one_query_at_a_time(make_index):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((1000, 16)).astype(np.float32)
+    vector_db = VectorDatabase(HashingEmbeddingModel(16), index=make_index(), lexical=False)
+    vector_db.upsert_many(
+        [Record(f"id-{row}", f"text-{row}", {"odd": row % 2}) for row in range(len(vectors))],
+        vectors,
+    )
+    vector_db.delete("id-3")
+    queries = rng.standard_normal((20, 16)).astype(np.float32)
+
+    for filter in (None, {"odd": 1}):
+        for results, query in zip(vector_db.search_many(queries, 5, filter), queries):
+            _assert_same_hits(results, vector_db.search(query, 5, filter=filter))
+    with pytest.raises(ValueError):
+        vector_db.search_many(queries, 0)
+
+
+def test_text_queries_are_embedded_in_one_request():
+    model = _CountingEmbeddingModel()
+    texts = ["apples and pears", "kittens are cute", "stock market news"]
+    vector_db = asyncio.run(VectorDatabase(model).abuild_from_list(texts))
+    model.requests.clear()
+
+    queries = ["pears", "a cute kitten"]
+    results = vector_db.search_by_texts(queries, 1, return_as_text=True)
+    assert model.requests == [queries]
+    assert results == [[vector_db.search_by_text(query, 1)[0][0]] for query in queries]
+
+    async_results = asyncio.run(vector_db.asearch_by_texts(queries, 2))
+    assert [[text for text, _ in hits][:1] for hits in async_results] == results
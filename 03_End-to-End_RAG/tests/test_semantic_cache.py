@@ -0,0 +1,94 @@
+import asyncio
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.rag import RetrievalAugmentedQAPipeline
+from aimakerspace.semantic_cache import SemanticCache, context_hash
+from aimakerspace.vectordatabase import VectorDatabase
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _CountingLLM:
+    model_name = "gpt-4o-mini"
+
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, messages):
+        self.calls += 1
+        return f"answer {self.calls}"
+
+    async def arun(self, messages):
+        return self.run(messages)
+
+    async def astream(self, messages):
+        yield self.run(messages)
+
+
+def _cache(**kwargs):
+    return SemanticCache(HashingEmbeddingModel(256), **kwargs)
+
+
+def test_hits_need_a_similar_query_and_the_same_context():
+    cache = _cache(threshold=0.9)
+    cache.store("What is a founder?", ["chunk a", "chunk b"], "someone who starts a company")
+
+    assert cache.lookup("What is a founder?", ["chunk b", "chunk a"]) == (
+        "someone who starts a company"
+    )
+    assert cache.lookup("What is a founder?", ["chunk a"]) is None
+    assert cache.lookup("What is a founder?", ["chunk a", "chunk b"], namespace="short") is None
+    assert cache.lookup("How do I raise money?", ["chunk a", "chunk b"]) is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 3)
+    assert context_hash(["x", "y"]) == context_hash(["y", "x", "x"]) != context_hash(["x"])
+
+
+def test_entries_expire_and_least_recently_used_are_evicted():
+    clock = _Clock()
+    cache = _cache(ttl=10, max_entries=2, clock=clock)
+    for question in ("one", "two"):
+        cache.store(question, ["ctx"], question.upper())
+    assert cache.lookup("one", ["ctx"]) == "ONE"
+
+    cache.store("three", ["ctx"], "THREE")
+    assert len(cache) == 2 and cache.stats.evictions == 1
+    assert cache.lookup("two", ["ctx"]) is None
+    assert cache.lookup("one", ["ctx"]) == "ONE"
+
+    clock.now = 11
+    assert cache.lookup("three", ["ctx"]) is None
+    assert len(cache) == 0 and cache.stats.expired == 2
+
+
+def test_pipeline_answers_repeated_questions_from_the_cache():
+    vector_db = asyncio.run(
+        VectorDatabase(HashingEmbeddingModel(256)).abuild_from_list(
+            ["Founders hire slowly.", "Startups fail without product market fit."]
+        )
+    )
+    llm = _CountingLLM()
+    pipeline = RetrievalAugmentedQAPipeline(llm, vector_db, cache=_cache())
+
+    first = pipeline.run_pipeline("Why do startups fail?", k=1)
+    second = asyncio.run(pipeline.arun_pipeline("Why do startups fail?", k=1))
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["response"] == first["response"] and llm.calls == 1
+
+    # Different prompt settings do not share answers.
+    assert not pipeline.run_pipeline("Why do startups fail?", k=1, response_length="brief")["cached"]
+
+    async def stream_twice():
+        answers = []
+        for _ in range(2):
+            result = await pipeline.arun_pipeline("How do founders hire?", k=1, stream=True)
+            answers.append("".join([token async for token in result["response"]]))
+        return answers
+
+    streamed = asyncio.run(stream_twice())
+    assert streamed[0] == streamed[1] and llm.calls == 3
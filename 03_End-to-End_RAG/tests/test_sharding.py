@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.sharding import ShardedVectorDatabase
+from aimakerspace.vectordatabase import Record, VectorDatabase
+
+
+def test_sharded_search_survives_bad_queries_and_reads_its_snapshot():
+    vector_db = VectorDatabase(HashingEmbeddingModel(8), lexical=False)
+    vectors = np.eye(8, dtype=np.float32)
+    vector_db.upsert_many([Record(f"id-{row}", f"text-{row}") for row in range(8)], vectors)
+
+    with ShardedVectorDatabase(vector_db, num_shards=2) as sharded:
+        with pytest.raises(ValueError):
+            sharded.search(np.ones(5), 3)
+
+        vector_db.upsert(Record("id-3", "rewritten"), vectors[3])
+        assert sharded.search(vectors[3], 1)[0][0] == "text-3"
+        record, _ = sharded.search_records(vectors[3], 1)[0]
+        assert (record.id, record.text) == ("id-3", "text-3")
+
+        sharded.refresh()
+        assert sharded.search(vectors[3], 1)[0][0] == "rewritten"
+
+
+def test_failed_refresh_releases_the_shards_built_so_far(monkeypatch):
+    from aimakerspace import sharding
+
+    vector_db = VectorDatabase(HashingEmbeddingModel(8), lexical=False)
+    vector_db.insert_many([f"id-{row}" for row in range(8)], np.eye(8, dtype=np.float32))
+    created = []
+    real_shared_memory = sharding.shared_memory.SharedMemory
+
+    def shared_memory_failing_on_third(*args, **kwargs):
+        if len(created) == 2:
+            raise OSError("no space left on device")
+        block = real_shared_memory(*args, **kwargs)
+        created.append(block.name)
+        return block
+
+    monkeypatch.setattr(sharding.shared_memory, "SharedMemory", shared_memory_failing_on_third)
+    with pytest.raises(OSError):
+        ShardedVectorDatabase(vector_db, num_shards=4)
+    monkeypatch.undo()
+
+    for name in created:
+        with pytest.raises(FileNotFoundError):
+            sharding.shared_memory.SharedMemory(name=name)
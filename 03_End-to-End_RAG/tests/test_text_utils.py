@@ -0,0 +1,122 @@
+import os
+import time
+
+import pytest
+
+from aimakerspace.openai_utils.tokenizer import count_tokens
+from aimakerspace.text_utils import ChunkSpan, PDFLoader, TokenTextSplitter, _extract_pages
+
+
+def _hang_on_marked_pdfs(file_path: str, start: int, stop) -> str:
+    if os.path.basename(file_path).startswith("hang"):
+        time.sleep(600)
+    return _extract_pages(file_path, start, stop)
+
+
+class _HangingPDFLoader(PDFLoader):
+    _extract = staticmethod(_hang_on_marked_pdfs)
+
+
+def _write_pdfs(directory, names):
+    import PyPDF2
+
+    for name in names:
+        writer = PyPDF2.PdfWriter()
+        writer.add_blank_page(width=72, height=72)
+        with open(directory / name, "wb") as file_handle:
+            writer.write(file_handle)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_hanging_pdf_is_killed_and_skipped(tmp_path, max_workers):
+    _write_pdfs(tmp_path, ["a.pdf", "hang-b.pdf", "i.pdf", "j.pdf", "k.pdf"])
+    loader = _HangingPDFLoader(str(tmp_path), max_workers=max_workers, timeout=2)
+
+    started = time.monotonic()
+    loader.load()
+
+    assert time.monotonic() - started < 30
+    assert loader.skipped == [tmp_path / "hang-b.pdf"]
+    assert len(loader.documents) == 4
+
+
+def _crash_on_marked_pdfs(file_path: str, start: int, stop) -> str:
+    if os.path.basename(file_path).startswith("crash"):
+        os._exit(1)
+    return _extract_pages(file_path, start, stop)
+
+
+class _CrashingPDFLoader(PDFLoader):
+    _extract = staticmethod(_crash_on_marked_pdfs)
+
+
+@pytest.mark.parametrize("max_workers,timeout", [(1, 60), (2, None)])
+def test_crashed_worker_is_replaced_and_its_file_skipped(tmp_path, max_workers, timeout):
+    _write_pdfs(tmp_path, ["a.pdf", "crash-b.pdf", "c.pdf", "crash-d.pdf", "e.pdf"])
+    loader = _CrashingPDFLoader(str(tmp_path), max_workers=max_workers, timeout=timeout)
+
+    loader.load()
+
+    assert loader.skipped == [tmp_path / "crash-b.pdf", tmp_path / "crash-d.pdf"]
+    assert len(loader.documents) == 3
+
+
+def test_unreadable_pdf_is_skipped_by_workers_and_raised_in_process(tmp_path):
+    _write_pdfs(tmp_path, ["a.pdf", "c.pdf"])
+    (tmp_path / "b.pdf").write_bytes(b"not a pdf")
+
+    loader = PDFLoader(str(tmp_path), max_workers=2)
+    loader.load()
+    assert loader.skipped == [tmp_path / "b.pdf"]
+    assert len(loader.documents) == 2
+
+    with pytest.raises(Exception):
+        PDFLoader(str(tmp_path)).load()
+
+
+def _essay(sentences: int) -> str:
+    paragraphs = []
+    for start in range(0, sentences, 5):
+        paragraphs.append(
+            " ".join(f"Sentence {number} talks about founders." for number in range(start, start + 5))
+        )
+    return "\n\n".join(paragraphs)
+
+
+def test_token_splitter_chunks_on_sentence_boundaries_within_budget():
+    text = _essay(40)
+    splitter = TokenTextSplitter(chunk_size=40, chunk_overlap=12)
+    spans = list(splitter.iter_spans(text))
+
+    assert [span.text([text]) for span in spans] == splitter.split(text)
+    covered = set()
+    for previous, span in zip([None] + spans, spans):
+        chunk = span.text([text])
+        assert count_tokens(chunk) <= 40
+        assert chunk.startswith("Sentence") and chunk.endswith("founders.")
+        if previous is not None:
+            assert previous.start < span.start <= previous.end
+            assert count_tokens(text[span.start : previous.end]) <= 12
+        covered.update(range(span.start, span.end))
+    assert all(index in covered for index, char in enumerate(text) if not char.isspace())
+
+
+def test_token_splitter_spans_address_many_documents_without_copies():
+    texts = ["First document. It is short.", "   ", "Second one.\nWith a line break."]
+    splitter = TokenTextSplitter(chunk_size=5, chunk_overlap=0)
+
+    spans = splitter.split_spans(texts)
+    assert {span.doc_id for span in spans} == {0, 2}
+    assert splitter.split_texts(texts) == [span.text(texts) for span in spans]
+    assert spans[0] == ChunkSpan(0, 0, len("First document."))
+
+
+def test_token_splitter_cuts_overlong_sentences_between_words():
+    text = " ".join(f"word{number}" for number in range(200))
+    chunks = TokenTextSplitter(chunk_size=20, chunk_overlap=5).split(text)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 20 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+    with pytest.raises(ValueError):
+        TokenTextSplitter(chunk_size=10, chunk_overlap=10)
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from aimakerspace.embedding_backends import HashingEmbeddingModel
+from aimakerspace.quantization import ProductQuantizedIndex
+from aimakerspace.vectordatabase import Record, VectorDatabase
+
+
+def _random_store(count: int, dim: int = 16, seed: int = 0) -> VectorDatabase:
+    vector_db = VectorDatabase(HashingEmbeddingModel(dim), lexical=False)
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    vector_db.insert_many([f"key-{row}" for row in range(count)], vectors)
+    return vector_db
+
+
+def test_save_over_memory_mapped_load(tmp_path):
+    original = _random_store(5000)
+    original.save(tmp_path)
+
+    loaded = VectorDatabase.load(tmp_path, mmap=True)
+    loaded.save(tmp_path)
+
+    reloaded = VectorDatabase.load(tmp_path)
+    assert len(reloaded) == 5000
+    np.testing.assert_array_equal(
+        reloaded.retrieve_from_key("key-4999"), original.retrieve_from_key("key-4999")
+    )
+    # The store that was saved over keeps reading its own (old) mapping.
+    np.testing.assert_array_equal(
+        loaded.retrieve_from_key("key-0"), original.retrieve_from_key("key-0")
+    )
+    assert not [entry for entry in tmp_path.iterdir() if entry.name.startswith(".save-")]
+
+
+def test_save_drops_lexical_state_of_non_lexical_store(tmp_path):
+    model = HashingEmbeddingModel(32)
+    texts = ["apple pie", "banana split"]
+    vector_db = VectorDatabase(model, lexical=True)
+    vector_db.upsert_many(
+        [Record("a", texts[0]), Record("b", texts[1])], model.get_embeddings(texts)
+    )
+    vector_db.save(tmp_path)
+
+    edited = VectorDatabase.load(tmp_path, embedding_model=model, lexical=False)
+    edited.delete("a")
+    edited.upsert(Record("c", "cherry tart"), model.get_embedding("cherry tart"))
+    edited.save(tmp_path)
+
+    reloaded = VectorDatabase.load(tmp_path, embedding_model=model)
+    hits = reloaded.search_by_text("cherry tart", k=2, mode="lexical")
+    assert [text for text, _ in hits] == ["cherry tart"]
+
+
+def test_product_quantizer_rejects_indivisible_dimension_before_storing():
+    vector_db = VectorDatabase(
+        HashingEmbeddingModel(10),
+        index=ProductQuantizedIndex(m=4, min_train_size=1),
+        lexical=False,
+    )
+    with pytest.raises(ValueError):
+        vector_db.insert_many(["a", "b"], np.ones((2, 10)))
+    assert len(vector_db) == 0 and len(vector_db._store) == 0
+    with pytest.raises(ValueError):
+        ProductQuantizedIndex(m=2.5)
+
+
+def test_save_and_load_round_trip_records_and_deletes(tmp_path):
+    vector_db = _random_store(50)
+    vector_db.upsert(Record("extra", "extra text", {"lang": "en"}), np.ones(16))
+    vector_db.delete("key-7")
+    vector_db.save(tmp_path)
+
+    loaded = VectorDatabase.load(tmp_path, mmap=False)
+    assert len(loaded) == 50 and "key-7" not in loaded
+    assert loaded.get("extra") == Record("extra", "extra text", {"lang": "en"})
+    query = np.arange(16, dtype=np.float32)
+    assert loaded.search(query, 5) == vector_db.search(query, 5)
+
+
+def test_memory_mapped_load_is_lazy_and_copy_on_write(tmp_path):
+    _random_store(100).save(tmp_path)
+
+    loaded = VectorDatabase.load(tmp_path, mmap=True)
+    assert isinstance(loaded._store.matrix.base, np.memmap) or isinstance(
+        loaded._store.matrix, np.memmap
+    )
+    loaded.insert("new", np.ones(16))
+    loaded.upsert(Record("key-0", "key-0"), np.zeros(16))
+
+    # The file on disk is untouched until the store is saved again.
+    reopened = VectorDatabase.load(tmp_path)
+    assert "new" not in reopened
+    assert reopened.retrieve_from_key("key-0").any()
+
+
+def test_load_rejects_unknown_format_versions(tmp_path):
+    import json
+
+    _random_store(3).save(tmp_path)
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    manifest["format_version"] = 99
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+
+    with pytest.raises(ValueError):
+        VectorDatabase.load(tmp_path)